@@ -0,0 +1,95 @@
+import re
+import time
+import uuid
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+from app.core.logging import request_id
+from app.core.metrics import (
+    QueryStats,
+    current_query_stats,
+    http_request_db_queries,
+    http_request_db_seconds,
+    http_request_duration_seconds,
+)
+
+
+class MetricsMiddleware:
+    """Record the latency and the SQL statements of every HTTP request per route.
+
+    Requests are labelled with the route's path template (e.g.
+    /winning-ballot/{draw_date}) rather than the requested path, so the number
+    of label values stays bounded. Requests matching no route are labelled
+    "unmatched".
+
+    A pure ASGI middleware, since BaseHTTPMiddleware runs the endpoint in a
+    separate task and costs more per request.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = 500
+
+        async def send_with_status(message: Message) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = QueryStats()
+        token = current_query_stats.set(stats)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            duration = time.perf_counter() - start
+            current_query_stats.reset(token)
+            # Set on the scope by the router once a route matched
+            route = getattr(scope.get("route"), "path", "unmatched")
+            http_request_duration_seconds.observe(
+                duration, method=scope["method"], route=route, status=status
+            )
+            http_request_db_queries.observe(stats.count, route=route)
+            http_request_db_seconds.observe(stats.seconds, route=route)
+
+
+class RequestIdMiddleware:
+    """Give every HTTP request an id, added to its log records and response.
+
+    The client's X-Request-ID header is reused when it looks like an id, so
+    requests can be traced across services, otherwise a new one is generated.
+    """
+
+    HEADER = "x-request-id"
+    VALID_ID = re.compile(r"[A-Za-z0-9._-]{1,128}")
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        current_id = next(
+            (value.decode("latin-1") for name, value in scope["headers"] if name == self.HEADER.encode()),
+            None,
+        )
+        if current_id is None or not self.VALID_ID.fullmatch(current_id):
+            current_id = uuid.uuid4().hex
+
+        async def send_with_request_id(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message)[self.HEADER] = current_id
+            await send(message)
+
+        token = request_id.set(current_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id.reset(token)
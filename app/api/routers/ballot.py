@@ -1,33 +1,114 @@
-from fastapi import APIRouter, Depends, HTTPException
+import math
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
 from sqlalchemy.orm import Session
-from app.database.session import get_db
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.session import get_db, get_async_db
 from app.schemas.ballot import (
     SubmitBallotByLotteryDrawDateRequest,
     SubmitBallotResponse,
+    SubmitBallotBatchRequest,
+    SubmitBallotBatchResponse,
 )
 from app.services.ballot_service import BallotService
-from app.exceptions.ballot import BallotSubmissionException
+from app.services.submission_limiter import submission_limiter
+from app.exceptions.ballot import (
+    BallotQuotaExceededException,
+    BallotSubmissionException,
+    LotteryClosedException,
+)
+from app.core.settings import settings
 
 router = APIRouter()
 
 
-@router.post("/submit-by-lottery-draw-date", response_model=SubmitBallotResponse)
-def submit_by_lottery_draw_date(
-    ballot: SubmitBallotByLotteryDrawDateRequest, db: Session = Depends(get_db)
+async def limit_submission_rate(request: Request) -> None:
+    """Reject the request with 429 if its client exceeds the submission rate limit.
+
+    Clients are identified by IP address, as seen by the server.
+    """
+    client = request.client.host if request.client else "unknown"
+    retry_after = await submission_limiter.check_client_async(client)
+    if retry_after:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many ballot submissions, try again later.",
+            headers={"Retry-After": str(math.ceil(retry_after))},
+        )
+
+
+@router.post(
+    "/submit-by-lottery-draw-date",
+    response_model=SubmitBallotResponse,
+    responses={status.HTTP_202_ACCEPTED: {"model": SubmitBallotResponse}},
+    dependencies=[Depends(limit_submission_rate)],
+)
+async def submit_by_lottery_draw_date(
+    ballot: SubmitBallotByLotteryDrawDateRequest,
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
 ):
     """Submit a ballot for a lottery.
     
     If the participant doesn't exist, they will be created with a random alias.
     If no lottery exists for the given draw date, a new lottery will be created for that date.
     The draw date must be in the future and within the configured maximum days ahead.
+    The weight is the ballot's relative chance of winning, 1 by default.
+
+    With queued ingestion the ballot is queued and 202 is returned with the id
+    it will be written with.
     
     Raises:
-        HTTPException: If there's an error during submission
+        HTTPException: If there's an error during submission, 409 if the
+            lottery is being drawn, or 429 if the participant's ballot quota
+            for the lottery or the client's submission rate limit is exceeded
     """
+    if settings.BALLOT_INGESTION_MODE == "queue":
+        try:
+            ballot_id = await BallotService.enqueue_by_lottery_draw_date_async(
+                email=ballot.email, draw_date=ballot.draw_date, weight=ballot.weight
+            )
+        except BallotQuotaExceededException as e:
+            raise HTTPException(status_code=429, detail=str(e))
+        except LotteryClosedException as e:
+            raise HTTPException(status_code=409, detail=str(e))
+        except BallotSubmissionException as e:
+            raise HTTPException(status_code=500, detail=str(e))
+        response.status_code = status.HTTP_202_ACCEPTED
+        return SubmitBallotResponse(id=ballot_id)
+
     try:
-        db_ballot = BallotService.submit_by_lottery_draw_date(
-            db=db, email=ballot.email, draw_date=ballot.draw_date
+        db_ballot = await BallotService.submit_by_lottery_draw_date_async(
+            db=db, email=ballot.email, draw_date=ballot.draw_date, weight=ballot.weight
         )
         return db_ballot
+    except BallotQuotaExceededException as e:
+        raise HTTPException(status_code=429, detail=str(e))
+    except BallotSubmissionException as e:
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+# Sync on purpose: encrypting tens of thousands of emails is CPU bound, so the
+# batch runs in the threadpool instead of stalling the event loop
+@router.post(
+    "/submit-batch",
+    response_model=SubmitBallotBatchResponse,
+    dependencies=[Depends(limit_submission_rate)],
+)
+def submit_batch(
+    request: SubmitBallotBatchRequest, db: Session = Depends(get_db)
+):
+    """Submit many ballots in one request.
+
+    Participants and lotteries are resolved or created in bulk and all ballots
+    are inserted in a single transaction. Each item gets a result with either
+    the new ballot id or the reason it was rejected, e.g. the participant's
+    ballot quota for the lottery.
+
+    Raises:
+        HTTPException: If there's an error while writing the batch, or 429 if
+            the client's submission rate limit is exceeded
+    """
+    try:
+        return BallotService.submit_batch(db=db, ballots=request.ballots)
     except BallotSubmissionException as e:
         raise HTTPException(status_code=500, detail=str(e))
@@ -1,18 +1,77 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
-from app.database.session import get_db
+from datetime import date
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.database.session import get_async_db, get_read_db
 from app.schemas.lottery import (
+    DrawAuditResponse,
+    DrawVerificationResponse,
+    LotteryWinnerCountResponse,
+    SetLotteryWinnerCountRequest,
     UpcomingLotteriesResponse,
 )
 from app.services.lottery_service import LotteryService
 
 router = APIRouter()
 
+DRAW_DATE_QUERY = Query(..., description="Draw date of the lottery")
+
 
 # Lottery Management Endpoints
 @router.get("/upcoming", response_model=UpcomingLotteriesResponse)
-def get_upcoming(
-    db: Session = Depends(get_db),
+async def get_upcoming(
+    db: AsyncSession = Depends(get_read_db),
 ):
     """Get all upcoming lotteries with their ballot counts."""
-    return LotteryService.get_upcoming(db=db)
+    return await LotteryService.get_upcoming_async(db=db)
+
+
+@router.put("/winner-count", response_model=LotteryWinnerCountResponse)
+async def set_winner_count(
+    request: SetLotteryWinnerCountRequest,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Set how many winning ballots a lottery draws.
+
+    If no lottery exists for the given draw date, a new lottery will be created for that date.
+    The draw date must be in the future and within the configured maximum days ahead.
+    """
+    return await LotteryService.set_winner_count_async(
+        db=db, draw_date=request.draw_date, winner_count=request.winner_count
+    )
+
+
+@router.get("/draw-audit", response_model=DrawAuditResponse)
+async def get_draw_audit(
+    draw_date: date = DRAW_DATE_QUERY,
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Get the record of a lottery's draw: seed, ballot digest and winners.
+
+    Raises:
+        404: If the lottery has no audited draw
+    """
+    draw_audit = await LotteryService.get_draw_audit_async(db=db, draw_date=draw_date)
+    if not draw_audit:
+        raise HTTPException(status_code=404, detail=f"No draw audit found for lottery draw date {draw_date}.")
+    return draw_audit
+
+
+@router.get("/draw-audit/verify", response_model=DrawVerificationResponse)
+async def verify_draw(
+    draw_date: date = DRAW_DATE_QUERY,
+    db: AsyncSession = Depends(get_async_db),
+):
+    """Redo a lottery's draw from its ballots and audited seed, and compare it with the recorded one.
+
+    Reads all of the lottery's ballots from the primary database, in time
+    linear in their number, the result is then cached. Draws whose ballot
+    partition has been archived (see BALLOT_PARTITION_RETENTION_DAYS) can't
+    be verified, their ballots don't match.
+
+    Raises:
+        404: If the lottery has no audited draw
+    """
+    verification = await LotteryService.verify_draw_async(db=db, draw_date=draw_date)
+    if not verification:
+        raise HTTPException(status_code=404, detail=f"No draw audit found for lottery draw date {draw_date}.")
+    return verification
@@ -0,0 +1,15 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+from app.core.metrics import render_prometheus
+
+router = APIRouter()
+
+
+# Prometheus scrape endpoint. Not async: collecting the shared metrics and the
+# queue depths talks to Redis with blocking clients.
+@router.get("", response_class=PlainTextResponse, include_in_schema=False)
+def get_metrics():
+    """Expose the service's metrics in the Prometheus text format."""
+    return PlainTextResponse(
+        render_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8"
+    )
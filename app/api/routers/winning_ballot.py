@@ -1,24 +1,31 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
+from typing import Optional
 from uuid import UUID
 from pydantic import EmailStr
-from app.database.session import get_db
+from app.database.session import get_read_db
 from app.schemas.winning_ballot import (
     WinningBallotByDrawDateQuery,
     WinningBallotResponse,
+    LotteryWinningBallotsResponse,
     ParticipantWinningBallotsResponse,
 )
 from app.services.winning_ballot_service import WinningBallotService
+from app.utils.pagination_utils import decode_cursor
+from app.core.settings import settings
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
 
 router = APIRouter()
 
 @router.get("/lottery-draw-date", response_model=WinningBallotResponse)
-def get_by_lottery_draw_date(
+async def get_by_lottery_draw_date(
     query: WinningBallotByDrawDateQuery = Depends(),
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Get the single winning ballot for a specific lottery draw date.
+    """Get the first ranked winning ballot for a specific lottery draw date.
     
     By default, returns yesterday's winning ballot if no date is provided.
     Cannot query future dates.
@@ -26,43 +33,114 @@ def get_by_lottery_draw_date(
     Raises:
         404: If no winning ballot exists for the specified draw date
     """
-    winning_ballot = WinningBallotService.get_by_lottery_draw_date(
+    response = await _get_lottery_winning_ballots(db=db, draw_date=query.draw_date)
+    return response.winning_ballots[0]
+
+
+@router.get("/lottery-draw-date/all", response_model=LotteryWinningBallotsResponse)
+async def get_all_by_lottery_draw_date(
+    query: WinningBallotByDrawDateQuery = Depends(),
+    db: AsyncSession = Depends(get_read_db),
+):
+    """Get all winning ballots for a specific lottery draw date, in rank order.
+
+    Defaults and validation are the same as for /lottery-draw-date.
+
+    Raises:
+        404: If no winning ballot exists for the specified draw date
+    """
+    return await _get_lottery_winning_ballots(db=db, draw_date=query.draw_date)
+
+
+async def _get_lottery_winning_ballots(
+    db: AsyncSession, draw_date: date
+) -> LotteryWinningBallotsResponse:
+    response = await WinningBallotService.get_by_lottery_draw_date_async(
         db=db,
-        draw_date=query.draw_date,
+        draw_date=draw_date,
     )
-    if not winning_ballot:
+    if not response:
         raise HTTPException(
             status_code=404,
-            detail=f"No winning ballot found for lottery draw date {query.draw_date}.",
+            detail=f"No winning ballot found for lottery draw date {draw_date}.",
         )
-    
-    return winning_ballot
+    return response
+
+
+def _parse_cursor(cursor: Optional[str]) -> Optional[tuple[date, UUID]]:
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+HISTORY_LIMIT_QUERY = Query(
+    100,
+    ge=1,
+    le=settings.WINNING_BALLOT_PAGE_MAX_SIZE,
+    description="Maximum number of winning ballots per page",
+)
+HISTORY_CURSOR_QUERY = Query(
+    None, description="next_cursor of the previous page, to get the following page"
+)
+HISTORY_STREAM_QUERY = Query(
+    False,
+    description="Stream all winning ballots after the cursor as newline-delimited JSON, ignoring limit",
+)
 
 
-@router.get("/participant-id", response_model=ParticipantWinningBallotsResponse)
-def get_by_participant_id(
+@router.get(
+    "/participant-id",
+    response_model=ParticipantWinningBallotsResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+async def get_by_participant_id(
     participant_id: UUID = Query(
         ...,
         description="UUID of the participant to look up their winning ballots"
     ),
-    db: Session = Depends(get_db),
+    limit: int = HISTORY_LIMIT_QUERY,
+    cursor: Optional[str] = HISTORY_CURSOR_QUERY,
+    stream: bool = HISTORY_STREAM_QUERY,
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Get winning ballots for a participant."""
-    return WinningBallotService.get_by_participant_id(
-        db=db, participant_id=participant_id
+    """Get winning ballots for a participant, in draw date order, a page at a time."""
+    after = _parse_cursor(cursor)
+    if stream:
+        return StreamingResponse(
+            WinningBallotService.stream_ndjson(participant_id=participant_id, after=after),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+    return await WinningBallotService.get_by_participant_id_async(
+        db=db, participant_id=participant_id, limit=limit, after=after
     )
 
 
-@router.get("/participant-email", response_model=ParticipantWinningBallotsResponse)
-def get_by_participant_email(
+@router.get(
+    "/participant-email",
+    response_model=ParticipantWinningBallotsResponse,
+    responses={200: {"content": {NDJSON_MEDIA_TYPE: {}}}},
+)
+async def get_by_participant_email(
     email: EmailStr = Query(
         ...,
         description="Email of the participant to look up their winning ballots"
     ),
-    db: Session = Depends(get_db),
+    limit: int = HISTORY_LIMIT_QUERY,
+    cursor: Optional[str] = HISTORY_CURSOR_QUERY,
+    stream: bool = HISTORY_STREAM_QUERY,
+    db: AsyncSession = Depends(get_read_db),
 ):
-    """Get winning ballots for a participant by their email.
+    """Get winning ballots for a participant by their email, a page at a time.
     If no participant is found with provided email, returns an empty list."""
-    return WinningBallotService.get_by_participant_email(
-        db=db, email=email
+    after = _parse_cursor(cursor)
+    if stream:
+        return StreamingResponse(
+            WinningBallotService.stream_ndjson(email=email, after=after),
+            media_type=NDJSON_MEDIA_TYPE,
+        )
+    return await WinningBallotService.get_by_participant_email_async(
+        db=db, email=email, limit=limit, after=after
     )
@@ -0,0 +1,161 @@
+"""Read-through caching with an in-process LRU tier and an optional Redis tier."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Generic, Optional, TypeVar
+import redis
+import redis.asyncio as redis_asyncio
+from pydantic import BaseModel
+from app.core.logging import logger
+from app.core.metrics import cache_hits, cache_misses
+
+T = TypeVar("T")
+ModelT = TypeVar("ModelT", bound=BaseModel)
+
+
+class LRUCache(Generic[T]):
+    """Thread-safe, size-bounded in-process cache evicting the least recently used key.
+
+    With ttl_seconds set, entries also expire that long after being stored.
+    """
+
+    def __init__(self, max_size: int, ttl_seconds: Optional[float] = None):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: OrderedDict[str, tuple[T, Optional[float]]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[T]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: T) -> None:
+        expires_at = time.monotonic() + self.ttl_seconds if self.ttl_seconds else None
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+
+
+class TieredCache(Generic[ModelT]):
+    """Cache of pydantic models with an in-process LRU in front of a shared Redis.
+
+    Lookups check the local LRU first, then Redis (when configured), and a
+    Redis hit is copied into the LRU. Redis errors are logged and treated as
+    misses so an unavailable cache never fails a request. Hits and misses are
+    counted in the cache metrics.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        model: type[ModelT],
+        max_size: int,
+        redis_url: Optional[str] = None,
+        redis_ttl_seconds: Optional[int] = None,
+    ):
+        self.name = name
+        self.model = model
+        self.local = LRUCache[ModelT](max_size=max_size)
+        self.redis_url = redis_url
+        self.redis_ttl_seconds = redis_ttl_seconds
+        self._redis: Optional[redis.Redis] = None
+        self._redis_async: Optional[redis_asyncio.Redis] = None
+
+    def _redis_key(self, key: str) -> str:
+        return f"cache:{self.name}:{key}"
+
+    @property
+    def redis(self) -> Optional[redis.Redis]:
+        if self.redis_url and self._redis is None:
+            self._redis = redis.Redis.from_url(self.redis_url)
+        return self._redis
+
+    @property
+    def redis_async(self) -> Optional[redis_asyncio.Redis]:
+        if self.redis_url and self._redis_async is None:
+            self._redis_async = redis_asyncio.Redis.from_url(self.redis_url)
+        return self._redis_async
+
+    def _get_local(self, key: str) -> Optional[ModelT]:
+        value = self.local.get(key)
+        if value is not None:
+            cache_hits.inc(cache=self.name, tier="memory")
+        return value
+
+    def _from_redis(self, key: str, raw: Optional[bytes]) -> Optional[ModelT]:
+        if raw is None:
+            cache_misses.inc(cache=self.name)
+            return None
+        value = self.model.model_validate_json(raw)
+        self.local.set(key, value)
+        cache_hits.inc(cache=self.name, tier="redis")
+        return value
+
+    def get(self, key: str) -> Optional[ModelT]:
+        value = self._get_local(key)
+        if value is not None:
+            return value
+        raw = None
+        if self.redis is not None:
+            try:
+                raw = self.redis.get(self._redis_key(key))
+            except redis.RedisError as e:
+                logger.warning(f"Cache {self.name} Redis read failed: {str(e)}")
+        return self._from_redis(key, raw)
+
+    async def get_async(self, key: str) -> Optional[ModelT]:
+        value = self._get_local(key)
+        if value is not None:
+            return value
+        raw = None
+        if self.redis_async is not None:
+            try:
+                raw = await self.redis_async.get(self._redis_key(key))
+            except redis.RedisError as e:
+                logger.warning(f"Cache {self.name} Redis read failed: {str(e)}")
+        return self._from_redis(key, raw)
+
+    def set(self, key: str, value: ModelT) -> None:
+        self.local.set(key, value)
+        if self.redis is not None:
+            try:
+                self.redis.set(self._redis_key(key), value.model_dump_json(), ex=self.redis_ttl_seconds)
+            except redis.RedisError as e:
+                logger.warning(f"Cache {self.name} Redis write failed: {str(e)}")
+
+    async def set_async(self, key: str, value: ModelT) -> None:
+        self.local.set(key, value)
+        if self.redis_async is not None:
+            try:
+                await self.redis_async.set(
+                    self._redis_key(key), value.model_dump_json(), ex=self.redis_ttl_seconds
+                )
+            except redis.RedisError as e:
+                logger.warning(f"Cache {self.name} Redis write failed: {str(e)}")
+
+    def delete(self, key: str) -> None:
+        self.local.delete(key)
+        if self.redis is not None:
+            try:
+                self.redis.delete(self._redis_key(key))
+            except redis.RedisError as e:
+                logger.warning(f"Cache {self.name} Redis delete failed: {str(e)}")
@@ -1,22 +1,152 @@
-"""Simple logging configuration."""
+"""Logging configuration.
 
+Records are put on a queue by the logging thread and written to stderr and a
+rotating file by a background listener thread, so logging never waits on the
+console or the disk.
+"""
+
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import os
+import queue
+from contextvars import ContextVar
+from datetime import datetime, timezone
 from pathlib import Path
+from typing import Optional
+from app.core.metrics import log_records_dropped
 from app.core.settings import settings
 
 # Create logs directory under app/ if it doesn't exist
 log_dir = Path("app/logs")
 log_dir.mkdir(exist_ok=True)
 
-# Basic logging setup
-logging.basicConfig(
-    level=logging.WARNING,  # Only capture WARNING and above
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler(log_dir / 'lottery_service.log'),
-        logging.StreamHandler()  # Console output
-    ]
-)
-
-# Create logger
-logger = logging.getLogger('lottery_service') 
\ No newline at end of file
+TEXT_FORMAT = "%(asctime)s - %(levelname)s - %(request_id)s - %(message)s"
+
+# Id of the request or Celery task being handled, added to its log records
+request_id: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has, anything else was passed through extra=
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+class JSONFormatter(logging.Formatter):
+    """Format records as one JSON object per line.
+
+    Fields passed with extra= are included as is, or as their repr when not
+    JSON serializable.
+    """
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "timestamp": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+            "process": record.process,
+            "module": record.module,
+            "line": record.lineno,
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRIBUTES:
+                entry[key] = value
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            entry["exception"] = record.exc_text
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return json.dumps(entry, default=repr)
+
+
+class ContextQueueHandler(logging.handlers.QueueHandler):
+    """QueueHandler capturing the request id and the traceback on the logging thread.
+
+    The message is merged with its arguments and the exception formatted
+    before the record is queued, as neither can be done safely from the
+    listener thread, but the record is otherwise left to the listener's
+    handlers to format. When the queue is full the record is dropped and
+    counted rather than blocking the caller.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record = copy.copy(record)
+        record.request_id = request_id.get()
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            log_records_dropped.inc()
+
+
+def create_handlers(file_name: Optional[str] = settings.LOG_FILE) -> list[logging.Handler]:
+    """Create the handlers writing the records, run by the listener thread."""
+    formatter = JSONFormatter() if settings.LOG_FORMAT == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers: list[logging.Handler] = [logging.StreamHandler()]
+    if file_name:
+        if settings.LOG_FILE_ROTATION == "time":
+            handlers.append(
+                logging.handlers.TimedRotatingFileHandler(
+                    log_dir / file_name,
+                    when=settings.LOG_FILE_ROTATE_WHEN,
+                    backupCount=settings.LOG_FILE_BACKUP_COUNT,
+                )
+            )
+        else:
+            handlers.append(
+                logging.handlers.RotatingFileHandler(
+                    log_dir / file_name,
+                    maxBytes=settings.LOG_FILE_MAX_BYTES,
+                    backupCount=settings.LOG_FILE_BACKUP_COUNT,
+                )
+            )
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+def _start_listener(handlers: list[logging.Handler]) -> logging.handlers.QueueListener:
+    listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def _restart_listener_after_fork() -> None:
+    """Give a forked process its own queue, listener thread and log file.
+
+    The parent's listener thread doesn't exist in the child, and two
+    processes rotating the same file would lose records.
+    """
+    global log_queue, log_listener
+    log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+    queue_handler.queue = log_queue
+    file_name = None
+    if settings.LOG_FILE:
+        path = Path(settings.LOG_FILE)
+        file_name = f"{path.stem}.{os.getpid()}{path.suffix}"
+    log_listener = _start_listener(create_handlers(file_name))
+
+
+log_queue: queue.Queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+queue_handler = ContextQueueHandler(log_queue)
+log_listener = _start_listener(create_handlers())
+os.register_at_fork(after_in_child=_restart_listener_after_fork)
+# Write the records still queued on exit
+atexit.register(lambda: log_listener.stop())
+
+# Create logger. It doesn't propagate to the root logger, whose handlers
+# Celery replaces with its own.
+logger = logging.getLogger('lottery_service')
+logger.setLevel(settings.LOG_LEVEL)
+logger.addHandler(queue_handler)
+logger.propagate = False
@@ -0,0 +1,340 @@
+"""Metrics for the service's hot paths, exposed in the Prometheus text format.
+
+Metrics are kept in-process, except the shared histograms, which the Celery
+workers record in Redis so the API's /metrics endpoint can expose them. An
+API process only exposes its own in-process metrics, so the API runs a single
+worker process per container (see the Dockerfile) and every container is
+scraped on its own.
+"""
+
+import bisect
+import itertools
+import threading
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Iterable, Iterator, Optional
+import redis
+from app.core.settings import settings
+
+
+class Counter:
+    """A monotonically increasing value, optionally split by labels."""
+
+    def __init__(self, name: str, description: str, label_names: Iterable[str] = ()):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def inc(self, amount: float = 1, **labels: str) -> None:
+        key = tuple(str(labels[label_name]) for label_name in self.label_names)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def values(self) -> dict[tuple[str, ...], float]:
+        with self._lock:
+            return dict(self._values)
+
+
+class Histogram:
+    """Distribution of observed values over fixed buckets, optionally split by labels.
+
+    Bucket counts are read cumulative: each bucket counts the observations
+    less than or equal to its upper bound.
+    """
+
+    DEFAULT_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: Iterable[str] = (),
+        buckets: Iterable[float] = DEFAULT_BUCKETS,
+    ):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: bucket counts, sum and count of the observations
+        self._values: dict[tuple[str, ...], tuple[list[int], float, int]] = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[label_name]) for label_name in self.label_names)
+        # Only the smallest bucket holding the value is counted, the counts
+        # are accumulated when read
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            bucket_counts, total, count = self._values.get(key) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+            bucket_counts[index] += 1
+            self._values[key] = (bucket_counts, total + value, count + 1)
+
+    def values(self) -> dict[tuple[str, ...], tuple[list[int], float, int]]:
+        with self._lock:
+            return {
+                key: (list(itertools.accumulate(bucket_counts[:-1])), total, count)
+                for key, (bucket_counts, total, count) in self._values.items()
+            }
+
+
+class Gauge:
+    """A value that can go up and down, optionally split by labels.
+
+    When a collect function is given, the values are read from it at render
+    time instead of being set.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        description: str,
+        label_names: Iterable[str] = (),
+        collect: Optional[Callable[[], dict[tuple[str, ...], float]]] = None,
+    ):
+        self.name = name
+        self.description = description
+        self.label_names = tuple(label_names)
+        self.collect = collect
+        self._values: dict[tuple[str, ...], float] = {}
+        self._lock = threading.Lock()
+        registry.append(self)
+
+    def set(self, value: float, **labels: str) -> None:
+        key = tuple(str(labels[label_name]) for label_name in self.label_names)
+        with self._lock:
+            self._values[key] = value
+
+    def values(self) -> dict[tuple[str, ...], float]:
+        if self.collect is not None:
+            return self.collect()
+        with self._lock:
+            return dict(self._values)
+
+
+class SharedHistogram(Histogram):
+    """Histogram recorded in a Redis hash, shared by all processes.
+
+    Meant for rare events, like Celery tasks, where a Redis round trip per
+    observation doesn't matter. Redis errors are logged and the observation
+    is dropped.
+    """
+
+    LABEL_SEPARATOR = "\x1f"
+
+    def __init__(self, *args, redis_url: str, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.redis_url = redis_url
+        self.redis_key = f"metrics:{self.name}"
+        self._redis: Optional[redis.Redis] = None
+
+    @property
+    def redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(self.redis_url)
+        return self._redis
+
+    def observe(self, value: float, **labels: str) -> None:
+        prefix = self.LABEL_SEPARATOR.join(str(labels[label_name]) for label_name in self.label_names)
+        index = bisect.bisect_left(self.buckets, value)
+        try:
+            with self.redis.pipeline(transaction=False) as pipeline:
+                pipeline.hincrby(self.redis_key, f"{prefix}|{index}", 1)
+                pipeline.hincrbyfloat(self.redis_key, f"{prefix}|sum", value)
+                pipeline.hincrby(self.redis_key, f"{prefix}|count", 1)
+                pipeline.execute()
+        except redis.RedisError as e:
+            from app.core.logging import logger
+            logger.warning(f"Metric {self.name} not recorded: {str(e)}")
+
+    def values(self) -> dict[tuple[str, ...], tuple[list[int], float, int]]:
+        values: dict[tuple[str, ...], tuple[list[int], float, int]] = {}
+        for field, raw in self.redis.hgetall(self.redis_key).items():
+            prefix, _, part = field.decode().rpartition("|")
+            key = tuple(prefix.split(self.LABEL_SEPARATOR)) if self.label_names else ()
+            bucket_counts, total, count = values.get(key) or ([0] * (len(self.buckets) + 1), 0.0, 0)
+            if part == "sum":
+                total = float(raw)
+            elif part == "count":
+                count = int(raw)
+            else:
+                bucket_counts[int(part)] = int(raw)
+            values[key] = (bucket_counts, total, count)
+        return {
+            key: (list(itertools.accumulate(bucket_counts[:-1])), total, count)
+            for key, (bucket_counts, total, count) in values.items()
+        }
+
+
+class QueryStats:
+    """Number and total duration of the SQL statements run for one request."""
+
+    __slots__ = ("count", "seconds")
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+
+# Set by the metrics middleware for the duration of each request
+current_query_stats: ContextVar[Optional[QueryStats]] = ContextVar("current_query_stats", default=None)
+
+
+@contextmanager
+def timed(histogram: Histogram, **labels: str) -> Iterator[None]:
+    """Observe the duration of the block, also when it raises."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.observe(time.perf_counter() - start, **labels)
+
+
+def _escape_label_value(value: str) -> str:
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(label_names: tuple[str, ...], label_values: tuple[str, ...], **extra: str) -> str:
+    pairs = list(zip(label_names, label_values)) + list(extra.items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape_label_value(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(value)
+
+
+def render_prometheus() -> str:
+    """Render every registered metric in the Prometheus text exposition format.
+
+    A metric that fails to collect (e.g. Redis being unreachable) is skipped.
+    """
+    lines = []
+    for metric in registry:
+        try:
+            values = metric.values()
+        except Exception as e:
+            from app.core.logging import logger
+            logger.warning(f"Metric {metric.name} not collected: {str(e)}")
+            continue
+        metric_type = {Counter: "counter", Gauge: "gauge"}.get(type(metric), "histogram")
+        lines.append(f"# HELP {metric.name} {metric.description}")
+        lines.append(f"# TYPE {metric.name} {metric_type}")
+        for label_values, value in sorted(values.items()):
+            if metric_type != "histogram":
+                labels = _format_labels(metric.label_names, label_values)
+                lines.append(f"{metric.name}{labels} {_format_value(value)}")
+                continue
+            bucket_counts, total, count = value
+            for upper_bound, bucket_count in zip(metric.buckets, bucket_counts):
+                labels = _format_labels(metric.label_names, label_values, le=_format_value(upper_bound))
+                lines.append(f"{metric.name}_bucket{labels} {bucket_count}")
+            labels = _format_labels(metric.label_names, label_values, le="+Inf")
+            lines.append(f"{metric.name}_bucket{labels} {count}")
+            labels = _format_labels(metric.label_names, label_values)
+            lines.append(f"{metric.name}_sum{labels} {_format_value(total)}")
+            lines.append(f"{metric.name}_count{labels} {count}")
+    return "\n".join(lines) + "\n"
+
+
+_queue_redis: dict[str, redis.Redis] = {}
+
+
+def _queue_depths() -> dict[tuple[str, ...], float]:
+    """Messages waiting in the Celery queue and the ballot ingestion stream."""
+    for url in (settings.CELERY_BROKER_URL, settings.REDIS_INGESTION_URL):
+        if url not in _queue_redis:
+            _queue_redis[url] = redis.Redis.from_url(url)
+    broker = _queue_redis[settings.CELERY_BROKER_URL]
+    ingestion = _queue_redis[settings.REDIS_INGESTION_URL]
+    return {
+        (settings.CELERY_DEFAULT_QUEUE,): broker.llen(settings.CELERY_DEFAULT_QUEUE),
+        (settings.BALLOT_INGESTION_STREAM,): ingestion.xlen(settings.BALLOT_INGESTION_STREAM),
+    }
+
+
+# Every metric registers itself here when created
+registry: list = []
+
+cache_hits = Counter(
+    "lottery_cache_hits_total", "Cache lookups served from a cache tier", ["cache", "tier"]
+)
+cache_misses = Counter(
+    "lottery_cache_misses_total", "Cache lookups that fell through to the database", ["cache"]
+)
+db_pool_checkout_wait_seconds = Histogram(
+    "lottery_db_pool_checkout_wait_seconds",
+    "Time spent waiting for a database connection from the pool",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+log_records_dropped = Counter(
+    "lottery_log_records_dropped_total", "Log records dropped because the log queue was full"
+)
+db_pool_checkout_timeouts = Counter(
+    "lottery_db_pool_checkout_timeouts_total",
+    "Pool checkouts that gave up after the pool timeout",
+    ["engine"],
+)
+
+http_request_duration_seconds = Histogram(
+    "lottery_http_request_duration_seconds",
+    "Time spent handling HTTP requests",
+    ["method", "route", "status"],
+)
+http_request_db_queries = Histogram(
+    "lottery_http_request_db_queries",
+    "SQL statements run while handling an HTTP request",
+    ["route"],
+    buckets=(0, 1, 2, 3, 5, 10, 25, 50, 100),
+)
+http_request_db_seconds = Histogram(
+    "lottery_http_request_db_seconds",
+    "Time spent running SQL statements while handling an HTTP request",
+    ["route"],
+)
+db_query_duration_seconds = Histogram(
+    "lottery_db_query_duration_seconds",
+    "Duration of SQL statements",
+    ["engine"],
+)
+# Collected by app.database.session from the engines' pools
+db_pool_connections = Gauge(
+    "lottery_db_pool_connections",
+    "Database connections per pool and state (checked_out, idle, overflow)",
+    ["engine", "state"],
+)
+queue_depth = Gauge(
+    "lottery_queue_depth",
+    "Messages waiting in the Celery queue and the ballot ingestion stream",
+    ["queue"],
+    collect=_queue_depths,
+)
+celery_task_duration_seconds = SharedHistogram(
+    "lottery_celery_task_duration_seconds",
+    "Runtime of Celery tasks",
+    ["task", "state"],
+    buckets=(0.01, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0, 900.0, 3600.0),
+    redis_url=settings.REDIS_CACHE_URL,
+)
+draw_phase_duration_seconds = SharedHistogram(
+    "lottery_draw_phase_duration_seconds",
+    "Duration of the phases of picking a lottery winner (select, commit)",
+    # select: streaming, digesting and sampling the ballots, commit: recording
+    # the audit and the winning ballots
+    ["phase"],
+    buckets=(0.001, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 10.0, 30.0, 60.0, 300.0),
+    redis_url=settings.REDIS_CACHE_URL,
+)
+submission_rejections = Counter(
+    "lottery_submission_rejections_total",
+    "Ballot submissions rejected by the participant quota or the client rate limit",
+    ["reason"],
+)
@@ -1,12 +1,16 @@
 """Security utilities for protecting sensitive data."""
 
-from cryptography.fernet import Fernet
-from base64 import b64encode, b64decode
-import os
-from typing import Optional, Any, Tuple
+from cryptography.fernet import Fernet, MultiFernet
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from functools import lru_cache
+from typing import Callable, Tuple
 import hashlib
+import hmac
 from app.core.settings import settings
 
+# Key id of the unversioned ENCRYPTION_KEY and HASH_SALT pair
+LEGACY_KEY_ID = "legacy"
+
 
 class SensitiveDataProtection:
     """Handles encryption, decryption and hashing of sensitive data.
@@ -16,18 +20,54 @@ class SensitiveDataProtection:
     - Decrypting previously encrypted data
     - Creating searchable hashes of data
     - Generating encryption keys
+
+    Encrypted data is the raw Fernet token, without its base64 text encoding.
+
+    Keys are versioned (see SENSITIVE_DATA_KEYS). Data is encrypted and hashed
+    with the newest version, and can be decrypted and searched with any of
+    them, so keys are rotated by re-encrypting the stored data online.
+    Versioned search hashes are an HMAC-SHA256 prefixed with the key id,
+    "<key id>:<hex digest>". The legacy version's are the untagged salted
+    SHA-256 hex digest.
     """
     
     def __init__(self):
-        self.cipher_suite = Fernet(settings.ENCRYPTION_KEY.encode())
-        self.hash_salt = settings.HASH_SALT
+        keyring = settings.SENSITIVE_DATA_KEYRING
+        self.key_ids = [key_id for key_id, _, _ in keyring]
+        self.current_key_id = self.key_ids[0]
+        self.cipher_suite = MultiFernet([Fernet(fernet_key.encode()) for _, fernet_key, _ in keyring])
+        self._hash_functions = [
+            self._legacy_hash_function(settings.HASH_SALT)
+            if hash_secret is None
+            else self._hmac_hash_function(key_id, hash_secret)
+            for key_id, _, hash_secret in keyring
+        ]
+        self._search_hashes_cached = lru_cache(maxsize=settings.SEARCH_HASH_CACHE_SIZE)(
+            self._search_hashes
+        )
+
+    @staticmethod
+    def _legacy_hash_function(hash_salt: str) -> Callable[[str], str]:
+        def hash_function(data: str) -> str:
+            salted = f"{data}{hash_salt}"
+            return hashlib.sha256(salted.encode()).hexdigest()
+        return hash_function
+
+    @staticmethod
+    def _hmac_hash_function(key_id: str, hash_secret: str) -> Callable[[str], str]:
+        key = hash_secret.encode()
+        prefix = f"{key_id}:"
+
+        def hash_function(data: str) -> str:
+            return prefix + hmac.new(key, data.encode(), hashlib.sha256).hexdigest()
+        return hash_function
 
-    def encrypt(self, data: str) -> str:
-        return b64encode(self.cipher_suite.encrypt(data.encode())).decode()
+    def encrypt(self, data: str) -> bytes:
+        return urlsafe_b64decode(self.cipher_suite.encrypt(data.encode()))
 
-    def decrypt(self, encrypted_data: str) -> str:
+    def decrypt(self, encrypted_data: bytes) -> str:
         try:
-            return self.cipher_suite.decrypt(b64decode(encrypted_data)).decode()
+            return self.cipher_suite.decrypt(urlsafe_b64encode(encrypted_data)).decode()
         except Exception as e:
             raise ValueError(f"Failed to decrypt data: {str(e)}")
 
@@ -37,9 +77,45 @@ class SensitiveDataProtection:
         This creates a hash that can be used to search for encrypted data
         without revealing the original value. The hash is deterministic
         (same input always produces same output) but cannot be reversed.
+        Recently used values are answered from a bounded LRU cache.
         """
-        salted = f"{data}{self.hash_salt}"
-        return hashlib.sha256(salted.encode()).hexdigest()
+        return self._search_hashes_cached(data)[0]
+
+    def search_hashes(self, data: str) -> tuple[str, ...]:
+        """Hash data with every key version, newest first.
+
+        Stored data may still be hashed with an older version during a key
+        rotation, so lookups have to match any of these.
+        """
+        return self._search_hashes_cached(data)
+
+    def _search_hashes(self, data: str) -> tuple[str, ...]:
+        return tuple(hash_function(data) for hash_function in self._hash_functions)
+
+    def is_current_hash(self, search_hash: str) -> bool:
+        """Whether a stored search hash was made with the newest key version."""
+        if self.current_key_id == LEGACY_KEY_ID:
+            return ":" not in search_hash
+        return search_hash.startswith(f"{self.current_key_id}:")
+
+    def encrypt_many(self, data: list[str]) -> list[bytes]:
+        return [self.encrypt(item) for item in data]
+
+    def decrypt_many(self, encrypted_data: list[bytes]) -> list[str]:
+        return [self.decrypt(item) for item in encrypted_data]
+
+    def hash_many(self, data: list[str]) -> list[str]:
+        """Hash a batch for searching with the newest key version.
+
+        The LRU cache is bypassed, so a large batch of mostly new values
+        doesn't evict the hot ones.
+        """
+        hash_function = self._hash_functions[0]
+        return [hash_function(item) for item in data]
+
+    def search_hashes_many(self, data: list[str]) -> list[tuple[str, ...]]:
+        """Batch variant of search_hashes, bypassing the LRU cache."""
+        return [self._search_hashes(item) for item in data]
 
     @staticmethod
     def generate_key() -> str:
@@ -59,7 +135,7 @@ class SensitiveDataProtection:
 data_protection = SensitiveDataProtection()
 
 
-def create_encrypted_and_hashed_versions_of_data(data: str) -> Tuple[str, str]:
+def create_encrypted_and_hashed_versions_of_data(data: str) -> Tuple[bytes, str]:
     """Create encrypted and hashed versions of the input data.
     
     This function takes a string and creates two secure versions of it:
@@ -72,11 +148,19 @@ def create_encrypted_and_hashed_versions_of_data(data: str) -> Tuple[str, str]:
     )
 
 
-def decrypt_data(encrypted_data: str) -> str:
+def create_encrypted_and_hashed_versions_of_many(data: list[str]) -> Tuple[list[bytes], list[str]]:
+    """Batch variant of create_encrypted_and_hashed_versions_of_data."""
+    return (
+        data_protection.encrypt_many(data),
+        data_protection.hash_many(data)
+    )
+
+
+def decrypt_data(encrypted_data: bytes) -> str:
     """Decrypt any encrypted data.
     
     Args:
-        encrypted_data: The encrypted data (base64-encoded string)
+        encrypted_data: The encrypted data (raw Fernet token bytes)
         
     Returns:
         The decrypted data
@@ -88,4 +172,20 @@ def decrypt_data(encrypted_data: str) -> str:
 
 
 def hash_for_search(data: str) -> str:
-    return data_protection.hash_for_search(data) 
\ No newline at end of file
+    return data_protection.hash_for_search(data)
+
+
+def decrypt_many(encrypted_data: list[bytes]) -> list[str]:
+    return data_protection.decrypt_many(encrypted_data)
+
+
+def hash_many(data: list[str]) -> list[str]:
+    return data_protection.hash_many(data)
+
+
+def search_hashes(data: str) -> tuple[str, ...]:
+    return data_protection.search_hashes(data)
+
+
+def search_hashes_many(data: list[str]) -> list[tuple[str, ...]]:
+    return data_protection.search_hashes_many(data)
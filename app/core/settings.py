@@ -1,7 +1,8 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
-from pydantic import field_validator
+from typing import Literal, Optional
+from pydantic import field_validator, model_validator
 import os
+import re
 
 
 class Settings(BaseSettings):
@@ -12,22 +13,170 @@ class Settings(BaseSettings):
 
     Attributes:
         DATABASE_URL (str): PostgreSQL database connection URL
+        ASYNC_DATABASE_URL (str): DATABASE_URL using the asyncpg driver
+        DB_POOL_SIZE (int): Connections kept open by each engine's pool, per process
+        DB_MAX_OVERFLOW (int): Connections each pool may open beyond DB_POOL_SIZE
+        DB_POOL_TIMEOUT_SECONDS (float): Maximum wait for a connection from the pool
+        DB_POOL_RECYCLE_SECONDS (int): Age after which pooled connections are replaced.
+            -1 keeps them until they fail.
+        DB_POOL_PRE_PING (bool): Test each connection with a round trip on checkout.
+            Can be disabled when DB_POOL_RECYCLE_SECONDS is shorter than the server's
+            and network's idle timeouts.
+        DB_STATEMENT_TIMEOUT_MS (Optional[int]): Server-side timeout of each statement,
+            sent when connecting. With DB_PGBOUNCER, set it on the database role
+            instead.
+        DB_PGBOUNCER (bool): DATABASE_URL points to a PgBouncer-style transaction
+            pooler. The engines then don't pool connections themselves, asyncpg
+            doesn't cache prepared statements and no startup options are sent.
+        READ_REPLICA_URLS (Optional[str]): Comma separated PostgreSQL URLs of read
+            replicas serving the read-only endpoints
+        READ_REPLICA_ASYNC_URLS (list[str]): READ_REPLICA_URLS using the asyncpg driver
+        READ_REPLICA_SELECTION (str): How a healthy replica is picked for a request,
+            "round_robin" or "least_connections"
+        READ_REPLICA_MAX_LAG_SECONDS (Optional[float]): Replicas replaying changes
+            more than this far behind the primary aren't used
+        READ_REPLICA_HEALTH_CHECK_INTERVAL_SECONDS (float): Time between two replica
+            health checks
         LOTTERY_DRAW_DATE_MAX_DAYS_AHEAD (int): Maximum number of days in the future
             for which participants can submit ballots. Must be greater than 0.
         CELERY_BROKER_URL (str): Redis URL for Celery message broker
         CELERY_RESULT_BACKEND (str): Redis URL for Celery result backend
         REDIS_PASSWORD (Optional[str]): Redis password if authentication is enabled
-        ENCRYPTION_KEY (str): Key used for encrypting sensitive data
-        HASH_SALT (str): Salt for hashing sensitive data (for searching)
+        ENCRYPTION_KEY (Optional[str]): Key used for encrypting sensitive data with the
+            original, unversioned scheme
+        HASH_SALT (Optional[str]): Salt for hashing sensitive data (for searching) with
+            the original, unversioned scheme
+        SENSITIVE_DATA_KEYS (Optional[str]): Comma separated key versions, newest first,
+            each as key_id:fernet_key:hash_secret. Data is written with the newest
+            version and read with any of them. The unversioned ENCRYPTION_KEY and
+            HASH_SALT pair, when set, is the oldest version.
+        SENSITIVE_DATA_KEYRING (list[tuple[str, str, Optional[str]]]): Parsed key
+            versions, newest first. The unversioned pair has key id "legacy".
         CELERY_DEFAULT_QUEUE (str): Required queue name for Celery tasks
+        BALLOT_BATCH_MAX_SIZE (int): Maximum number of ballots accepted by a single
+            batch submission
+        ALIAS_KEY (Optional[str]): Key of the permutation that turns sequence numbers
+            into participant aliases. Defaults to HASH_SALT. Must never change once
+            aliases have been issued, or new aliases may collide with old ones.
+        WINNING_BALLOT_CACHE_SIZE (int): Number of draw dates kept in each process's
+            winning ballot cache
+        WINNING_BALLOT_CACHE_USE_REDIS (bool): Share the winning ballot cache between
+            processes through Redis
+        WINNING_BALLOT_CACHE_REDIS_TTL_SECONDS (int): Expiry of winning ballots in Redis
+        REDIS_CACHE_URL (str): Redis URL for shared caches
+        WINNING_BALLOT_PAGE_MAX_SIZE (int): Maximum page size of a participant's
+            winning ballot history
+        LOTTERY_BALLOT_COUNT_SHARDS (int): Number of counter rows each lottery's ballot
+            count is spread over. Can be changed at any time.
+        LOTTERY_DRAW_BATCH_SIZE (int): Number of ballots fetched at a time while
+            drawing a lottery's winners
+        DRAW_VERIFICATION_CACHE_SIZE (int): Number of draw verifications kept in
+            each process
+        DRAW_VERIFICATION_CACHE_TTL_SECONDS (float): How long each process reuses a
+            draw verification. 0 disables the cache.
+        UPCOMING_LOTTERIES_CACHE_TTL_SECONDS (float): How long each process reuses the
+            upcoming lotteries response. 0 disables the cache.
+        BALLOT_PARTITION_PREMAKE_DAYS (int): Number of daily ballot partitions created
+            beyond the last date open for submissions
+        BALLOT_PARTITION_RETENTION_DAYS (Optional[int]): Age in days after which a
+            draw date's ballot partition is detached and moved to the archive schema.
+            None keeps all partitions attached.
+        SEARCH_HASH_CACHE_SIZE (int): Number of search hashes of recently seen values
+            kept in each process
+        KEY_ROTATION_CHUNK_SIZE (int): Participants re-encrypted per transaction by the
+            key rotation task
+        KEY_ROTATION_CHUNK_DELAY_SECONDS (float): Pause between two key rotation chunks
+        BALLOT_INGESTION_MODE (str): "sync" writes submitted ballots in the request,
+            "queue" appends them to a Redis stream and answers 202 right away, the
+            ingestion consumer then writes them in batches
+        BALLOT_INGESTION_STREAM (str): Name of the Redis stream of queued ballots
+        BALLOT_INGESTION_BATCH_SIZE (int): Queued ballots written per transaction
+        BALLOT_INGESTION_CLAIM_IDLE_SECONDS (float): Time after which a queued ballot
+            read but not written by a consumer is taken over by another one
+        BALLOT_INGESTION_DRAIN_TIMEOUT_SECONDS (float): Maximum time the draw waits for
+            the queued ballots of its draw date to be written
+        REDIS_INGESTION_URL (str): Redis URL for the ballot ingestion queue
+        BALLOT_QUOTA_PER_PARTICIPANT (Optional[int]): Maximum number of ballots a
+            participant can submit for one lottery. None disables the quota.
+            Participants are counted by a key derived from ALIAS_KEY, so key
+            rotations don't reset their counts.
+        SUBMISSION_RATE_LIMIT (Optional[int]): Maximum number of ballot submission
+            requests per client IP per SUBMISSION_RATE_LIMIT_WINDOW_SECONDS. None
+            disables the rate limit.
+        SUBMISSION_RATE_LIMIT_WINDOW_SECONDS (float): Window of SUBMISSION_RATE_LIMIT
+        SUBMISSION_LIMITS_USE_REDIS (bool): Count quotas and rate limits in Redis,
+            shared by all processes. Otherwise, or while Redis is unavailable, each
+            process counts on its own.
+        SUBMISSION_LIMITS_LOCAL_SIZE (int): Number of participants and clients each
+            process keeps counters and rejections for
+        REDIS_LIMITS_URL (str): Redis URL for the quota and rate limit counters
+        LOG_LEVEL (str): Minimum level of the service's log records
+        LOG_FORMAT (str): "json" for one JSON object per record, "text" for
+            human-readable lines
+        LOG_FILE (Optional[str]): Log file name in app/logs, None to only log to
+            stderr. Give each service its own file, processes forked after
+            startup (e.g. Celery's pool) write to one suffixed with their pid.
+        LOG_FILE_ROTATION (str): Rotate the log file by "size" or by "time"
+        LOG_FILE_MAX_BYTES (int): Size at which the log file is rotated
+        LOG_FILE_ROTATE_WHEN (str): Interval after which the log file is rotated,
+            as accepted by TimedRotatingFileHandler (e.g. "midnight", "H")
+        LOG_FILE_BACKUP_COUNT (int): Rotated log files kept
+        LOG_QUEUE_SIZE (int): Log records waiting to be written before new ones
+            are dropped
     """
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT_SECONDS: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    DB_STATEMENT_TIMEOUT_MS: Optional[int] = None
+    DB_PGBOUNCER: bool = False
+    READ_REPLICA_URLS: Optional[str] = None
+    READ_REPLICA_SELECTION: Literal["round_robin", "least_connections"] = "round_robin"
+    READ_REPLICA_MAX_LAG_SECONDS: Optional[float] = None
+    READ_REPLICA_HEALTH_CHECK_INTERVAL_SECONDS: float = 5.0
     # Setting to allow participant to register to lotteries up to N days ahead
     LOTTERY_DRAW_DATE_MAX_DAYS_AHEAD: int
     REDIS_PASSWORD: Optional[str] = None
-    ENCRYPTION_KEY: str
-    HASH_SALT: str
+    ENCRYPTION_KEY: Optional[str] = None
+    HASH_SALT: Optional[str] = None
+    SENSITIVE_DATA_KEYS: Optional[str] = None
     CELERY_DEFAULT_QUEUE: str  # Required queue name for Celery tasks
+    BALLOT_BATCH_MAX_SIZE: int = 50000
+    ALIAS_KEY: Optional[str] = None
+    WINNING_BALLOT_CACHE_SIZE: int = 1024
+    WINNING_BALLOT_CACHE_USE_REDIS: bool = False
+    WINNING_BALLOT_CACHE_REDIS_TTL_SECONDS: int = 7 * 24 * 3600
+    WINNING_BALLOT_PAGE_MAX_SIZE: int = 1000
+    LOTTERY_BALLOT_COUNT_SHARDS: int = 16
+    LOTTERY_DRAW_BATCH_SIZE: int = 10000
+    DRAW_VERIFICATION_CACHE_SIZE: int = 128
+    DRAW_VERIFICATION_CACHE_TTL_SECONDS: float = 3600.0
+    UPCOMING_LOTTERIES_CACHE_TTL_SECONDS: float = 2.0
+    BALLOT_PARTITION_PREMAKE_DAYS: int = 7
+    BALLOT_PARTITION_RETENTION_DAYS: Optional[int] = None
+    SEARCH_HASH_CACHE_SIZE: int = 16384
+    KEY_ROTATION_CHUNK_SIZE: int = 1000
+    KEY_ROTATION_CHUNK_DELAY_SECONDS: float = 0.05
+    BALLOT_INGESTION_MODE: Literal["sync", "queue"] = "sync"
+    BALLOT_INGESTION_STREAM: str = "ballot_ingestion"
+    BALLOT_INGESTION_BATCH_SIZE: int = 5000
+    BALLOT_INGESTION_CLAIM_IDLE_SECONDS: float = 60.0
+    BALLOT_INGESTION_DRAIN_TIMEOUT_SECONDS: float = 600.0
+    BALLOT_QUOTA_PER_PARTICIPANT: Optional[int] = None
+    SUBMISSION_RATE_LIMIT: Optional[int] = None
+    SUBMISSION_RATE_LIMIT_WINDOW_SECONDS: float = 60.0
+    SUBMISSION_LIMITS_USE_REDIS: bool = False
+    SUBMISSION_LIMITS_LOCAL_SIZE: int = 100000
+    LOG_LEVEL: Literal["DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"] = "WARNING"
+    LOG_FORMAT: Literal["json", "text"] = "json"
+    LOG_FILE: Optional[str] = "lottery_service.log"
+    LOG_FILE_ROTATION: Literal["size", "time"] = "size"
+    LOG_FILE_MAX_BYTES: int = 50 * 1024 * 1024
+    LOG_FILE_ROTATE_WHEN: str = "midnight"
+    LOG_FILE_BACKUP_COUNT: int = 7
+    LOG_QUEUE_SIZE: int = 10000
 
     @field_validator("LOTTERY_DRAW_DATE_MAX_DAYS_AHEAD")
     @classmethod
@@ -36,6 +185,56 @@ class Settings(BaseSettings):
             raise ValueError("LOTTERY_DRAW_DATE_MAX_DAYS_AHEAD must be greater than 0")
         return v
 
+    @field_validator("BALLOT_PARTITION_RETENTION_DAYS")
+    @classmethod
+    def validate_ballot_partition_retention_days(cls, v: Optional[int]) -> Optional[int]:
+        # The winner of a draw date is picked the night after, keep at least that
+        if v is not None and v < 2:
+            raise ValueError("BALLOT_PARTITION_RETENTION_DAYS must be at least 2")
+        return v
+
+    @model_validator(mode="after")
+    def validate_keys(self) -> "Settings":
+        if (self.ENCRYPTION_KEY is None) != (self.HASH_SALT is None):
+            raise ValueError("ENCRYPTION_KEY and HASH_SALT must be set together")
+        key_ids = [key_id for key_id, _, _ in self.SENSITIVE_DATA_KEYRING]
+        if not key_ids:
+            raise ValueError("Either SENSITIVE_DATA_KEYS or ENCRYPTION_KEY and HASH_SALT must be set")
+        if len(set(key_ids)) != len(key_ids):
+            raise ValueError("SENSITIVE_DATA_KEYS key ids must be unique")
+        if self.ALIAS_KEY is None and self.HASH_SALT is None:
+            # Aliases must keep using the key they were issued with
+            raise ValueError("ALIAS_KEY must be set when HASH_SALT isn't")
+        return self
+
+    @property
+    def SENSITIVE_DATA_KEYRING(self) -> list[tuple[str, str, Optional[str]]]:
+        keyring = []
+        for entry in (self.SENSITIVE_DATA_KEYS or "").split(","):
+            if not entry.strip():
+                continue
+            key_id, fernet_key, hash_secret = entry.strip().split(":", 2)
+            if not re.fullmatch(r"[A-Za-z0-9_-]{1,16}", key_id) or key_id == "legacy":
+                raise ValueError(f"Invalid sensitive data key id {key_id!r}")
+            keyring.append((key_id, fernet_key, hash_secret))
+        if self.ENCRYPTION_KEY is not None:
+            keyring.append(("legacy", self.ENCRYPTION_KEY, None))
+        return keyring
+
+    @property
+    def ASYNC_DATABASE_URL(self) -> str:
+        _, address = self.DATABASE_URL.split("://", 1)
+        return f"postgresql+asyncpg://{address}"
+
+    @property
+    def READ_REPLICA_ASYNC_URLS(self) -> list[str]:
+        urls = [url.strip() for url in (self.READ_REPLICA_URLS or "").split(",") if url.strip()]
+        return [f"postgresql+asyncpg://{url.split('://', 1)[1]}" for url in urls]
+
+    @property
+    def ALIAS_PERMUTATION_KEY(self) -> str:
+        return self.ALIAS_KEY or self.HASH_SALT
+
     @property
     def CELERY_BROKER_URL(self) -> str:
         host = "localhost" if os.getenv("ENV_MODE") != "docker" else "redis"
@@ -50,6 +249,27 @@ class Settings(BaseSettings):
             return f"redis://:{self.REDIS_PASSWORD}@{host}:6379/0"
         return f"redis://{host}:6379/0"
 
+    @property
+    def REDIS_CACHE_URL(self) -> str:
+        host = "localhost" if os.getenv("ENV_MODE") != "docker" else "redis"
+        if self.REDIS_PASSWORD:
+            return f"redis://:{self.REDIS_PASSWORD}@{host}:6379/1"
+        return f"redis://{host}:6379/1"
+
+    @property
+    def REDIS_INGESTION_URL(self) -> str:
+        host = "localhost" if os.getenv("ENV_MODE") != "docker" else "redis"
+        if self.REDIS_PASSWORD:
+            return f"redis://:{self.REDIS_PASSWORD}@{host}:6379/2"
+        return f"redis://{host}:6379/2"
+
+    @property
+    def REDIS_LIMITS_URL(self) -> str:
+        host = "localhost" if os.getenv("ENV_MODE") != "docker" else "redis"
+        if self.REDIS_PASSWORD:
+            return f"redis://:{self.REDIS_PASSWORD}@{host}:6379/3"
+        return f"redis://{host}:6379/3"
+
     class Config:
         """Pydantic settings configuration.
 
@@ -1,18 +1,188 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import Row, String, cast, select
+from sqlalchemy.dialects.postgresql import insert
+import uuid
 from uuid import UUID
-from typing import Optional
-from app.models import Ballot
+from datetime import date
+from typing import AsyncIterator, Iterator, Optional, Sequence
+from app.models import Ballot, Participant
 
 
 class BallotCRUD:
+    # The id and created_at defaults are generated client-side, so the object is
+    # complete after the INSERT and no refresh SELECT is needed. The id is set
+    # up front so callers can defer the flush to the end of the transaction
+    # (flush=False) and still reference the new ballot.
+    # The draw date must be the lottery's draw date, it routes the row to the
+    # lottery's partition.
     @staticmethod
-    def create(db: Session, participant_id: UUID, lottery_id: UUID) -> Ballot:
-        ballot = Ballot(participant_id=participant_id, lottery_id=lottery_id)
+    def create(
+        db: Session,
+        participant_id: UUID,
+        lottery_id: UUID,
+        draw_date: date,
+        weight: int = 1,
+        flush: bool = True,
+    ) -> Ballot:
+        ballot = Ballot(
+            id=uuid.uuid4(),
+            participant_id=participant_id,
+            lottery_id=lottery_id,
+            draw_date=draw_date,
+            weight=weight,
+        )
         db.add(ballot)
-        db.flush()
-        db.refresh(ballot)
+        if flush:
+            db.flush()
         return ballot
 
     @staticmethod
-    def get_by_lottery_id(db: Session, lottery_id: UUID) -> list[Ballot]:
-        return db.query(Ballot).filter_by(lottery_id=lottery_id).all()
+    async def create_async(
+        db: AsyncSession,
+        participant_id: UUID,
+        lottery_id: UUID,
+        draw_date: date,
+        weight: int = 1,
+        flush: bool = True,
+    ) -> Ballot:
+        ballot = Ballot(
+            id=uuid.uuid4(),
+            participant_id=participant_id,
+            lottery_id=lottery_id,
+            draw_date=draw_date,
+            weight=weight,
+        )
+        db.add(ballot)
+        if flush:
+            await db.flush()
+        return ballot
+
+    @staticmethod
+    def bulk_create(db: Session, ballots: list[tuple[UUID, UUID, date, int]]) -> list[UUID]:
+        """Insert ballots with multi-row INSERT ... RETURNING statements.
+
+        Each ballot is (participant id, lottery id, draw date, weight).
+
+        Returns:
+            The new ballot ids, in the same order as the input tuples
+        """
+        if not ballots:
+            return []
+        result = db.execute(
+            insert(Ballot).returning(Ballot.id, sort_by_parameter_order=True),
+            [
+                {
+                    "participant_id": participant_id,
+                    "lottery_id": lottery_id,
+                    "draw_date": draw_date,
+                    "weight": weight,
+                }
+                for participant_id, lottery_id, draw_date, weight in ballots
+            ],
+        )
+        return list(result.scalars())
+
+    @staticmethod
+    def bulk_create_with_ids(
+        db: Session, ballots: list[tuple[UUID, UUID, UUID, date, int]]
+    ) -> list[tuple[UUID, UUID]]:
+        """Insert ballots with preassigned ids, skipping the ids that already exist.
+
+        Each ballot is (id, participant id, lottery id, draw date, weight), so
+        writing the same ballots again is a no-op.
+
+        Returns:
+            The (id, lottery id) of the inserted ballots
+        """
+        if not ballots:
+            return []
+        result = db.execute(
+            insert(Ballot)
+            .on_conflict_do_nothing(index_elements=[Ballot.id, Ballot.draw_date])
+            .returning(Ballot.id, Ballot.lottery_id),
+            [
+                {
+                    "id": ballot_id,
+                    "participant_id": participant_id,
+                    "lottery_id": lottery_id,
+                    "draw_date": draw_date,
+                    "weight": weight,
+                }
+                for ballot_id, participant_id, lottery_id, draw_date, weight in ballots
+            ],
+        )
+        return [tuple(row) for row in result]
+
+    @staticmethod
+    def get_by_id(db: Session, ballot_id: UUID, draw_date: date) -> Optional[Ballot]:
+        return db.get(Ballot, (ballot_id, draw_date))
+
+    @staticmethod
+    def get_winner_rows_by_ids(
+        db: Session, ballot_ids: list[UUID], draw_date: date
+    ) -> dict[UUID, Row]:
+        """Get the columns a WinningBallot copies from the given ballots, in one query.
+
+        Returns:
+            The (id, draw_date, participant_id, created_at, alias) rows by ballot id
+        """
+        rows = db.execute(
+            select(
+                Ballot.id,
+                Ballot.draw_date,
+                Ballot.participant_id,
+                Ballot.created_at,
+                Participant.alias,
+            )
+            .join(Participant, Participant.id == Ballot.participant_id)
+            .filter(Ballot.draw_date == draw_date, Ballot.id.in_(ballot_ids))
+        ).all()
+        return {row.id: row for row in rows}
+
+    # The lottery queries below also filter on the lottery's draw date, which
+    # lets the planner prune the scan to the lottery's partition.
+    @staticmethod
+    def get_by_lottery_id(db: Session, lottery_id: UUID, draw_date: date) -> list[Ballot]:
+        return db.query(Ballot).filter_by(lottery_id=lottery_id, draw_date=draw_date).all()
+
+    @staticmethod
+    def _weights_statement(lottery_id: UUID, draw_date: date, batch_size: int):
+        """Build the query of the (id, weight) of a lottery's ballots, in id order.
+
+        Ids are cast to text in the database, building UUID objects for every
+        ballot of a lottery would dominate the cost of a draw. The text order
+        of ids is their UUID order.
+        """
+        return (
+            select(cast(Ballot.id, String), Ballot.weight)
+            .filter(Ballot.draw_date == draw_date, Ballot.lottery_id == lottery_id)
+            .order_by(Ballot.id)
+            .execution_options(yield_per=batch_size)
+        )
+
+    @staticmethod
+    def stream_weights_by_lottery_id(
+        db: Session, lottery_id: UUID, draw_date: date, batch_size: int
+    ) -> Iterator[Sequence[tuple[str, int]]]:
+        """Yield the (id, weight) of a lottery's ballots in batches from a server-side cursor."""
+        result = db.execute(
+            BallotCRUD._weights_statement(
+                lottery_id=lottery_id, draw_date=draw_date, batch_size=batch_size
+            )
+        )
+        for rows in result.partitions():
+            yield rows
+
+    @staticmethod
+    async def stream_weights_by_lottery_id_async(
+        db: AsyncSession, lottery_id: UUID, draw_date: date, batch_size: int
+    ) -> AsyncIterator[Sequence[tuple[str, int]]]:
+        """Async variant of stream_weights_by_lottery_id."""
+        result = await db.stream(
+            BallotCRUD._weights_statement(
+                lottery_id=lottery_id, draw_date=draw_date, batch_size=batch_size
+            )
+        )
+        async for rows in result.partitions():
+            yield rows
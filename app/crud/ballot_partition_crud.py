@@ -0,0 +1,92 @@
+import re
+from datetime import date, datetime, timedelta
+from sqlalchemy import text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+
+BALLOT_PARTITION_NAME_PATTERN = re.compile(r"^ballot_p(\d{8})$")
+BALLOT_ARCHIVE_SCHEMA = "ballot_archive"
+
+
+class BallotPartitionCRUD:
+    """DDL for the daily range partitions of the ballot table.
+
+    Partition names are derived from dates only, so they are safe to format
+    into the statements.
+    """
+
+    @staticmethod
+    def partition_name(draw_date: date) -> str:
+        return f"ballot_p{draw_date:%Y%m%d}"
+
+    @staticmethod
+    def get_partitions(db: Session | Connection) -> dict[date, bool]:
+        """Get the draw dates of the attached partitions.
+
+        Returns:
+            Whether a partition has a concurrent detach pending, by draw date
+        """
+        rows = db.execute(
+            text(
+                """
+                SELECT child.relname, inherits.inhdetachpending
+                FROM pg_inherits AS inherits
+                JOIN pg_class AS child ON child.oid = inherits.inhrelid
+                WHERE inherits.inhparent = 'public.ballot'::regclass
+                """
+            )
+        )
+        partitions = {}
+        for name, detach_pending in rows:
+            match = BALLOT_PARTITION_NAME_PATTERN.match(name)
+            if match:
+                partitions[datetime.strptime(match.group(1), "%Y%m%d").date()] = detach_pending
+        return partitions
+
+    @staticmethod
+    def create_partition(db: Session, draw_date: date) -> None:
+        # Creating a partition briefly locks the parent table, don't queue
+        # behind long running statements and block submissions meanwhile
+        db.execute(text("SET LOCAL lock_timeout = '5s'"))
+        db.execute(
+            text(
+                f"CREATE TABLE IF NOT EXISTS {BallotPartitionCRUD.partition_name(draw_date)} "
+                f"PARTITION OF ballot "
+                f"FOR VALUES FROM ('{draw_date.isoformat()}') "
+                f"TO ('{(draw_date + timedelta(days=1)).isoformat()}')"
+            )
+        )
+
+    @staticmethod
+    def has_ballots(db: Session | Connection, draw_date: date) -> bool:
+        return (
+            db.execute(
+                text(f"SELECT EXISTS (SELECT 1 FROM {BallotPartitionCRUD.partition_name(draw_date)})")
+            ).scalar()
+        )
+
+    @staticmethod
+    def detach_partition(connection: Connection, draw_date: date, finalize: bool = False) -> None:
+        """Detach a partition without blocking writes to the other partitions.
+
+        DETACH ... CONCURRENTLY can't run inside a transaction block, so the
+        connection must be in autocommit mode. A detach that got interrupted
+        is completed with finalize=True.
+        """
+        mode = "FINALIZE" if finalize else "CONCURRENTLY"
+        connection.execute(
+            text(
+                f"ALTER TABLE ballot DETACH PARTITION "
+                f"{BallotPartitionCRUD.partition_name(draw_date)} {mode}"
+            )
+        )
+
+    @staticmethod
+    def archive_partition(connection: Connection, draw_date: date) -> None:
+        """Move a detached partition to the archive schema."""
+        connection.execute(
+            text(
+                f"ALTER TABLE IF EXISTS public.{BallotPartitionCRUD.partition_name(draw_date)} "
+                f"SET SCHEMA {BALLOT_ARCHIVE_SCHEMA}"
+            )
+        )
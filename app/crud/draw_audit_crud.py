@@ -0,0 +1,40 @@
+from datetime import date
+from typing import Optional
+from uuid import UUID
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models import DrawAudit, Lottery
+
+
+class DrawAuditCRUD:
+    @staticmethod
+    def create(
+        db: Session,
+        lottery: Lottery,
+        algorithm: str,
+        seed: bytes,
+        ballot_digest: bytes,
+        ballot_count: int,
+        total_weight: int,
+        winning_ballot_ids: list[UUID],
+        flush: bool = True,
+    ) -> DrawAudit:
+        draw_audit = DrawAudit(
+            draw_date=lottery.draw_date,
+            lottery_id=lottery.id,
+            algorithm=algorithm,
+            seed=seed,
+            ballot_digest=ballot_digest,
+            ballot_count=ballot_count,
+            total_weight=total_weight,
+            winner_count=lottery.winner_count,
+            winning_ballot_ids=winning_ballot_ids,
+        )
+        db.add(draw_audit)
+        if flush:
+            db.flush()
+        return draw_audit
+
+    @staticmethod
+    async def get_by_draw_date_async(db: AsyncSession, draw_date: date) -> Optional[DrawAudit]:
+        return await db.get(DrawAudit, draw_date)
@@ -0,0 +1,37 @@
+from datetime import datetime
+from typing import Optional
+from zoneinfo import ZoneInfo
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.orm import Session
+from app.models import KeyRotationProgress
+
+
+class KeyRotationProgressCRUD:
+    @staticmethod
+    def get_by_key_id(db: Session, key_id: str) -> Optional[KeyRotationProgress]:
+        return db.get(KeyRotationProgress, key_id)
+
+    @staticmethod
+    def get_or_create(db: Session, key_id: str) -> KeyRotationProgress:
+        """Get the checkpoint of a key version, creating it if needed.
+
+        The insert skips a checkpoint created by a concurrent rotation, so
+        both get the same row.
+        """
+        progress = db.get(KeyRotationProgress, key_id)
+        if progress is None:
+            now = datetime.now(ZoneInfo("Europe/Amsterdam"))
+            db.execute(
+                insert(KeyRotationProgress)
+                .values(key_id=key_id, scanned_count=0, rotated_count=0, started_at=now, updated_at=now)
+                .on_conflict_do_nothing(index_elements=[KeyRotationProgress.key_id])
+            )
+            progress = db.get(KeyRotationProgress, key_id)
+        return progress
+
+    @staticmethod
+    def get_by_key_id_for_update(db: Session, key_id: str) -> Optional[KeyRotationProgress]:
+        """Lock the checkpoint row until the end of the transaction and reload it."""
+        return db.get(
+            KeyRotationProgress, key_id, with_for_update=True, populate_existing=True
+        )
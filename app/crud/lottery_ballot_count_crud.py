@@ -0,0 +1,41 @@
+import random
+from uuid import UUID
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert
+from app.models import LotteryBallotCount
+from app.core.settings import settings
+
+
+class LotteryBallotCountCRUD:
+    @staticmethod
+    def _increment_statement(counts: dict[UUID, int]):
+        """Build one upsert adding each lottery's count to a random shard of it.
+
+        Rows are ordered by lottery id so concurrent batches lock counter rows
+        in the same order and can't deadlock each other.
+        """
+        inserted = insert(LotteryBallotCount).values(
+            [
+                {
+                    "lottery_id": lottery_id,
+                    "shard": random.randrange(settings.LOTTERY_BALLOT_COUNT_SHARDS),
+                    "ballot_count": count,
+                }
+                for lottery_id, count in sorted(counts.items())
+            ]
+        )
+        return inserted.on_conflict_do_update(
+            index_elements=[LotteryBallotCount.lottery_id, LotteryBallotCount.shard],
+            set_={"ballot_count": LotteryBallotCount.ballot_count + inserted.excluded.ballot_count},
+        )
+
+    @staticmethod
+    def increment(db: Session, counts: dict[UUID, int]) -> None:
+        if counts:
+            db.execute(LotteryBallotCountCRUD._increment_statement(counts))
+
+    @staticmethod
+    async def increment_async(db: AsyncSession, counts: dict[UUID, int]) -> None:
+        if counts:
+            await db.execute(LotteryBallotCountCRUD._increment_statement(counts))
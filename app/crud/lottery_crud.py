@@ -1,39 +1,189 @@
 from sqlalchemy.orm import Session
-from sqlalchemy import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import func, select, literal, any_, cast, exists, BigInteger, Date
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+import uuid
+from uuid import UUID
 from datetime import date, datetime
 from typing import Optional
-from app.models import Lottery, Ballot
+from app.models import Lottery, LotteryBallotCount, WinningBallot
 from zoneinfo import ZoneInfo
 
+# First key of the draw leases' advisory locks, the second one is the draw date
+DRAW_LOCK_NAMESPACE = 0x4C4F5454  # "LOTT"
+
 
 class LotteryCRUD:
     @staticmethod
     def get_by_draw_date(db: Session, draw_date: date) -> Optional[Lottery]:
         return db.query(Lottery).filter_by(draw_date=draw_date).first()
 
+    @staticmethod
+    def try_lock_draw(db: Session, draw_date: date) -> bool:
+        """Take the draw lease of a draw date until the end of the transaction.
+
+        This is a transaction level advisory lock, so the lottery row itself
+        stays unlocked for the foreign key checks of ballot inserts.
+
+        Returns:
+            False, without waiting, when another transaction holds the lease
+        """
+        return db.execute(
+            select(func.pg_try_advisory_xact_lock(DRAW_LOCK_NAMESPACE, draw_date.toordinal()))
+        ).scalar()
+
+    @staticmethod
+    def get_undrawn_draw_dates(db: Session, before: date) -> list[date]:
+        """Get the draw dates before the given date with ballots but no winning ballot, oldest first."""
+        return list(
+            db.execute(
+                select(Lottery.draw_date)
+                .where(
+                    Lottery.draw_date < before,
+                    ~exists().where(WinningBallot.draw_date == Lottery.draw_date),
+                    exists().where(
+                        LotteryBallotCount.lottery_id == Lottery.id,
+                        LotteryBallotCount.ballot_count > 0,
+                    ),
+                )
+                .order_by(Lottery.draw_date)
+            ).scalars()
+        )
+
+    @staticmethod
+    async def get_by_draw_date_async(
+        db: AsyncSession, draw_date: date
+    ) -> Optional[Lottery]:
+        result = await db.execute(
+            select(Lottery).filter_by(draw_date=draw_date).limit(1)
+        )
+        return result.scalars().first()
+
+    @staticmethod
+    def get_ids_by_draw_dates(db: Session, draw_dates: list[date]) -> dict[date, UUID]:
+        rows = db.execute(
+            select(Lottery.draw_date, Lottery.id).where(
+                Lottery.draw_date == any_(literal(draw_dates, ARRAY(Date)))
+            )
+        )
+        return {draw_date: lottery_id for draw_date, lottery_id in rows}
+
     @staticmethod
     def get_by_id(db: Session, lottery_id: int) -> Optional[Lottery]:
         return db.query(Lottery).filter_by(id=lottery_id).first()
 
     @staticmethod
-    def create(db: Session, draw_date: date) -> Lottery:
-        lottery = Lottery(draw_date=draw_date)
+    def create(db: Session, draw_date: date, flush: bool = True) -> Lottery:
+        lottery = Lottery(id=uuid.uuid4(), draw_date=draw_date)
         db.add(lottery)
-        db.flush()
-        db.refresh(lottery)
+        if flush:
+            db.flush()
         return lottery
 
     @staticmethod
-    def get_upcoming(db: Session) -> list[tuple[Lottery, int]]:
+    def bulk_create(db: Session, draw_dates: list[date]) -> dict[date, UUID]:
+        """Insert lotteries, skipping draw dates that already have one.
+
+        Returns:
+            A mapping of draw date to id for the rows that were inserted
+        """
+        if not draw_dates:
+            return {}
+        result = db.execute(
+            insert(Lottery)
+            .on_conflict_do_nothing(index_elements=[Lottery.draw_date])
+            .returning(Lottery.draw_date, Lottery.id),
+            [{"draw_date": draw_date} for draw_date in draw_dates],
+        )
+        return {draw_date: lottery_id for draw_date, lottery_id in result}
+
+    @staticmethod
+    def _upsert_statement(draw_date: date):
+        """Build a single statement that inserts a lottery or finds the existing one.
+
+        DO NOTHING is used rather than DO UPDATE so concurrent submissions for the
+        same draw date don't queue up on the lottery row lock. The statement
+        returns no id only when a concurrent transaction committed the same draw
+        date after it started.
+        """
+        inserted = (
+            insert(Lottery)
+            .values(
+                id=uuid.uuid4(),
+                draw_date=draw_date,
+                created_at=datetime.now(ZoneInfo("Europe/Amsterdam")),
+            )
+            .on_conflict_do_nothing(index_elements=[Lottery.draw_date])
+            .returning(Lottery.id)
+            .cte("inserted")
+        )
+        return (
+            select(inserted.c.id)
+            .union_all(select(Lottery.id).where(Lottery.draw_date == draw_date))
+            .limit(1)
+        )
+
+    @staticmethod
+    def upsert(db: Session, draw_date: date) -> Optional[UUID]:
+        return db.execute(LotteryCRUD._upsert_statement(draw_date=draw_date)).scalar()
+
+    @staticmethod
+    async def upsert_async(db: AsyncSession, draw_date: date) -> Optional[UUID]:
+        result = await db.execute(LotteryCRUD._upsert_statement(draw_date=draw_date))
+        return result.scalar()
+
+    @staticmethod
+    async def set_winner_count_async(db: AsyncSession, draw_date: date, winner_count: int) -> UUID:
+        """Set the winner count of the lottery of a draw date, creating the lottery if needed."""
+        result = await db.execute(
+            insert(Lottery)
+            .values(
+                id=uuid.uuid4(),
+                draw_date=draw_date,
+                created_at=datetime.now(ZoneInfo("Europe/Amsterdam")),
+                winner_count=winner_count,
+            )
+            .on_conflict_do_update(
+                index_elements=[Lottery.draw_date], set_={"winner_count": winner_count}
+            )
+            .returning(Lottery.id)
+        )
+        return result.scalar_one()
+
+    @staticmethod
+    async def create_async(db: AsyncSession, draw_date: date, flush: bool = True) -> Lottery:
+        lottery = Lottery(id=uuid.uuid4(), draw_date=draw_date)
+        db.add(lottery)
+        if flush:
+            await db.flush()
+        return lottery
+
+    @staticmethod
+    def _upcoming_statement():
+        """Build the upcoming lotteries query, summing the sharded ballot counters.
+
+        Only the counter rows of upcoming lotteries are read, so the cost no
+        longer depends on the number of ballots.
+        """
         today = datetime.now(ZoneInfo("Europe/Amsterdam")).date()
         return (
-            db.query(
+            select(
                 Lottery,
-                func.count(Ballot.id).label('ballot_count')
+                cast(
+                    func.coalesce(func.sum(LotteryBallotCount.ballot_count), 0), BigInteger
+                ).label('ballot_count')
             )
-            .outerjoin(Ballot)
+            .outerjoin(LotteryBallotCount, LotteryBallotCount.lottery_id == Lottery.id)
             .filter(Lottery.draw_date >= today)
             .group_by(Lottery.id)
             .order_by(Lottery.draw_date)
-            .all()
         )
+
+    @staticmethod
+    def get_upcoming(db: Session) -> list[tuple[Lottery, int]]:
+        return db.execute(LotteryCRUD._upcoming_statement()).all()
+
+    @staticmethod
+    async def get_upcoming_async(db: AsyncSession) -> list[tuple[Lottery, int]]:
+        result = await db.execute(LotteryCRUD._upcoming_statement())
+        return result.all()
@@ -1,6 +1,16 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy import select, literal, any_, bindparam, update, String, text
+from sqlalchemy.dialects.postgresql import insert, ARRAY
+import uuid
+from uuid import UUID
 from typing import Optional
 from app.models import Participant
+from app.core.security import (
+    create_encrypted_and_hashed_versions_of_data,
+    create_encrypted_and_hashed_versions_of_many,
+    search_hashes,
+)
 
 
 class ParticipantCRUD:
@@ -8,14 +18,182 @@ class ParticipantCRUD:
     def get_by_email(db: Session, email: str) -> Optional[Participant]:
         return Participant.find_by_email(session=db, email=email)
 
+    @staticmethod
+    async def get_by_email_async(db: AsyncSession, email: str) -> Optional[Participant]:
+        return await Participant.find_by_email_async(session=db, email=email)
+
+    @staticmethod
+    def _id_by_email_statement(email: str):
+        # Participants may still be hashed with an older key version
+        return select(Participant.id).where(Participant.email_hash.in_(search_hashes(email))).limit(1)
+
+    @staticmethod
+    def get_id_by_email(db: Session, email: str) -> Optional[UUID]:
+        return db.execute(ParticipantCRUD._id_by_email_statement(email=email)).scalar()
+
+    @staticmethod
+    async def get_id_by_email_async(db: AsyncSession, email: str) -> Optional[UUID]:
+        result = await db.execute(ParticipantCRUD._id_by_email_statement(email=email))
+        return result.scalar()
+
     @staticmethod
     def get_by_alias(db: Session, alias: str) -> Optional[Participant]:
         return db.query(Participant).filter_by(alias=alias).first()
 
     @staticmethod
-    def create(db: Session, email: str, alias: str) -> Participant:
-        participant = Participant(email=email, alias=alias)
+    async def get_by_alias_async(db: AsyncSession, alias: str) -> Optional[Participant]:
+        result = await db.execute(select(Participant).filter_by(alias=alias).limit(1))
+        return result.scalars().first()
+
+    @staticmethod
+    def create(db: Session, email: str, alias: str, flush: bool = True) -> Participant:
+        participant = Participant(id=uuid.uuid4(), email=email, alias=alias)
         db.add(participant)
-        db.flush()
-        db.refresh(participant)
+        if flush:
+            db.flush()
         return participant
+
+    @staticmethod
+    async def create_async(
+        db: AsyncSession, email: str, alias: str, flush: bool = True
+    ) -> Participant:
+        participant = Participant(id=uuid.uuid4(), email=email, alias=alias)
+        db.add(participant)
+        if flush:
+            await db.flush()
+        return participant
+
+    @staticmethod
+    def _upsert_statement(email: str, alias: str):
+        """Build a single statement that inserts a participant or finds the existing one.
+
+        The participant is looked up under every key version's hash, and only
+        inserted when none matches, so a participant not yet re-encrypted by a
+        key rotation isn't created twice. The INSERT also skips any
+        conflicting row, so the statement returns no id when the alias is
+        already taken or when the same email was committed by a concurrent
+        transaction after the statement started.
+        """
+        encrypted_email, email_hash = create_encrypted_and_hashed_versions_of_data(email)
+        email_hashes = search_hashes(email)
+        existing = select(Participant.id).where(Participant.email_hash.in_(email_hashes))
+        inserted = (
+            insert(Participant)
+            .from_select(
+                ["id", "email", "email_hash", "alias"],
+                select(
+                    literal(uuid.uuid4(), Participant.id.type),
+                    literal(encrypted_email, Participant.email.type),
+                    literal(email_hash, Participant.email_hash.type),
+                    literal(alias, Participant.alias.type),
+                ).where(~existing.exists()),
+            )
+            .on_conflict_do_nothing()
+            .returning(Participant.id)
+            .cte("inserted")
+        )
+        return select(inserted.c.id).union_all(existing).limit(1)
+
+    @staticmethod
+    def upsert(db: Session, email: str, alias: str) -> Optional[UUID]:
+        return db.execute(ParticipantCRUD._upsert_statement(email=email, alias=alias)).scalar()
+
+    @staticmethod
+    async def upsert_async(db: AsyncSession, email: str, alias: str) -> Optional[UUID]:
+        result = await db.execute(ParticipantCRUD._upsert_statement(email=email, alias=alias))
+        return result.scalar()
+
+    @staticmethod
+    def reserve_alias_block(db: Session) -> int:
+        return db.execute(text("SELECT nextval('participant_alias_block_seq')")).scalar_one()
+
+    @staticmethod
+    async def reserve_alias_block_async(db: AsyncSession) -> int:
+        result = await db.execute(text("SELECT nextval('participant_alias_block_seq')"))
+        return result.scalar_one()
+
+    @staticmethod
+    def get_ids_by_email_hashes(db: Session, email_hashes: list[str]) -> dict[str, UUID]:
+        """Map email hashes to participant ids, sending all hashes as one array parameter.
+
+        Returns:
+            A mapping of the stored email hash to id for the participants found
+        """
+        rows = db.execute(
+            select(Participant.email_hash, Participant.id).where(
+                Participant.email_hash == any_(literal(email_hashes, ARRAY(String)))
+            )
+        )
+        return {email_hash: participant_id for email_hash, participant_id in rows}
+
+    @staticmethod
+    def bulk_create(db: Session, emails_and_aliases: list[tuple[str, str]]) -> dict[str, UUID]:
+        """Insert participants with multi-row INSERTs, skipping any that conflict.
+
+        Rows conflicting on either the email hash or the alias are not inserted.
+
+        Returns:
+            A mapping of email hash to id for the rows that were inserted
+        """
+        if not emails_and_aliases:
+            return {}
+        encrypted_emails, email_hashes = create_encrypted_and_hashed_versions_of_many(
+            [email for email, _ in emails_and_aliases]
+        )
+        rows = [
+            {"email": encrypted_email, "email_hash": email_hash, "alias": alias}
+            for encrypted_email, email_hash, (_, alias) in zip(
+                encrypted_emails, email_hashes, emails_and_aliases
+            )
+        ]
+        result = db.execute(
+            insert(Participant)
+            .on_conflict_do_nothing()
+            .returning(Participant.email_hash, Participant.id),
+            rows,
+        )
+        return {email_hash: participant_id for email_hash, participant_id in result}
+
+    @staticmethod
+    def get_encrypted_emails_after(
+        db: Session, after_id: Optional[UUID], limit: int
+    ) -> list[tuple[UUID, bytes, str]]:
+        """Get the next (id, encrypted email, email hash) rows in id order.
+
+        Keyset pagination on the primary key, so each chunk is an index range
+        scan however far into the table it is.
+        """
+        query = select(Participant.id, Participant.email, Participant.email_hash)
+        if after_id is not None:
+            query = query.where(Participant.id > after_id)
+        return [tuple(row) for row in db.execute(query.order_by(Participant.id).limit(limit))]
+
+    @staticmethod
+    def update_encrypted_emails(
+        db: Session, rows: list[tuple[UUID, str, bytes, str]]
+    ) -> None:
+        """Replace the encrypted emails and hashes of participants in one executemany.
+
+        Each row is (id, expected email hash, new encrypted email, new email
+        hash). A row whose hash no longer is the expected one is left alone.
+        """
+        if not rows:
+            return
+        participant = Participant.__table__
+        db.execute(
+            update(participant)
+            .where(
+                participant.c.id == bindparam("b_id"),
+                participant.c.email_hash == bindparam("b_expected_email_hash"),
+            )
+            .values(email=bindparam("b_email"), email_hash=bindparam("b_email_hash")),
+            [
+                {
+                    "b_id": participant_id,
+                    "b_expected_email_hash": expected_email_hash,
+                    "b_email": encrypted_email,
+                    "b_email_hash": email_hash,
+                }
+                for participant_id, expected_email_hash, encrypted_email, email_hash in rows
+            ],
+        )
@@ -1,45 +1,149 @@
+import uuid
+from typing import AsyncIterator, Optional, Sequence
 from uuid import UUID
-from sqlalchemy.orm import Session, joinedload
-from datetime import date
-from app.models import WinningBallot, Lottery, Ballot
+from sqlalchemy import Row, select, tuple_
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from datetime import date, datetime
+from app.models import WinningBallot
 
 
 class WinningBallotCRUD:
     @staticmethod
     def get_by_lottery_draw_date(
         db: Session, draw_date: date
-    ) -> WinningBallot | None:
-        """Get winning ballot for a specific lottery draw date by joining through ballot to lottery."""
+    ) -> list[WinningBallot]:
+        """Get the winning ballots of a specific lottery draw date, in rank order.
+
+        Winning ballots carry their draw date and participant alias, so neither
+        the ballot nor the participant table is touched.
+        """
         return (
             db.query(WinningBallot)
-            .join(WinningBallot.ballot)  # Join to ballot
-            .join(Ballot.lottery)  # Join ballot to lottery
-            .options(
-                joinedload(WinningBallot.ballot).joinedload(Ballot.participant)  # Eager load participant
+            .filter(WinningBallot.draw_date == draw_date)
+            .order_by(WinningBallot.rank)
+            .all()
+        )
+
+    @staticmethod
+    async def get_by_lottery_draw_date_async(
+        db: AsyncSession, draw_date: date
+    ) -> list[WinningBallot]:
+        """Async variant of get_by_lottery_draw_date."""
+        result = await db.execute(
+            select(WinningBallot)
+            .filter(WinningBallot.draw_date == draw_date)
+            .order_by(WinningBallot.rank)
+        )
+        return list(result.scalars())
+
+    @staticmethod
+    def _participant_history_statement(
+        participant_id: UUID, after: Optional[tuple[date, UUID]], limit: Optional[int]
+    ):
+        """Build the query of a participant's winning ballots, in (draw date, ballot id) order.
+
+        Only the returned columns are selected, as plain rows. Rows after the
+        given (draw date, ballot id) are returned, so pages are read with one
+        range scan of the (participant_id, draw_date, ballot_id) index
+        whatever their position.
+        """
+        statement = (
+            select(
+                WinningBallot.ballot_id,
+                WinningBallot.ballot_created_at,
+                WinningBallot.draw_date.label("lottery_draw_date"),
+                WinningBallot.rank,
             )
-            .filter(Lottery.draw_date == draw_date)
-            .first()
+            .filter(WinningBallot.participant_id == participant_id)
+            .order_by(WinningBallot.draw_date, WinningBallot.ballot_id)
         )
+        if after is not None:
+            statement = statement.filter(
+                tuple_(WinningBallot.draw_date, WinningBallot.ballot_id) > tuple_(*after)
+            )
+        if limit is not None:
+            statement = statement.limit(limit)
+        return statement
 
     @staticmethod
     def get_by_participant_id(
-        db: Session, participant_id: UUID
-    ) -> list[WinningBallot]:
-        """Get all winning ballots for a participant by joining through ballot."""
-        return (
-            db.query(WinningBallot)
-            .join(WinningBallot.ballot)  # Join to ballot
-            .options(
-                joinedload(WinningBallot.ballot).joinedload(Ballot.participant)
+        db: Session,
+        participant_id: UUID,
+        after: Optional[tuple[date, UUID]] = None,
+        limit: Optional[int] = None,
+    ) -> list[Row]:
+        """Get a participant's winning ballots, see _participant_history_statement."""
+        return list(
+            db.execute(
+                WinningBallotCRUD._participant_history_statement(
+                    participant_id=participant_id, after=after, limit=limit
+                )
+            ).all()
+        )
+
+    @staticmethod
+    async def get_by_participant_id_async(
+        db: AsyncSession,
+        participant_id: UUID,
+        after: Optional[tuple[date, UUID]] = None,
+        limit: Optional[int] = None,
+    ) -> list[Row]:
+        """Async variant of get_by_participant_id."""
+        result = await db.execute(
+            WinningBallotCRUD._participant_history_statement(
+                participant_id=participant_id, after=after, limit=limit
             )
-            .filter(Ballot.participant_id == participant_id)
-            .all()
         )
+        return list(result.all())
 
     @staticmethod
-    def create(db: Session, ballot_id: UUID) -> WinningBallot:
-        winning_ballot = WinningBallot(ballot_id=ballot_id)
+    async def stream_by_participant_id_async(
+        db: AsyncSession,
+        participant_id: UUID,
+        after: Optional[tuple[date, UUID]] = None,
+        batch_size: int = 1000,
+    ) -> AsyncIterator[Sequence[Row]]:
+        """Yield a participant's winning ballots in batches from a server-side cursor."""
+        result = await db.stream(
+            WinningBallotCRUD._participant_history_statement(
+                participant_id=participant_id, after=after, limit=None
+            ).execution_options(yield_per=batch_size)
+        )
+        async for rows in result.partitions():
+            yield rows
+
+    @staticmethod
+    def create(
+        db: Session,
+        ballot_id: UUID,
+        draw_date: date,
+        participant_id: UUID,
+        ballot_created_at: datetime,
+        participant_alias: str,
+        rank: int,
+        flush: bool = True,
+    ) -> WinningBallot:
+        """Create a winning ballot from the ballot and participant columns it copies.
+
+        See BallotCRUD.get_winner_rows_by_ids to read them for all winners at once.
+        """
+        winning_ballot = WinningBallot(
+            id=uuid.uuid4(),
+            ballot_id=ballot_id,
+            draw_date=draw_date,
+            rank=rank,
+            participant_id=participant_id,
+            ballot_created_at=ballot_created_at,
+            participant_alias=participant_alias,
+        )
         db.add(winning_ballot)
-        db.flush()
-        db.refresh(winning_ballot)
+        if flush:
+            db.flush()
         return winning_ballot
+
+    @staticmethod
+    def exists_by_draw_date(db: Session, draw_date: date) -> bool:
+        return db.query(
+            select(WinningBallot.id).filter(WinningBallot.draw_date == draw_date).exists()
+        ).scalar()
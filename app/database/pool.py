@@ -0,0 +1,40 @@
+"""Connection pools reporting how long checkouts wait."""
+
+import time
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+from app.core.metrics import db_pool_checkout_timeouts, db_pool_checkout_wait_seconds
+
+
+class TimedQueuePool(QueuePool):
+    """QueuePool recording the duration of every checkout.
+
+    The duration covers waiting for a free connection, opening a new one when
+    the pool may overflow, and the pre-ping when enabled.
+    """
+
+    engine_name = "sync"
+
+    def connect(self):
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            db_pool_checkout_timeouts.inc(engine=self.engine_name)
+            raise
+        finally:
+            db_pool_checkout_wait_seconds.observe(
+                time.perf_counter() - start, engine=self.engine_name
+            )
+
+
+class TimedAsyncAdaptedQueuePool(TimedQueuePool, AsyncAdaptedQueuePool):
+    """Async engine variant of TimedQueuePool."""
+
+    engine_name = "async"
+
+
+class TimedReplicaAsyncAdaptedQueuePool(TimedAsyncAdaptedQueuePool):
+    """TimedAsyncAdaptedQueuePool of a read replica engine."""
+
+    engine_name = "replica"
@@ -0,0 +1,107 @@
+"""Routing of read-only sessions to healthy read replicas."""
+
+import asyncio
+import itertools
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncEngine, async_sessionmaker, create_async_engine
+from app.core.logging import logger
+
+# Seconds the replica is behind the primary. When everything received has been
+# replayed the replica is caught up, however old the last replayed transaction.
+REPLICATION_LAG_QUERY = text(
+    """
+    SELECT pg_is_in_recovery(),
+           CASE
+               WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+               ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp())
+           END
+    """
+)
+
+
+class ReadReplica:
+    def __init__(self, url: str, engine: AsyncEngine):
+        self.url = url
+        self.engine = engine
+        self.session_factory = async_sessionmaker(
+            bind=engine, autoflush=False, expire_on_commit=False
+        )
+        # Unhealthy until the first health check passes
+        self.healthy = False
+        self.lag_seconds: Optional[float] = None
+        self.active_sessions = 0
+
+    @property
+    def name(self) -> str:
+        return self.engine.url.render_as_string(hide_password=True)
+
+
+class ReadReplicaSet:
+    """Read replicas with health checks and per-request selection.
+
+    A background loop (see run_health_checks) checks every replica: it must
+    answer, be in recovery (a standby) and, when max_lag_seconds is set, have
+    replayed changes up to that far behind the primary. A replica whose
+    session fails with a connection error is taken out until its next
+    passing check. select() returns None when no replica is usable, callers
+    then read from the primary.
+    """
+
+    def __init__(
+        self,
+        urls: list[str],
+        selection: str,
+        max_lag_seconds: Optional[float],
+        health_check_interval_seconds: float,
+        engine_options: dict,
+    ):
+        self.replicas = [
+            ReadReplica(url=url, engine=create_async_engine(url, **engine_options)) for url in urls
+        ]
+        self.selection = selection
+        self.max_lag_seconds = max_lag_seconds
+        self.health_check_interval_seconds = health_check_interval_seconds
+        self._round_robin = itertools.count()
+
+    def select(self) -> Optional[ReadReplica]:
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        if self.selection == "least_connections":
+            return min(healthy, key=lambda replica: replica.active_sessions)
+        return healthy[next(self._round_robin) % len(healthy)]
+
+    async def check(self, replica: ReadReplica) -> None:
+        try:
+            async with replica.engine.connect() as connection:
+                in_recovery, lag_seconds = (await connection.execute(REPLICATION_LAG_QUERY)).one()
+        except Exception as e:
+            if replica.healthy:
+                logger.warning(f"Read replica {replica.name} failed its health check: {str(e)}")
+            replica.healthy = False
+            return
+        replica.lag_seconds = float(lag_seconds) if lag_seconds is not None else None
+        healthy = bool(in_recovery) and (
+            self.max_lag_seconds is None
+            or (replica.lag_seconds is not None and replica.lag_seconds <= self.max_lag_seconds)
+        )
+        if healthy != replica.healthy:
+            logger.info(
+                f"Read replica {replica.name} is {'healthy' if healthy else 'unhealthy'} "
+                f"(in recovery: {in_recovery}, lag: {replica.lag_seconds} seconds)"
+            )
+        replica.healthy = healthy
+
+    async def check_all(self) -> None:
+        await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+
+    async def run_health_checks(self) -> None:
+        """Check the replicas until cancelled."""
+        while True:
+            await self.check_all()
+            await asyncio.sleep(self.health_check_interval_seconds)
+
+    async def dispose(self) -> None:
+        for replica in self.replicas:
+            await replica.engine.dispose()
@@ -1,19 +1,197 @@
-from sqlalchemy import create_engine
+import time
+import uuid
+from contextlib import asynccontextmanager
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+from app.core.metrics import current_query_stats, db_pool_connections, db_query_duration_seconds
 from app.core.settings import settings
+from app.database.pool import (
+    TimedAsyncAdaptedQueuePool,
+    TimedQueuePool,
+    TimedReplicaAsyncAdaptedQueuePool,
+)
+from app.database.replicas import ReadReplicaSet
+
+
+def _pool_options(poolclass) -> dict:
+    # A transaction pooler already shares server connections between clients,
+    # connections are opened per checkout instead of being pooled twice
+    if settings.DB_PGBOUNCER:
+        return {"poolclass": NullPool}
+    return {
+        "poolclass": poolclass,
+        "pool_size": settings.DB_POOL_SIZE,
+        "max_overflow": settings.DB_MAX_OVERFLOW,
+        "pool_timeout": settings.DB_POOL_TIMEOUT_SECONDS,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+    }
+
+
+def _connect_args() -> dict:
+    if settings.DB_STATEMENT_TIMEOUT_MS is None or settings.DB_PGBOUNCER:
+        return {}
+    return {"options": f"-c statement_timeout={settings.DB_STATEMENT_TIMEOUT_MS}"}
+
+
+def _async_connect_args() -> dict:
+    if settings.DB_PGBOUNCER:
+        # Prepared statements live on a server connection, which the pooler may
+        # hand to another client between transactions. Nothing is cached and
+        # statement names are unique so they never clash on a server connection.
+        return {
+            "statement_cache_size": 0,
+            "prepared_statement_cache_size": 0,
+            "prepared_statement_name_func": lambda: f"__asyncpg_{uuid.uuid4()}__",
+        }
+    if settings.DB_STATEMENT_TIMEOUT_MS is None:
+        return {}
+    return {"server_settings": {"statement_timeout": str(settings.DB_STATEMENT_TIMEOUT_MS)}}
+
 
 engine = create_engine(
     settings.DATABASE_URL,
-    pool_pre_ping=True
+    connect_args=_connect_args(),
+    **_pool_options(TimedQueuePool),
+)
+
+# Async engine (asyncpg) used by the API so requests don't hold a worker thread
+# while waiting on Postgres
+async_engine = create_async_engine(
+    settings.ASYNC_DATABASE_URL,
+    connect_args=_async_connect_args(),
+    **_pool_options(TimedAsyncAdaptedQueuePool),
 )
 
 # Each instance of SessionLocal will be a database session
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Objects are not expired on commit so they can still be serialized
+# after the transaction ends without triggering implicit IO
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine, autoflush=False, expire_on_commit=False
+)
+
+# Read-only sessions of the query endpoints go to these when configured
+read_replicas = ReadReplicaSet(
+    urls=settings.READ_REPLICA_ASYNC_URLS,
+    selection=settings.READ_REPLICA_SELECTION,
+    max_lag_seconds=settings.READ_REPLICA_MAX_LAG_SECONDS,
+    health_check_interval_seconds=settings.READ_REPLICA_HEALTH_CHECK_INTERVAL_SECONDS,
+    engine_options={
+        "connect_args": _async_connect_args(),
+        **_pool_options(TimedReplicaAsyncAdaptedQueuePool),
+    },
+)
+
+
+def _instrument(sync_engine: Engine, engine_name: str) -> None:
+    """Record the duration of every statement, and add it to the current request's stats."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        context.metrics_start_time = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        duration = time.perf_counter() - context.metrics_start_time
+        db_query_duration_seconds.observe(duration, engine=engine_name)
+        # The async engines run their events in the request's context too
+        stats = current_query_stats.get()
+        if stats is not None:
+            stats.count += 1
+            stats.seconds += duration
+
+
+def _instrumented_engines() -> list[tuple[str, Engine]]:
+    return [
+        ("sync", engine),
+        ("async", async_engine.sync_engine),
+        *(("replica", replica.engine.sync_engine) for replica in read_replicas.replicas),
+    ]
+
+
+def _pool_connections() -> dict[tuple[str, ...], float]:
+    values: dict[tuple[str, ...], float] = {}
+    for engine_name, sync_engine in _instrumented_engines():
+        pool = sync_engine.pool
+        # NullPool (PgBouncer mode) keeps no connections
+        if not hasattr(pool, "checkedout"):
+            continue
+        for state, count in (
+            ("checked_out", pool.checkedout()),
+            ("idle", pool.checkedin()),
+            ("overflow", max(pool.overflow(), 0)),
+        ):
+            key = (engine_name, state)
+            values[key] = values.get(key, 0) + count
+    return values
+
+
+for _engine_name, _sync_engine in _instrumented_engines():
+    _instrument(_sync_engine, _engine_name)
+db_pool_connections.collect = _pool_connections
+
+
+def dispose_engines_after_fork() -> None:
+    """Give a forked process its own connection pools.
+
+    The pools inherited from the parent hold the parent's sockets. They are
+    replaced by empty ones without closing those connections, which the
+    parent may still be using.
+    """
+    engine.dispose(close=False)
+    async_engine.sync_engine.dispose(close=False)
+    for replica in read_replicas.replicas:
+        replica.engine.sync_engine.dispose(close=False)
+
+
 # Dependency for getting the database session
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
-        db.close()
\ No newline at end of file
+        db.close()
+
+
+# Dependency for getting an async database session
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+@asynccontextmanager
+async def read_session():
+    """Async database session for read-only queries.
+
+    It reads from a healthy replica when there is one and from the primary
+    otherwise.
+    """
+    replica = read_replicas.select()
+    if replica is None:
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    replica.active_sessions += 1
+    try:
+        async with replica.session_factory() as db:
+            yield db
+    except DBAPIError as e:
+        if e.connection_invalidated:
+            # Stop routing to it until its next health check passes
+            replica.healthy = False
+        raise
+    finally:
+        replica.active_sessions -= 1
+
+
+# Dependency for getting an async database session for read-only queries, see read_session
+async def get_read_db():
+    async with read_session() as db:
+        yield db
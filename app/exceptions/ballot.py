@@ -1,3 +1,13 @@
 class BallotSubmissionException(Exception):
     def __init__(self, message: str):
         super().__init__(message)
+
+
+class LotteryClosedException(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
+
+
+class BallotQuotaExceededException(Exception):
+    def __init__(self, message: str):
+        super().__init__(message)
@@ -1,5 +1,23 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
+from app.api.middleware import MetricsMiddleware, RequestIdMiddleware
 from app.api.routes import include_routers
+from app.database.session import read_replicas
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Replicas are used once they have passed a health check
+    health_checks = None
+    if read_replicas.replicas:
+        await read_replicas.check_all()
+        health_checks = asyncio.create_task(read_replicas.run_health_checks())
+    yield
+    if health_checks:
+        health_checks.cancel()
+    await read_replicas.dispose()
+
 
 app = FastAPI(
     title="Bynder lottery service",
@@ -9,7 +27,12 @@ app = FastAPI(
     # docs_url=None,
     # redoc_url=None,
     # openapi_url=None,
+    lifespan=lifespan,
 )
 
+app.add_middleware(MetricsMiddleware)
+# Added last so it runs first, and the metrics middleware's records get the id too
+app.add_middleware(RequestIdMiddleware)
+
 # Use the function to include all routers
 include_routers(app)
@@ -2,3 +2,6 @@ from .participant import Participant
 from .lottery import Lottery
 from .ballot import Ballot
 from .winning_ballot import WinningBallot
+from .lottery_ballot_count import LotteryBallotCount
+from .key_rotation_progress import KeyRotationProgress
+from .draw_audit import DrawAudit
@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, DateTime, ForeignKey
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Index, SmallInteger
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from zoneinfo import ZoneInfo
@@ -9,12 +9,27 @@ from app.models.base import Base
 
 class Ballot(Base):
     __tablename__ = "ballot"
+    __table_args__ = (
+        # A lottery's ballots, and cascading deletes of lotteries
+        Index("ix_ballot_lottery_id_id", "lottery_id", "id"),
+        # Participant lookups (winning ballot history, cascading deletes)
+        Index("ix_ballot_participant_id_id", "participant_id", "id"),
+        # One range partition per draw date, see BallotPartitionService
+        {"postgresql_partition_by": "RANGE (draw_date)"},
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # Copy of the lottery's draw date. It is the partition key, so it has to be
+    # part of the primary key, and filtering on it lets the planner prune to a
+    # single partition.
+    draw_date = Column(Date, primary_key=True)
     created_at = Column(
         DateTime(timezone=True),
         default=lambda: datetime.now(ZoneInfo("Europe/Amsterdam")),
     )
+    # Relative chance of winning, e.g. greater than 1 for bonus ballots. The
+    # server default is for ballots loaded with COPY.
+    weight = Column(SmallInteger, nullable=False, default=1, server_default="1")
 
     participant_id = Column(
         UUID(as_uuid=True),
@@ -32,6 +47,10 @@ class Ballot(Base):
     # Since ballot can't win more than once we set uselist to False
     winning_entry = relationship(
         "WinningBallot",
+        primaryjoin=(
+            "and_(Ballot.id == foreign(WinningBallot.ballot_id), "
+            "Ballot.draw_date == foreign(WinningBallot.draw_date))"
+        ),
         back_populates="ballot",
         uselist=False,
         cascade="all, delete-orphan",
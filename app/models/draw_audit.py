@@ -0,0 +1,40 @@
+from datetime import datetime
+from sqlalchemy import BigInteger, Column, Date, DateTime, ForeignKey, LargeBinary, SmallInteger, String
+from sqlalchemy.dialects.postgresql import ARRAY, UUID
+from zoneinfo import ZoneInfo
+from app.models.base import Base
+
+
+class DrawAudit(Base):
+    """Record of a lottery's draw, enough to reproduce and verify it.
+
+    The winners are a deterministic function of the seed and of the
+    lottery's ballots in id order, see app.services.draw_selection. The
+    ballot digest commits to those ballots, so a draw can be checked against
+    the ballots as long as its partition hasn't been archived.
+    """
+    __tablename__ = "draw_audit"
+
+    draw_date = Column(Date, primary_key=True)
+    lottery_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("lottery.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    # DRAW_ALGORITHM of the draw
+    algorithm = Column(String(64), nullable=False)
+    # Key of the draw's pseudorandom function, from the OS CSPRNG
+    seed = Column(LargeBinary, nullable=False)
+    # SHA-256 of the "id,weight" lines of the lottery's ballots in id order
+    ballot_digest = Column(LargeBinary, nullable=False)
+    ballot_count = Column(BigInteger, nullable=False)
+    total_weight = Column(BigInteger, nullable=False)
+    # The lottery's winner_count at the time of the draw
+    winner_count = Column(SmallInteger, nullable=False)
+    # In rank order
+    winning_ballot_ids = Column(ARRAY(UUID(as_uuid=True)), nullable=False)
+    drawn_at = Column(
+        DateTime(timezone=True),
+        nullable=False,
+        default=lambda: datetime.now(ZoneInfo("Europe/Amsterdam")),
+    )
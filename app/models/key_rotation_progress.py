@@ -0,0 +1,20 @@
+from sqlalchemy import BigInteger, Column, DateTime, String
+from sqlalchemy.dialects.postgresql import UUID
+from app.models.base import Base
+
+
+class KeyRotationProgress(Base):
+    """Checkpoint of the re-encryption of participants to a key version.
+
+    Participants are processed in id order, so the last processed id is
+    enough to resume an interrupted rotation.
+    """
+    __tablename__ = "key_rotation_progress"
+
+    key_id = Column(String(16), primary_key=True)
+    last_participant_id = Column(UUID(as_uuid=True), nullable=True)
+    scanned_count = Column(BigInteger, nullable=False, default=0)
+    rotated_count = Column(BigInteger, nullable=False, default=0)
+    started_at = Column(DateTime(timezone=True), nullable=False)
+    updated_at = Column(DateTime(timezone=True), nullable=False)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
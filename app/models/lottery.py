@@ -1,6 +1,6 @@
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, Date, DateTime
+from sqlalchemy import Column, Date, DateTime, SmallInteger
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from zoneinfo import ZoneInfo
@@ -11,11 +11,13 @@ class Lottery(Base):
     __tablename__ = "lottery"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    draw_date = Column(Date, nullable=False, index=True)
+    draw_date = Column(Date, nullable=False, unique=True, index=True)
     created_at = Column(
         DateTime(timezone=True),
         default=lambda: datetime.now(ZoneInfo("Europe/Amsterdam")),
     )
+    # Number of winning ballots drawn, fewer if the lottery has fewer ballots
+    winner_count = Column(SmallInteger, nullable=False, default=1, server_default="1")
     ballots = relationship(
         "Ballot",
         back_populates="lottery",
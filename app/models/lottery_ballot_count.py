@@ -0,0 +1,21 @@
+from sqlalchemy import BigInteger, Column, ForeignKey, SmallInteger
+from sqlalchemy.dialects.postgresql import UUID
+from app.models.base import Base
+
+
+class LotteryBallotCount(Base):
+    """Number of ballots of a lottery, split over a few shard rows.
+
+    Submissions increment a random shard so concurrent writers for the same
+    lottery rarely wait on each other's row lock. The lottery's ballot count
+    is the sum of its shards.
+    """
+    __tablename__ = "lottery_ballot_count"
+
+    lottery_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("lottery.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    shard = Column(SmallInteger, primary_key=True)
+    ballot_count = Column(BigInteger, nullable=False, default=0)
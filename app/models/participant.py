@@ -1,9 +1,14 @@
-from sqlalchemy import Column, String, UUID
+from sqlalchemy import Column, LargeBinary, String, UUID, select
 from sqlalchemy.orm import relationship
 import uuid
 from app.models.base import Base
-from app.core.security import create_encrypted_and_hashed_versions_of_data, decrypt_data, hash_for_search
-from typing import Optional
+from app.core.security import (
+    create_encrypted_and_hashed_versions_of_data,
+    decrypt_data,
+    decrypt_many,
+    search_hashes,
+)
+from typing import Iterable, Optional
 
 
 class Participant(Base):
@@ -14,8 +19,9 @@ class Participant(Base):
     __tablename__ = "participant"
 
     id = Column(UUID(as_uuid=True), default=uuid.uuid4, primary_key=True)
-    email = Column(String(512), nullable=False)  # Encrypted email
-    email_hash = Column(String(64), nullable=False, unique=True)  # For searching
+    email = Column(LargeBinary, nullable=False)  # Encrypted email, raw Fernet token
+    # For searching, tagged with the key version's id (see SensitiveDataProtection)
+    email_hash = Column(String(96), nullable=False, unique=True)
     alias = Column(String(255), nullable=False, unique=True) 
 
     ballots = relationship(
@@ -46,10 +52,26 @@ class Participant(Base):
         """
         return decrypt_data(self.email)
 
+    @staticmethod
+    def decrypt_emails(participants: Iterable['Participant']) -> list[str]:
+        """Decrypt the email addresses of many participants in one batch.
+
+        Raises:
+            ValueError: If an email cannot be decrypted
+        """
+        return decrypt_many([participant.email for participant in participants])
+
     @classmethod
     def find_by_email(cls, session, email: str) -> Optional['Participant']:
-        email_hash = hash_for_search(email)
-        return session.query(cls).filter(cls.email_hash == email_hash).first()
+        # The row may still be hashed with an older key version
+        return session.query(cls).filter(cls.email_hash.in_(search_hashes(email))).first()
+
+    @classmethod
+    async def find_by_email_async(cls, session, email: str) -> Optional['Participant']:
+        result = await session.execute(
+            select(cls).filter(cls.email_hash.in_(search_hashes(email))).limit(1)
+        )
+        return result.scalars().first()
 
     def __repr__(self):
         return f"<Participant(alias={self.alias})>"
@@ -1,33 +1,63 @@
 import uuid
-from sqlalchemy import Column, ForeignKey
+from sqlalchemy import Column, Date, DateTime, ForeignKey, Index, SmallInteger, String
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from app.models.base import Base
-from datetime import datetime, date
+from datetime import date
 
 
 class WinningBallot(Base):
+    """A drawn ballot.
+
+    There is no foreign key to ballot: ballot is partitioned by draw date and old
+    partitions get detached, while winning ballots are kept. The ballot's draw
+    date, participant and creation time are copied here so winners stay
+    available once their ballot has been archived. The participant's alias is
+    copied too (aliases never change), so lookups by draw date or participant
+    read this table only.
+    """
     __tablename__ = "winning_ballot"
+    __table_args__ = (
+        # A lottery's winning ballots in rank order, a rank is only drawn once
+        Index("ix_winning_ballot_draw_date_rank", "draw_date", "rank", unique=True),
+        # A participant's winning history, in the (draw date, ballot id) order
+        # of its pages
+        Index(
+            "ix_winning_ballot_participant_id_draw_date_ballot_id",
+            "participant_id",
+            "draw_date",
+            "ballot_id",
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
     ballot_id = Column(
         UUID(as_uuid=True),
-        ForeignKey("ballot.id", ondelete="CASCADE"),
         nullable=False,
         unique=True,  # Setting unique True for ballot since a ballot can only win once
     )
-
-    ballot = relationship("Ballot", back_populates="winning_entry")
+    draw_date = Column(Date, nullable=False)
+    # Position among the lottery's winning ballots, starting at 1
+    rank = Column(SmallInteger, nullable=False)
+    participant_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("participant.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    ballot_created_at = Column(DateTime(timezone=True))
+    participant_alias = Column(String(255), nullable=False)
+
+    ballot = relationship(
+        "Ballot",
+        primaryjoin=(
+            "and_(foreign(WinningBallot.ballot_id) == Ballot.id, "
+            "foreign(WinningBallot.draw_date) == Ballot.draw_date)"
+        ),
+        back_populates="winning_entry",
+    )
+    participant = relationship("Participant")
 
     @property
     def lottery_draw_date(self) -> date:
-        return self.ballot.lottery.draw_date
-
-    @property
-    def ballot_created_at(self) -> datetime:
-        return self.ballot.created_at
-
-    @property
-    def participant_alias(self) -> str:
-        return self.ballot.participant.alias 
\ No newline at end of file
+        return self.draw_date
@@ -1,27 +1,38 @@
-from pydantic import BaseModel, EmailStr, field_validator
+from pydantic import BaseModel, EmailStr, Field, field_validator
 from datetime import date, timedelta, datetime
+from typing import Optional
 from uuid import UUID
 from zoneinfo import ZoneInfo
 from app.core.settings import settings
 
+# Ballot weights are stored as smallint
+MAX_BALLOT_WEIGHT = 32767
+
+
+def validate_draw_date_window(v: date) -> date:
+    """Check that a draw date is today or within the allowed days ahead."""
+    today = datetime.now(ZoneInfo("Europe/Amsterdam")).date()
+
+    if v < today:
+        raise ValueError("Draw date cannot be in the past")
+    if v > today + timedelta(days=settings.LOTTERY_DRAW_DATE_MAX_DAYS_AHEAD):
+        raise ValueError(
+            f"Draw date cannot be more than {settings.LOTTERY_DRAW_DATE_MAX_DAYS_AHEAD} days in the future"
+        )
+
+    return v
+
 
 class SubmitBallotByLotteryDrawDateRequest(BaseModel):
     email: EmailStr
     draw_date: date
+    # Relative chance of winning, e.g. greater than 1 for bonus ballots
+    weight: int = Field(1, gt=0, le=MAX_BALLOT_WEIGHT)
 
     @field_validator("draw_date")
     @classmethod
     def validate_draw_date(cls, v: date) -> date:
-        today = datetime.now(ZoneInfo("Europe/Amsterdam")).date()
-
-        if v < today:
-            raise ValueError("Draw date cannot be in the past")
-        if v > today + timedelta(days=settings.LOTTERY_DRAW_DATE_MAX_DAYS_AHEAD):
-            raise ValueError(
-                f"Draw date cannot be more than {settings.LOTTERY_DRAW_DATE_MAX_DAYS_AHEAD} days in the future"
-            )
-
-        return v
+        return validate_draw_date_window(v)
 
 
 class SubmitBallotResponse(BaseModel):
@@ -29,3 +40,26 @@ class SubmitBallotResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+class SubmitBallotBatchItem(BaseModel):
+    # The draw date window is checked per item by BallotService.submit_batch,
+    # so one out-of-window item doesn't reject the whole batch
+    email: EmailStr
+    draw_date: date
+    weight: int = Field(1, gt=0, le=MAX_BALLOT_WEIGHT)
+
+
+class SubmitBallotBatchRequest(BaseModel):
+    ballots: list[SubmitBallotBatchItem] = Field(
+        ..., min_length=1, max_length=settings.BALLOT_BATCH_MAX_SIZE
+    )
+
+
+class SubmitBallotBatchItemResult(BaseModel):
+    index: int
+    ballot_id: Optional[UUID] = None
+    error: Optional[str] = None
+
+
+class SubmitBallotBatchResponse(BaseModel):
+    results: list[SubmitBallotBatchItemResult]
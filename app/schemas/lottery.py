@@ -1,6 +1,10 @@
-from datetime import date
+from datetime import date, datetime
 from uuid import UUID
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, field_validator
+from app.schemas.ballot import validate_draw_date_window
+
+# Winner counts are stored as smallint
+MAX_WINNER_COUNT = 32767
 
 
 # Lottery Management Schemas
@@ -8,6 +12,7 @@ class UpcomingLottery(BaseModel):
     lottery_id: UUID
     draw_date: date
     ballot_count: int
+    winner_count: int
 
     class Config:
         from_attributes = True
@@ -19,3 +24,55 @@ class UpcomingLotteriesResponse(BaseModel):
     class Config:
         from_attributes = True
 
+
+class SetLotteryWinnerCountRequest(BaseModel):
+    draw_date: date
+    winner_count: int = Field(..., ge=1, le=MAX_WINNER_COUNT)
+
+    @field_validator("draw_date")
+    @classmethod
+    def validate_draw_date(cls, v: date) -> date:
+        return validate_draw_date_window(v)
+
+
+class LotteryWinnerCountResponse(BaseModel):
+    lottery_id: UUID
+    draw_date: date
+    winner_count: int
+
+
+class DrawAuditResponse(BaseModel):
+    draw_date: date
+    lottery_id: UUID
+    algorithm: str
+    # Hex encoded
+    seed: str
+    ballot_digest: str
+    ballot_count: int
+    total_weight: int
+    winner_count: int
+    # In rank order
+    winning_ballot_ids: list[UUID]
+    drawn_at: datetime
+
+    @field_validator("seed", "ballot_digest", mode="before")
+    @classmethod
+    def hex_encode(cls, v):
+        return v.hex() if isinstance(v, bytes) else v
+
+    class Config:
+        from_attributes = True
+
+
+class DrawVerificationResponse(BaseModel):
+    audit: DrawAuditResponse
+    # Recomputed from the lottery's ballots and the audit's seed
+    ballot_digest: str
+    ballot_count: int
+    total_weight: int
+    winning_ballot_ids: list[UUID]
+    # The ballots are the ones the draw was made over
+    ballots_match: bool
+    # The recomputed winners are the audited and the stored winning ballots
+    winners_match: bool
+    verified: bool
@@ -1,4 +1,5 @@
 from datetime import date, timedelta, datetime
+from typing import Optional
 from uuid import UUID
 from zoneinfo import ZoneInfo
 from pydantic import BaseModel, field_validator
@@ -20,19 +21,29 @@ class WinningBallotResponse(BaseModel):
     lottery_draw_date: date
     ballot_created_at: datetime
     participant_alias: str
+    # Position among the lottery's winning ballots, starting at 1
+    rank: int
 
     class Config:
         from_attributes = True
 
 
+class LotteryWinningBallotsResponse(BaseModel):
+    # In rank order
+    winning_ballots: list[WinningBallotResponse]
+
+
 class ParticipantWinningBallot(BaseModel):
     ballot_id: UUID
     ballot_created_at: datetime
     lottery_draw_date: date
+    rank: int
 
     class Config:
         from_attributes = True
 
 
 class ParticipantWinningBallotsResponse(BaseModel):
-    winning_ballots: list[ParticipantWinningBallot]
\ No newline at end of file
+    winning_ballots: list[ParticipantWinningBallot]
+    # Pass as cursor to get the next page, None on the last page
+    next_cursor: Optional[str] = None
\ No newline at end of file
@@ -0,0 +1,78 @@
+import os
+import threading
+from typing import Optional
+from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.core.settings import settings
+from app.crud.participant_crud import ParticipantCRUD
+from app.utils.alias_utils import alias_from_index, derive_alias_key
+
+# Must match the INCREMENT BY of participant_alias_block_seq, each nextval
+# reserves the indexes [value, value + ALIAS_BLOCK_SIZE) for one process
+ALIAS_BLOCK_SIZE = 1000
+
+
+class AliasAllocator:
+    """Hands out collision-free participant aliases without checking the database.
+
+    Indexes are reserved in blocks from a Postgres sequence (one nextval per
+    ALIAS_BLOCK_SIZE aliases) and turned into aliases with a keyed permutation,
+    so two calls never return the same alias, across processes as well.
+    Indexes left in a block when the process exits are simply never used.
+    A forked process starts without a block, see reset_after_fork.
+    """
+
+    def __init__(self, key: bytes):
+        self._key = key
+        self._lock = threading.Lock()
+        self._next_index = 0
+        self._block_end = 0
+
+    def reset_after_fork(self) -> None:
+        """Drop the block inherited from the parent process.
+
+        The parent keeps handing out the rest of its block, a child using it
+        as well would return the same aliases. The lock is replaced too, it
+        may have been held by another of the parent's threads.
+        """
+        self._lock = threading.Lock()
+        self._next_index = 0
+        self._block_end = 0
+
+    def _take_index(self) -> Optional[int]:
+        with self._lock:
+            if self._next_index < self._block_end:
+                index = self._next_index
+                self._next_index += 1
+                return index
+            return None
+
+    def _add_block(self, block_start: int) -> None:
+        with self._lock:
+            # Another caller may have refilled while the block was reserved,
+            # in that case the extra block is dropped
+            if self._next_index >= self._block_end:
+                self._next_index = block_start
+                self._block_end = block_start + ALIAS_BLOCK_SIZE
+
+    def next_alias(self, db: Session) -> str:
+        index = self._take_index()
+        while index is None:
+            self._add_block(ParticipantCRUD.reserve_alias_block(db=db))
+            index = self._take_index()
+        return alias_from_index(index, self._key)
+
+    async def next_alias_async(self, db: AsyncSession) -> str:
+        index = self._take_index()
+        while index is None:
+            self._add_block(await ParticipantCRUD.reserve_alias_block_async(db=db))
+            index = self._take_index()
+        return alias_from_index(index, self._key)
+
+    def next_aliases(self, db: Session, count: int) -> list[str]:
+        return [self.next_alias(db=db) for _ in range(count)]
+
+
+# Create a singleton instance
+alias_allocator = AliasAllocator(key=derive_alias_key(settings.ALIAS_PERMUTATION_KEY))
+os.register_at_fork(after_in_child=alias_allocator.reset_after_fork)
@@ -0,0 +1,184 @@
+"""Redis stream of submitted ballots waiting to be written to the database."""
+
+import time
+from datetime import date
+from typing import Optional
+from uuid import UUID
+import redis
+import redis.asyncio as redis_asyncio
+from app.core.settings import settings
+
+# Append a ballot unless its draw date has been closed, and count it as
+# pending for its draw date, atomically
+ENQUEUE_SCRIPT = """
+if redis.call('SISMEMBER', KEYS[3], ARGV[1]) == 1 then
+    return 0
+end
+redis.call('XADD', KEYS[1], '*', 'ballot_id', ARGV[2], 'email', ARGV[3], 'draw_date', ARGV[1], 'weight', ARGV[4])
+redis.call('HINCRBY', KEYS[2], ARGV[1], 1)
+return 1
+"""
+
+# Acknowledge and delete messages, and uncount the acknowledged ones from the
+# pending counts of their draw dates, ARGV holding (message id, draw date)
+# pairs. A message already acknowledged, e.g. by a consumer it was claimed
+# from, isn't uncounted twice.
+ACKNOWLEDGE_SCRIPT = """
+for i = 1, #ARGV, 2 do
+    if redis.call('XACK', KEYS[1], KEYS[2], ARGV[i]) == 1 then
+        redis.call('HINCRBY', KEYS[3], ARGV[i + 1], -1)
+    end
+    redis.call('XDEL', KEYS[1], ARGV[i])
+end
+return 1
+"""
+
+QueuedBallot = tuple[bytes, UUID, bytes, date, int]
+
+
+class BallotIngestionQueue:
+    """Queue of ballots accepted by the API but not written yet.
+
+    Ballots are appended to a Redis stream, read by the ingestion consumers
+    through a consumer group and acknowledged once written. A hash counts the
+    pending ballots per draw date, so the draw can wait until its draw date
+    has no pending ballot left. Closing a draw date first makes sure no new
+    ballots are accepted for it meanwhile.
+
+    Emails are queued encrypted, see SensitiveDataProtection.
+    """
+
+    def __init__(self, redis_url: str, stream: str):
+        self.redis_url = redis_url
+        self.stream = stream
+        self.group = f"{stream}:consumers"
+        self.pending_key = f"{stream}:pending"
+        self.closed_key = f"{stream}:closed"
+        self.dead_letter_stream = f"{stream}:dead"
+        self._redis: Optional[redis.Redis] = None
+        self._redis_async: Optional[redis_asyncio.Redis] = None
+        self._enqueue_script_async = None
+        self._acknowledge_script = None
+
+    @property
+    def redis(self) -> redis.Redis:
+        if self._redis is None:
+            self._redis = redis.Redis.from_url(self.redis_url)
+            self._acknowledge_script = self._redis.register_script(ACKNOWLEDGE_SCRIPT)
+        return self._redis
+
+    @property
+    def redis_async(self) -> redis_asyncio.Redis:
+        if self._redis_async is None:
+            self._redis_async = redis_asyncio.Redis.from_url(self.redis_url)
+            self._enqueue_script_async = self._redis_async.register_script(ENQUEUE_SCRIPT)
+        return self._redis_async
+
+    async def enqueue_async(
+        self, ballot_id: UUID, encrypted_email: bytes, draw_date: date, weight: int = 1
+    ) -> bool:
+        """Append a ballot to the queue.
+
+        Returns:
+            False if the draw date is closed and the ballot wasn't queued
+        """
+        client = self.redis_async
+        accepted = await self._enqueue_script_async(
+            keys=[self.stream, self.pending_key, self.closed_key],
+            args=[draw_date.isoformat(), str(ballot_id), encrypted_email, weight],
+            client=client,
+        )
+        return bool(accepted)
+
+    def close_draw_date(self, draw_date: date) -> None:
+        self.redis.sadd(self.closed_key, draw_date.isoformat())
+
+    def pending_count(self, draw_date: date) -> int:
+        return int(self.redis.hget(self.pending_key, draw_date.isoformat()) or 0)
+
+    def wait_until_drained(self, draw_date: date, timeout: float, poll_interval: float = 0.5) -> bool:
+        """Wait until no ballot of the draw date is pending.
+
+        Returns:
+            False if ballots were still pending after the timeout
+        """
+        deadline = time.monotonic() + timeout
+        while self.pending_count(draw_date) > 0:
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(poll_interval)
+        self.redis.hdel(self.pending_key, draw_date.isoformat())
+        return True
+
+    def ensure_group(self) -> None:
+        try:
+            self.redis.xgroup_create(self.stream, self.group, id="0", mkstream=True)
+        except redis.ResponseError as e:
+            if "BUSYGROUP" not in str(e):
+                raise
+
+    def read(self, consumer: str, count: int, block_ms: int) -> list[QueuedBallot]:
+        """Read a batch of queued ballots for a consumer.
+
+        Ballots read by another consumer that didn't acknowledge them within
+        BALLOT_INGESTION_CLAIM_IDLE_SECONDS (e.g. it crashed) are taken over
+        first, then new ballots are read, blocking up to block_ms for them.
+
+        Returns:
+            (message id, ballot id, encrypted email, draw date, weight) tuples
+        """
+        _, messages, *_ = self.redis.xautoclaim(
+            self.stream,
+            self.group,
+            consumer,
+            min_idle_time=int(settings.BALLOT_INGESTION_CLAIM_IDLE_SECONDS * 1000),
+            start_id="0-0",
+            count=count,
+        )
+        messages = [message for message in messages if message and message[1]]
+        if not messages:
+            response = self.redis.xreadgroup(
+                self.group, consumer, {self.stream: ">"}, count=count, block=block_ms
+            )
+            messages = response[0][1] if response else []
+        return [
+            (
+                message_id,
+                UUID(fields[b"ballot_id"].decode()),
+                fields[b"email"],
+                date.fromisoformat(fields[b"draw_date"].decode()),
+                # Ballots queued before weights were queued weigh 1
+                int(fields.get(b"weight", 1)),
+            )
+            for message_id, fields in messages
+        ]
+
+    def acknowledge(self, ballots: list[QueuedBallot]) -> None:
+        """Remove written ballots from the queue and from the pending counts, atomically."""
+        if not ballots:
+            return
+        client = self.redis
+        args = []
+        for message_id, _, _, draw_date, _ in ballots:
+            args.extend((message_id, draw_date.isoformat()))
+        self._acknowledge_script(keys=[self.stream, self.group, self.pending_key], args=args, client=client)
+
+    def dead_letter(self, ballot: QueuedBallot, error: str) -> None:
+        """Move a ballot that can't be written to the dead letter stream."""
+        _, ballot_id, encrypted_email, draw_date, weight = ballot
+        self.redis.xadd(
+            self.dead_letter_stream,
+            {
+                "ballot_id": str(ballot_id),
+                "email": encrypted_email,
+                "draw_date": draw_date.isoformat(),
+                "weight": weight,
+                "error": error,
+            },
+        )
+        self.acknowledge([ballot])
+
+
+ballot_ingestion_queue = BallotIngestionQueue(
+    redis_url=settings.REDIS_INGESTION_URL, stream=settings.BALLOT_INGESTION_STREAM
+)
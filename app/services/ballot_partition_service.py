@@ -0,0 +1,93 @@
+from sqlalchemy.orm import Session
+from datetime import date, datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+from app.crud.ballot_partition_crud import BallotPartitionCRUD
+from app.crud.winning_ballot_crud import WinningBallotCRUD
+from app.core.logging import logger
+from app.core.settings import settings
+
+
+class BallotPartitionService:
+    """Maintenance of the ballot table's daily partitions.
+
+    Ballots are only written for draw dates inside the submission window, so
+    partitions are created a few days ahead of it. Partitions older than the
+    retention period are detached and moved to the archive schema, where they
+    can be dumped or dropped without touching the live table.
+    """
+
+    @staticmethod
+    def create_upcoming_partitions(db: Session, today: Optional[date] = None) -> list[date]:
+        """Create the missing partitions from today until the end of the premake period.
+
+        Returns:
+            The draw dates of the created partitions
+        """
+        today = today or datetime.now(ZoneInfo("Europe/Amsterdam")).date()
+        last_draw_date = today + timedelta(
+            days=settings.LOTTERY_DRAW_DATE_MAX_DAYS_AHEAD + settings.BALLOT_PARTITION_PREMAKE_DAYS
+        )
+        existing_draw_dates = BallotPartitionCRUD.get_partitions(db=db)
+        db.commit()
+
+        created = []
+        draw_date = today
+        while draw_date <= last_draw_date:
+            if draw_date not in existing_draw_dates:
+                try:
+                    BallotPartitionCRUD.create_partition(db=db, draw_date=draw_date)
+                    db.commit()
+                    created.append(draw_date)
+                except Exception as e:
+                    logger.error(
+                        f"Error creating ballot partition for {draw_date}: {str(e)}", exc_info=True
+                    )
+                    db.rollback()
+            draw_date += timedelta(days=1)
+        return created
+
+    @staticmethod
+    def archive_expired_partitions(db: Session, today: Optional[date] = None) -> list[date]:
+        """Detach and archive the partitions older than the retention period.
+
+        A partition whose lottery has ballots but no winner yet is kept until
+        it has been drawn.
+
+        Returns:
+            The draw dates of the archived partitions
+        """
+        if settings.BALLOT_PARTITION_RETENTION_DAYS is None:
+            return []
+        today = today or datetime.now(ZoneInfo("Europe/Amsterdam")).date()
+        cutoff = today - timedelta(days=settings.BALLOT_PARTITION_RETENTION_DAYS)
+
+        partitions = BallotPartitionCRUD.get_partitions(db=db)
+        expired = []
+        for draw_date, detach_pending in sorted(partitions.items()):
+            if draw_date >= cutoff:
+                continue
+            if (
+                not detach_pending
+                and BallotPartitionCRUD.has_ballots(db=db, draw_date=draw_date)
+                and not WinningBallotCRUD.exists_by_draw_date(db=db, draw_date=draw_date)
+            ):
+                logger.warning(f"Not archiving ballot partition for {draw_date}, it has no winner yet")
+                continue
+            expired.append((draw_date, detach_pending))
+        db.commit()
+
+        archived = []
+        with db.get_bind().connect().execution_options(isolation_level="AUTOCOMMIT") as connection:
+            for draw_date, detach_pending in expired:
+                try:
+                    BallotPartitionCRUD.detach_partition(
+                        connection=connection, draw_date=draw_date, finalize=detach_pending
+                    )
+                    BallotPartitionCRUD.archive_partition(connection=connection, draw_date=draw_date)
+                    archived.append(draw_date)
+                except Exception as e:
+                    logger.error(
+                        f"Error archiving ballot partition for {draw_date}: {str(e)}", exc_info=True
+                    )
+        return archived
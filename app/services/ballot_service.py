@@ -1,13 +1,40 @@
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from datetime import date
+from collections import Counter
+from uuid import UUID
+import uuid
+import redis
 from app.models import Ballot
+from app.schemas.ballot import (
+    SubmitBallotBatchItem,
+    SubmitBallotBatchItemResult,
+    SubmitBallotBatchResponse,
+    validate_draw_date_window,
+)
 from app.services.participant_service import ParticipantService
 from app.services.lottery_service import LotteryService
 from app.crud.ballot_crud import BallotCRUD
-from app.exceptions.ballot import BallotSubmissionException
+from app.crud.lottery_ballot_count_crud import LotteryBallotCountCRUD
+from app.services.ballot_ingestion_queue import ballot_ingestion_queue
+from app.services.submission_limiter import submission_limiter
+from app.exceptions.ballot import (
+    BallotQuotaExceededException,
+    BallotSubmissionException,
+    LotteryClosedException,
+)
+from app.core.security import data_protection
+from app.core.settings import settings
 from app.core.logging import logger
 
 
+def _quota_exceeded_message(draw_date: date) -> str:
+    return (
+        f"Ballot quota of {settings.BALLOT_QUOTA_PER_PARTICIPANT} per participant "
+        f"exceeded for the lottery of {draw_date}."
+    )
+
+
 class BallotService:
     """Service handling ballot submission and management.
 
@@ -16,34 +43,258 @@ class BallotService:
     """
 
     @staticmethod
-    def submit_by_lottery_draw_date(db: Session, email: str, draw_date: date) -> Ballot:
+    def submit_by_lottery_draw_date(db: Session, email: str, draw_date: date, weight: int = 1) -> Ballot:
         """Submit a ballot for a lottery on a specific draw date.
 
         This method handles the complete ballot submission process:
         1. Gets or creates a participant for the given email
         2. Gets or creates a lottery for the given draw date
-        3. Creates a ballot linking the participant and lottery
+        3. Creates a ballot linking the participant and lottery, with the
+           given weight
+
+        Participant and lottery are each resolved with one race-free statement,
+        a new participant taking a lookup and an upsert, and the ballot is
+        written when the transaction commits, together with the lottery's
+        ballot counter increment.
+
+        The ballot is counted against the participant's quota before that, and
+        given back if it isn't written.
 
         Raises:
+            BallotQuotaExceededException: If the participant's quota for the
+                lottery is exhausted
             BallotSubmissionException: If there's an error during submission
         """
+        if not submission_limiter.acquire_quotas({(email, draw_date): 1})[(email, draw_date)]:
+            raise BallotQuotaExceededException(_quota_exceeded_message(draw_date))
         try:
             with db.begin():
                 # Get or create participant with email
-                participant = ParticipantService.get_or_create_participant(
+                participant_id = ParticipantService.get_or_create_participant_id(
                     db=db, email=email
                 )
 
                 # Get or create lottery with draw date
-                lottery = LotteryService.get_or_create_lottery_by_draw_date(
+                lottery_id = LotteryService.get_or_create_lottery_id_by_draw_date(
                     db=db, draw_date=draw_date
                 )
 
                 # Create ballot
                 ballot = BallotCRUD.create(
-                    db=db, participant_id=participant.id, lottery_id=lottery.id
+                    db=db,
+                    participant_id=participant_id,
+                    lottery_id=lottery_id,
+                    draw_date=draw_date,
+                    weight=weight,
+                    flush=False,
                 )
+                LotteryBallotCountCRUD.increment(db=db, counts={lottery_id: 1})
                 return ballot
         except Exception as e:
+            submission_limiter.release_quotas({(email, draw_date): 1})
             logger.error(f"Error submitting ballot: {str(e)}", exc_info=True)
             raise BallotSubmissionException("Error submitting ballot.") from e
+
+    @staticmethod
+    def submit_batch(
+        db: Session, ballots: list[SubmitBallotBatchItem]
+    ) -> SubmitBallotBatchResponse:
+        """Submit many ballots using set-based statements.
+
+        Items with a draw date outside the allowed window, or beyond their
+        participant's quota for the lottery, get an error in their result, the
+        others are written in a single transaction:
+        1. Resolves all participants at once, creating the missing ones in bulk
+        2. Resolves all lotteries at once, creating the missing ones in bulk
+        3. Inserts all ballots with multi-row INSERT ... RETURNING statements
+        4. Adds the new ballots to the lotteries' counters in one statement
+
+        Raises:
+            BallotSubmissionException: If there's an error while writing the batch
+        """
+        results = [SubmitBallotBatchItemResult(index=index) for index in range(len(ballots))]
+        valid_indexes = []
+        for index, item in enumerate(ballots):
+            try:
+                validate_draw_date_window(item.draw_date)
+            except ValueError as e:
+                results[index].error = str(e)
+            else:
+                valid_indexes.append(index)
+
+        # Quotas are acquired per participant and lottery, the first items of
+        # each within its quota are accepted
+        requested = Counter((ballots[index].email, ballots[index].draw_date) for index in valid_indexes)
+        remaining = submission_limiter.acquire_quotas(requested)
+        acquired = dict(remaining)
+        within_quota_indexes = []
+        for index in valid_indexes:
+            participant_draw_date = (ballots[index].email, ballots[index].draw_date)
+            if remaining[participant_draw_date]:
+                remaining[participant_draw_date] -= 1
+                within_quota_indexes.append(index)
+            else:
+                results[index].error = _quota_exceeded_message(ballots[index].draw_date)
+        valid_indexes = within_quota_indexes
+
+        if not valid_indexes:
+            return SubmitBallotBatchResponse(results=results)
+
+        try:
+            with db.begin():
+                participant_ids = ParticipantService.get_or_create_participant_ids(
+                    db=db, emails=[ballots[index].email for index in valid_indexes]
+                )
+                lottery_ids = LotteryService.get_or_create_lottery_ids(
+                    db=db, draw_dates=[ballots[index].draw_date for index in valid_indexes]
+                )
+                new_ballots = [
+                    (
+                        participant_ids[ballots[index].email],
+                        lottery_ids[ballots[index].draw_date],
+                        ballots[index].draw_date,
+                        ballots[index].weight,
+                    )
+                    for index in valid_indexes
+                ]
+                ballot_ids = BallotCRUD.bulk_create(db=db, ballots=new_ballots)
+                LotteryBallotCountCRUD.increment(
+                    db=db,
+                    counts=Counter(lottery_id for _, lottery_id, _, _ in new_ballots),
+                )
+        except Exception as e:
+            submission_limiter.release_quotas(acquired)
+            logger.error(f"Error submitting ballot batch: {str(e)}", exc_info=True)
+            raise BallotSubmissionException("Error submitting ballot batch.") from e
+
+        for index, ballot_id in zip(valid_indexes, ballot_ids):
+            results[index].ballot_id = ballot_id
+        return SubmitBallotBatchResponse(results=results)
+
+    @staticmethod
+    async def submit_by_lottery_draw_date_async(
+        db: AsyncSession, email: str, draw_date: date, weight: int = 1
+    ) -> Ballot:
+        """Async variant of submit_by_lottery_draw_date.
+
+        Raises:
+            BallotQuotaExceededException: If the participant's quota for the
+                lottery is exhausted
+            BallotSubmissionException: If there's an error during submission
+        """
+        if not await submission_limiter.acquire_quota_async(email=email, draw_date=draw_date):
+            raise BallotQuotaExceededException(_quota_exceeded_message(draw_date))
+        try:
+            async with db.begin():
+                participant_id = await ParticipantService.get_or_create_participant_id_async(
+                    db=db, email=email
+                )
+                lottery_id = await LotteryService.get_or_create_lottery_id_by_draw_date_async(
+                    db=db, draw_date=draw_date
+                )
+                ballot = await BallotCRUD.create_async(
+                    db=db,
+                    participant_id=participant_id,
+                    lottery_id=lottery_id,
+                    draw_date=draw_date,
+                    weight=weight,
+                    flush=False,
+                )
+                await LotteryBallotCountCRUD.increment_async(db=db, counts={lottery_id: 1})
+                return ballot
+        except Exception as e:
+            await submission_limiter.release_quota_async(email=email, draw_date=draw_date)
+            logger.error(f"Error submitting ballot: {str(e)}", exc_info=True)
+            raise BallotSubmissionException("Error submitting ballot.") from e
+
+    @staticmethod
+    async def enqueue_by_lottery_draw_date_async(email: str, draw_date: date, weight: int = 1) -> UUID:
+        """Queue a ballot to be written by the ingestion consumer.
+
+        The ballot id is assigned here, so it can be returned right away.
+
+        Raises:
+            BallotQuotaExceededException: If the participant's quota for the
+                lottery is exhausted
+            LotteryClosedException: If the draw date's lottery is being drawn
+            BallotSubmissionException: If the ballot couldn't be queued
+        """
+        if not await submission_limiter.acquire_quota_async(email=email, draw_date=draw_date):
+            raise BallotQuotaExceededException(_quota_exceeded_message(draw_date))
+        ballot_id = uuid.uuid4()
+        try:
+            accepted = await ballot_ingestion_queue.enqueue_async(
+                ballot_id=ballot_id,
+                encrypted_email=data_protection.encrypt(email),
+                draw_date=draw_date,
+                weight=weight,
+            )
+        except redis.RedisError as e:
+            await submission_limiter.release_quota_async(email=email, draw_date=draw_date)
+            logger.error(f"Error queueing ballot: {str(e)}", exc_info=True)
+            raise BallotSubmissionException("Error submitting ballot.") from e
+        if not accepted:
+            await submission_limiter.release_quota_async(email=email, draw_date=draw_date)
+            raise LotteryClosedException(f"The lottery of {draw_date} is closed.")
+        return ballot_id
+
+    @staticmethod
+    def ingest_batch(db: Session, ballots: list[tuple[UUID, str, date, int]]) -> int:
+        """Write queued ballots, given as (ballot id, email, draw date, weight), in one transaction.
+
+        Ballots that were already written are skipped, so a batch can safely be
+        written again after a consumer failed to acknowledge it. The draw date
+        window isn't checked again, the ballots were accepted when queued.
+
+        Returns:
+            The number of ballots inserted
+
+        Raises:
+            BallotSubmissionException: If there's an error while writing the batch
+        """
+        try:
+            with db.begin():
+                participant_ids = ParticipantService.get_or_create_participant_ids(
+                    db=db, emails=[email for _, email, _, _ in ballots]
+                )
+                lottery_ids = LotteryService.get_or_create_lottery_ids(
+                    db=db, draw_dates=[draw_date for _, _, draw_date, _ in ballots]
+                )
+                inserted = BallotCRUD.bulk_create_with_ids(
+                    db=db,
+                    ballots=[
+                        (ballot_id, participant_ids[email], lottery_ids[draw_date], draw_date, weight)
+                        for ballot_id, email, draw_date, weight in ballots
+                    ],
+                )
+                LotteryBallotCountCRUD.increment(
+                    db=db, counts=Counter(lottery_id for _, lottery_id in inserted)
+                )
+                return len(inserted)
+        except Exception as e:
+            logger.error(f"Error ingesting ballot batch: {str(e)}", exc_info=True)
+            raise BallotSubmissionException("Error ingesting ballot batch.") from e
+
+    @staticmethod
+    def wait_for_queued_ballots(draw_date: date) -> bool:
+        """Close a draw date to new queued ballots and wait until its queued ones are written.
+
+        Does nothing unless BALLOT_INGESTION_MODE is "queue".
+
+        Returns:
+            False if queued ballots were still pending after
+            BALLOT_INGESTION_DRAIN_TIMEOUT_SECONDS
+        """
+        if settings.BALLOT_INGESTION_MODE != "queue":
+            return True
+        ballot_ingestion_queue.close_draw_date(draw_date)
+        drained = ballot_ingestion_queue.wait_until_drained(
+            draw_date=draw_date, timeout=settings.BALLOT_INGESTION_DRAIN_TIMEOUT_SECONDS
+        )
+        if not drained:
+            logger.warning(
+                f"{ballot_ingestion_queue.pending_count(draw_date)} queued ballots of "
+                f"{draw_date} still pending after waiting "
+                f"{settings.BALLOT_INGESTION_DRAIN_TIMEOUT_SECONDS} seconds"
+            )
+        return drained
@@ -0,0 +1,174 @@
+"""Weighted selection of a lottery's winners, without replacement.
+
+Winners are drawn in a single pass over a stream of (ballot id, weight)
+entries with the A-ExpJ weighted reservoir sampling algorithm of Efraimidis
+and Spirakis. Each entry gets the key u ** (1 / weight) for a uniform u, and
+the k entries with the largest keys win, ranked by key. Rather than drawing a
+key for every entry, the algorithm draws how much weight to skip until an
+entry enters the reservoir, so random numbers are only drawn for the
+O(k log(n / k)) entries that do. Memory is O(k) whatever the ballot count.
+
+Keys are kept as their logarithm, ln(u) / weight, which doesn't underflow
+for large weights.
+
+Draws are reproducible: the uniform numbers come from DrawRandom, a keyed
+pseudorandom function of a secret seed, and the entries are streamed in
+ballot id order, so the same seed and ballots always give the same winners.
+BallotSetDigest commits to the ballots in the same pass, so anyone holding
+the seed can check that a draw was made over a given ballot set.
+"""
+import hashlib
+import hmac
+import heapq
+import math
+import random
+from operator import itemgetter
+from typing import Generic, Iterable, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+# Identifies the sampling algorithm, PRF and digest format of a draw, so
+# draws stay verifiable if any of them changes
+DRAW_ALGORITHM = "a-expj/hmac-sha256/v1"
+DRAW_SEED_BYTES = 32
+
+
+class DrawRandom(random.Random):
+    """Uniform numbers from HMAC-SHA256(seed, counter), deterministic for a seed.
+
+    The seed should come from a CSPRNG (secrets.token_bytes), the numbers
+    can't be predicted without it.
+    """
+
+    def __init__(self, seed: bytes):
+        super().__init__(seed)
+
+    def seed(self, a: Optional[bytes] = None, version: int = 2) -> None:
+        self._key = a
+        self._counter = 0
+
+    def _next_block(self) -> bytes:
+        block = hmac.new(self._key, self._counter.to_bytes(8, "big"), hashlib.sha256).digest()
+        self._counter += 1
+        return block
+
+    def random(self) -> float:
+        """A multiple of 2 ** -53 in [0, 1), like random.random."""
+        return (int.from_bytes(self._next_block()[:7], "big") >> 3) * 2.0 ** -53
+
+    def getrandbits(self, k: int) -> int:
+        blocks = b"".join(self._next_block() for _ in range((k + 255) // 256))
+        return int.from_bytes(blocks, "big") >> (len(blocks) * 8 - k)
+
+    def getstate(self):
+        return self._key, self._counter
+
+    def setstate(self, state) -> None:
+        self._key, self._counter = state
+
+
+class BallotSetDigest:
+    """SHA-256 commitment to a stream of (ballot id, weight) entries, with their count and total weight.
+
+    Entries are hashed as "id,weight\\n" lines, so the digest of a lottery can
+    be recomputed from an export of its ballots in id order.
+    """
+
+    def __init__(self):
+        self._hash = hashlib.sha256()
+        self.ballot_count = 0
+        self.total_weight = 0
+
+    def update(self, entries: Sequence[tuple[str, int]]) -> None:
+        self._hash.update("".join([f"{ballot_id},{weight}\n" for ballot_id, weight in entries]).encode())
+        self.ballot_count += len(entries)
+        self.total_weight += sum(map(itemgetter(1), entries))
+
+    def digest(self) -> bytes:
+        return self._hash.digest()
+
+
+def _log_uniform(rng: random.Random) -> float:
+    """ln(u) for u uniform in (0, 1]."""
+    return math.log(1.0 - rng.random())
+
+
+class WeightedReservoir(Generic[T]):
+    """Select k entries with probabilities proportional to their weights, a batch at a time.
+
+    Weights must not be negative, entries with a weight of 0 never get
+    selected.
+    """
+
+    def __init__(self, k: int, rng: random.Random = random):
+        self.k = k
+        self.rng = rng
+        # Min-heap of (log key, sequence number, item), the sequence number
+        # keeping items from ever being compared
+        self._reservoir: list[tuple[float, int, T]] = []
+        self._sequence = 0
+        # Weight still to skip before the next entry enters the reservoir
+        self._skip = 0.0
+
+    def add(self, entries: Iterable[tuple[T, int]]) -> None:
+        if self.k <= 0:
+            return
+        reservoir, rng = self._reservoir, self.rng
+        entries = iter(entries)
+        if len(reservoir) < self.k:
+            for item, weight in entries:
+                if weight > 0:
+                    reservoir.append((_log_uniform(rng) / weight, self._sequence, item))
+                    self._sequence += 1
+                    if len(reservoir) == self.k:
+                        heapq.heapify(reservoir)
+                        self._skip = self._next_skip()
+                        break
+        skip = self._skip
+        for item, weight in entries:
+            skip -= weight
+            if skip > 0 or not weight:
+                continue
+            # The entry's key is drawn conditioned on it beating the smallest
+            # key of the reservoir, u uniform in (threshold ** weight, 1]
+            threshold = math.exp(reservoir[0][0] * weight)
+            log_key = math.log(threshold + (1.0 - threshold) * (1.0 - rng.random())) / weight
+            heapq.heapreplace(reservoir, (log_key, self._sequence, item))
+            self._sequence += 1
+            skip = self._next_skip()
+        self._skip = skip
+
+    def _next_skip(self) -> float:
+        """Draw the weight to skip before an entry beats the smallest key of the reservoir."""
+        log_threshold = self._reservoir[0][0]
+        if log_threshold == 0.0:
+            # Keys can't exceed 1, nothing beats the reservoir anymore
+            return math.inf
+        return _log_uniform(self.rng) / log_threshold
+
+    def winners(self) -> list[T]:
+        """The selected items, the first one ranking first.
+
+        Fewer than k if fewer than k entries with a positive weight were added.
+        """
+        return [item for _, _, item in sorted(self._reservoir, reverse=True)]
+
+
+def weighted_sample(
+    batches: Iterable[Iterable[tuple[T, int]]], k: int, rng: random.Random = random
+) -> list[T]:
+    """Select k entries with probabilities proportional to their weights.
+
+    Args:
+        batches: Batches of (item, weight) entries, e.g. the partitions of a
+            streamed query result
+        k: Number of entries to select
+        rng: Source of the uniform random numbers
+
+    Returns:
+        The selected items, see WeightedReservoir.winners
+    """
+    reservoir = WeightedReservoir[T](k=k, rng=rng)
+    for batch in batches:
+        reservoir.add(batch)
+    return reservoir.winners()
@@ -0,0 +1,96 @@
+import time
+from datetime import datetime
+from typing import Callable, Optional
+from zoneinfo import ZoneInfo
+from sqlalchemy.orm import Session
+from app.core.logging import logger
+from app.core.security import data_protection, create_encrypted_and_hashed_versions_of_many
+from app.core.settings import settings
+from app.crud.key_rotation_progress_crud import KeyRotationProgressCRUD
+from app.crud.participant_crud import ParticipantCRUD
+from app.models import KeyRotationProgress
+
+
+class KeyRotationService:
+    """Online re-encryption of participant emails to the newest key version.
+
+    Participants are walked in id order, in chunks of KEY_ROTATION_CHUNK_SIZE.
+    Each chunk's stale rows are decrypted, encrypted and hashed again with the
+    newest key version and written in the same transaction as the
+    checkpoint, so an interrupted rotation resumes after the last committed
+    chunk and concurrent runs share the work. Lookups match every key version meanwhile, see
+    SensitiveDataProtection.
+
+    Start a rotation once every process runs with the new key version, older
+    processes would keep writing the previous one.
+    """
+
+    @staticmethod
+    def rotate_participants(
+        db: Session,
+        on_progress: Optional[Callable[[KeyRotationProgress], None]] = None,
+    ) -> KeyRotationProgress:
+        """Re-encrypt the participants not on the newest key version yet.
+
+        Returns:
+            The rotation's progress, completed unless an error was raised
+        """
+        key_id = data_protection.current_key_id
+        progress = KeyRotationProgressCRUD.get_or_create(db=db, key_id=key_id)
+        db.commit()
+        if progress.completed_at is not None:
+            return progress
+
+        logger.info(
+            f"Rotating participants to key version {key_id}, "
+            f"resuming after {progress.last_participant_id}"
+        )
+        while True:
+            # Holding the checkpoint's row lock for the chunk makes concurrent
+            # runs take turns instead of rotating the same rows
+            progress = KeyRotationProgressCRUD.get_by_key_id_for_update(db=db, key_id=key_id)
+            if progress.completed_at is not None:
+                db.commit()
+                break
+            rows = ParticipantCRUD.get_encrypted_emails_after(
+                db=db,
+                after_id=progress.last_participant_id,
+                limit=settings.KEY_ROTATION_CHUNK_SIZE,
+            )
+            now = datetime.now(ZoneInfo("Europe/Amsterdam"))
+            if not rows:
+                progress.completed_at = now
+                progress.updated_at = now
+                db.commit()
+                break
+
+            stale = [row for row in rows if not data_protection.is_current_hash(row[2])]
+            if stale:
+                emails = data_protection.decrypt_many([encrypted_email for _, encrypted_email, _ in stale])
+                encrypted_emails, email_hashes = create_encrypted_and_hashed_versions_of_many(emails)
+                ParticipantCRUD.update_encrypted_emails(
+                    db=db,
+                    rows=[
+                        (participant_id, expected_email_hash, encrypted_email, email_hash)
+                        for (participant_id, _, expected_email_hash), encrypted_email, email_hash in zip(
+                            stale, encrypted_emails, email_hashes
+                        )
+                    ],
+                )
+            progress.last_participant_id = rows[-1][0]
+            progress.scanned_count += len(rows)
+            progress.rotated_count += len(stale)
+            progress.updated_at = now
+            db.commit()
+
+            if on_progress:
+                on_progress(progress)
+            if settings.KEY_ROTATION_CHUNK_DELAY_SECONDS > 0:
+                # Leave room for the regular load
+                time.sleep(settings.KEY_ROTATION_CHUNK_DELAY_SECONDS)
+
+        logger.info(
+            f"Rotated {progress.rotated_count} of {progress.scanned_count} participants "
+            f"to key version {key_id}"
+        )
+        return progress
@@ -1,12 +1,51 @@
 from sqlalchemy.orm import Session
-import random
+from sqlalchemy.ext.asyncio import AsyncSession
+import secrets
+from uuid import UUID
+from typing import Optional
 from zoneinfo import ZoneInfo
 from datetime import date, datetime, timedelta
-from app.models import Lottery
+from app.models import Lottery, WinningBallot
 from app.crud.lottery_crud import LotteryCRUD
 from app.crud.ballot_crud import BallotCRUD
 from app.crud.winning_ballot_crud import WinningBallotCRUD
-from app.schemas.lottery import UpcomingLottery, UpcomingLotteriesResponse
+from app.crud.draw_audit_crud import DrawAuditCRUD
+from app.services.draw_selection import (
+    DRAW_ALGORITHM,
+    DRAW_SEED_BYTES,
+    BallotSetDigest,
+    DrawRandom,
+    WeightedReservoir,
+)
+from app.schemas.lottery import (
+    DrawAuditResponse,
+    DrawVerificationResponse,
+    LotteryWinnerCountResponse,
+    UpcomingLottery,
+    UpcomingLotteriesResponse,
+)
+from app.core.logging import logger
+from app.core.cache import LRUCache
+from app.core.metrics import draw_phase_duration_seconds, timed
+from app.core.settings import settings
+
+# An upsert only needs a second attempt after losing a race with a
+# concurrent insert, the extra attempt is just a safety margin
+UPSERT_MAX_ATTEMPTS = 3
+
+# The upcoming lotteries are the same for every caller, so the response is
+# reused for a short while instead of being rebuilt on each request
+upcoming_lotteries_cache = LRUCache[UpcomingLotteriesResponse](
+    max_size=1, ttl_seconds=settings.UPCOMING_LOTTERIES_CACHE_TTL_SECONDS
+)
+UPCOMING_LOTTERIES_CACHE_KEY = "upcoming"
+
+# A draw's ballots and winners don't change once it's made, so verifying it
+# again would only stream the same ballots again
+draw_verification_cache = LRUCache[DrawVerificationResponse](
+    max_size=settings.DRAW_VERIFICATION_CACHE_SIZE,
+    ttl_seconds=settings.DRAW_VERIFICATION_CACHE_TTL_SECONDS,
+)
 
 
 class LotteryService:
@@ -14,65 +53,298 @@ class LotteryService:
     """
 
     @staticmethod
-    def get_or_create_lottery_by_draw_date(db: Session, draw_date: date) -> Lottery:
-        lottery = LotteryCRUD.get_by_draw_date(db=db, draw_date=draw_date)
-        if not lottery:
-            lottery = LotteryCRUD.create(db=db, draw_date=draw_date)
-        return lottery
+    def get_or_create_lottery_id_by_draw_date(db: Session, draw_date: date) -> UUID:
+        """Get the id of the lottery for draw_date, creating it if needed.
+
+        An upsert attempt only comes back empty when another transaction created
+        the lottery after the statement started, so the retry will find it.
+        """
+        for _ in range(UPSERT_MAX_ATTEMPTS):
+            lottery_id = LotteryCRUD.upsert(db=db, draw_date=draw_date)
+            if lottery_id:
+                return lottery_id
+        raise ValueError(f"Could not get or create lottery for draw date {draw_date}")
 
     @staticmethod
-    def pick_today_winner(db: Session):
-        """Select a winner for the lottery.
+    async def get_or_create_lottery_id_by_draw_date_async(
+        db: AsyncSession, draw_date: date
+    ) -> UUID:
+        """Async variant of get_or_create_lottery_id_by_draw_date."""
+        for _ in range(UPSERT_MAX_ATTEMPTS):
+            lottery_id = await LotteryCRUD.upsert_async(db=db, draw_date=draw_date)
+            if lottery_id:
+                return lottery_id
+        raise ValueError(f"Could not get or create lottery for draw date {draw_date}")
 
-        This method selects a winner for either today's or yesterday's lottery based on the current hour:
-        - If current hour is 0 (midnight), selects yesterday's lottery
-        - Otherwise, selects today's lottery
+    @staticmethod
+    def get_or_create_lottery_ids(db: Session, draw_dates: list[date]) -> dict[date, UUID]:
+        """Resolve many draw dates to lottery ids, creating missing lotteries in bulk.
 
-        The method is called by a Celery task scheduled to run at midnight.
-        Even if the task runs slightly before or after midnight, the hour check ensures
-        we select the correct lottery.
+        Draw dates skipped by the insert were created by a concurrent
+        transaction and are picked up by a second lookup.
         """
-        now = datetime.now(ZoneInfo("Europe/Amsterdam"))
-        
-        # If it's midnight (hour 0), select yesterday's lottery
-        # Otherwise, select today's lottery
-        if now.hour == 0:
-            draw_date = now.date() - timedelta(days=1)
-        else:
-            draw_date = now.date()
-        
+        draw_dates = list(set(draw_dates))
+        lottery_ids = LotteryCRUD.get_ids_by_draw_dates(db=db, draw_dates=draw_dates)
+        lottery_ids.update(
+            LotteryCRUD.bulk_create(
+                db=db,
+                draw_dates=[draw_date for draw_date in draw_dates if draw_date not in lottery_ids],
+            )
+        )
+        missing = [draw_date for draw_date in draw_dates if draw_date not in lottery_ids]
+        if missing:
+            lottery_ids.update(LotteryCRUD.get_ids_by_draw_dates(db=db, draw_dates=missing))
+        return lottery_ids
+
+    @staticmethod
+    async def set_winner_count_async(
+        db: AsyncSession, draw_date: date, winner_count: int
+    ) -> LotteryWinnerCountResponse:
+        """Set how many winning ballots the lottery of a draw date draws, creating the lottery if needed.
+
+        Only for lotteries that aren't over yet, the draw records the winner
+        count it used in its DrawAudit.
+        """
+        async with db.begin():
+            lottery_id = await LotteryCRUD.set_winner_count_async(
+                db=db, draw_date=draw_date, winner_count=winner_count
+            )
+        upcoming_lotteries_cache.delete(UPCOMING_LOTTERIES_CACHE_KEY)
+        return LotteryWinnerCountResponse(
+            lottery_id=lottery_id, draw_date=draw_date, winner_count=winner_count
+        )
+
+    @staticmethod
+    def get_today_draw_date() -> date:
+        """Get the draw date of the most recent lottery that can be drawn.
+
+        Ballots are accepted until the end of their draw date, so this is
+        yesterday's lottery.
+        """
+        return datetime.now(ZoneInfo("Europe/Amsterdam")).date() - timedelta(days=1)
+
+    @staticmethod
+    def get_undrawn_draw_dates(db: Session) -> list[date]:
+        """Get the draw dates that are over and have ballots but no winner, oldest first.
+
+        Includes the draws missed while the scheduler was down.
+        """
+        today = datetime.now(ZoneInfo("Europe/Amsterdam")).date()
+        return LotteryCRUD.get_undrawn_draw_dates(db=db, before=today)
+
+    @staticmethod
+    def draw_winners(db: Session, draw_date: Optional[date] = None) -> list[WinningBallot]:
+        """Draw the winning ballots of a lottery.
+
+        This method draws yesterday's lottery, see get_today_draw_date, unless
+        a draw date is given. Up to the lottery's winner_count ballots are
+        drawn without replacement, with chances proportional to their weights.
+
+        The draw is seeded from the OS CSPRNG and recorded with a digest of
+        the ballots in a DrawAudit, see verify_draw_async.
+
+        The draw holds the draw date's lease, see LotteryCRUD.try_lock_draw,
+        and is skipped before reading any ballot if another transaction holds
+        the lease or the lottery already has winners, so concurrent or
+        repeated calls draw once and duplicates return right away.
+
+        Returns:
+            The committed winning ballots in rank order, empty if none were drawn
+        """
+        if draw_date is None:
+            draw_date = LotteryService.get_today_draw_date()
+
+        if not LotteryCRUD.try_lock_draw(db=db, draw_date=draw_date):
+            logger.info(f"Lottery of {draw_date} is being drawn by another transaction")
+            db.rollback()
+            return []
+
         lottery = LotteryCRUD.get_by_draw_date(db=db, draw_date=draw_date)
 
-        if lottery:
-            ballots = BallotCRUD.get_by_lottery_id(db=db, lottery_id=lottery.id)
-            
-            if ballots:
-                winning_ballot = random.choice(ballots)                
+        if lottery and not WinningBallotCRUD.exists_by_draw_date(db=db, draw_date=draw_date):
+            seed = secrets.token_bytes(DRAW_SEED_BYTES)
+            winning_ballot_ids, digest = LotteryService._select_winning_ballot_ids(
+                db=db, lottery=lottery, seed=seed
+            )
+
+            if winning_ballot_ids:
                 try:
-                    # Create winning ballot
-                    winning_ballot = WinningBallotCRUD.create(
-                        db=db,
-                        ballot_id=winning_ballot.id,
-                    )
-                    db.commit()
+                    with timed(draw_phase_duration_seconds, phase="commit"):
+                        DrawAuditCRUD.create(
+                            db=db,
+                            lottery=lottery,
+                            algorithm=DRAW_ALGORITHM,
+                            seed=seed,
+                            ballot_digest=digest.digest(),
+                            ballot_count=digest.ballot_count,
+                            total_weight=digest.total_weight,
+                            winning_ballot_ids=winning_ballot_ids,
+                            flush=False,
+                        )
+                        winner_rows = BallotCRUD.get_winner_rows_by_ids(
+                            db=db, ballot_ids=winning_ballot_ids, draw_date=lottery.draw_date
+                        )
+                        winning_ballots = [
+                            WinningBallotCRUD.create(
+                                db=db,
+                                ballot_id=ballot_id,
+                                draw_date=winner_rows[ballot_id].draw_date,
+                                participant_id=winner_rows[ballot_id].participant_id,
+                                ballot_created_at=winner_rows[ballot_id].created_at,
+                                participant_alias=winner_rows[ballot_id].alias,
+                                rank=rank,
+                                flush=False,
+                            )
+                            for rank, ballot_id in enumerate(winning_ballot_ids, start=1)
+                        ]
+                        db.commit()
+                    return winning_ballots
                 except Exception as e:
-                    db.rollback()
+                    logger.error(f"Error saving winning ballots: {str(e)}", exc_info=True)
+        # Release the lease
+        db.rollback()
+        return []
 
     @staticmethod
-    def get_upcoming(db: Session) -> UpcomingLotteriesResponse:
-        """Get all upcoming lotteries with their ballot counts.
-        
+    def _select_winning_ballot_ids(
+        db: Session, lottery: Lottery, seed: bytes
+    ) -> tuple[list[UUID], BallotSetDigest]:
+        """Pick the lottery's winning ballot ids in one pass over its ballots.
+
+        The ballots' ids and weights are streamed from the lottery's partition
+        in id order, digested and sampled, only the winners are kept in memory.
+
         Returns:
-            UpcomingLotteriesResponse: Response containing list of upcoming lotteries with their ballot counts
+            The winning ballot ids in rank order, and the ballots' digest
         """
-        lotteries = LotteryCRUD.get_upcoming(db=db)
+        digest = BallotSetDigest()
+        reservoir = WeightedReservoir[str](k=lottery.winner_count, rng=DrawRandom(seed))
+        with timed(draw_phase_duration_seconds, phase="select"):
+            for batch in BallotCRUD.stream_weights_by_lottery_id(
+                db=db,
+                lottery_id=lottery.id,
+                draw_date=lottery.draw_date,
+                batch_size=settings.LOTTERY_DRAW_BATCH_SIZE,
+            ):
+                digest.update(batch)
+                reservoir.add(batch)
+        return [UUID(ballot_id) for ballot_id in reservoir.winners()], digest
+
+    @staticmethod
+    async def get_draw_audit_async(db: AsyncSession, draw_date: date) -> Optional[DrawAuditResponse]:
+        draw_audit = await DrawAuditCRUD.get_by_draw_date_async(db=db, draw_date=draw_date)
+        if not draw_audit:
+            return None
+        return DrawAuditResponse.model_validate(draw_audit)
+
+    @staticmethod
+    async def verify_draw_async(
+        db: AsyncSession, draw_date: date
+    ) -> Optional[DrawVerificationResponse]:
+        """Redo the audited draw of a lottery and compare it with the recorded one.
+
+        The lottery's ballots are streamed again in id order, digested and
+        sampled with the audit's seed, in one pass with constant memory. The
+        draw is verified if the ballots have the audited digest and the
+        winners are the audited and the stored winning ballots.
+
+        Ballots of archived partitions are no longer in the ballot table, so
+        draws older than BALLOT_PARTITION_RETENTION_DAYS can't be verified:
+        their ballots don't match.
+
+        Results are reused for DRAW_VERIFICATION_CACHE_TTL_SECONDS. Use a
+        session on the primary, a lagging replica may miss a recent draw's
+        ballots or winners.
+
+        Returns:
+            None if the lottery has no draw audit
+        """
+        cache_key = draw_date.isoformat()
+        if settings.DRAW_VERIFICATION_CACHE_TTL_SECONDS > 0:
+            cached = draw_verification_cache.get(cache_key)
+            if cached:
+                return cached
+        draw_audit = await DrawAuditCRUD.get_by_draw_date_async(db=db, draw_date=draw_date)
+        if not draw_audit:
+            return None
+
+        digest = BallotSetDigest()
+        reservoir = WeightedReservoir[str](k=draw_audit.winner_count, rng=DrawRandom(draw_audit.seed))
+        async for batch in BallotCRUD.stream_weights_by_lottery_id_async(
+            db=db,
+            lottery_id=draw_audit.lottery_id,
+            draw_date=draw_date,
+            batch_size=settings.LOTTERY_DRAW_BATCH_SIZE,
+        ):
+            digest.update(batch)
+            reservoir.add(batch)
+        winning_ballot_ids = [UUID(ballot_id) for ballot_id in reservoir.winners()]
+        stored_winning_ballots = await WinningBallotCRUD.get_by_lottery_draw_date_async(
+            db=db, draw_date=draw_date
+        )
+
+        ballots_match = (
+            digest.digest() == draw_audit.ballot_digest
+            and digest.ballot_count == draw_audit.ballot_count
+            and digest.total_weight == draw_audit.total_weight
+        )
+        winners_match = (
+            winning_ballot_ids == list(draw_audit.winning_ballot_ids)
+            and winning_ballot_ids == [winning_ballot.ballot_id for winning_ballot in stored_winning_ballots]
+        )
+        verification = DrawVerificationResponse(
+            audit=DrawAuditResponse.model_validate(draw_audit),
+            ballot_digest=digest.digest().hex(),
+            ballot_count=digest.ballot_count,
+            total_weight=digest.total_weight,
+            winning_ballot_ids=winning_ballot_ids,
+            ballots_match=ballots_match,
+            winners_match=winners_match,
+            verified=draw_audit.algorithm == DRAW_ALGORITHM and ballots_match and winners_match,
+        )
+        if settings.DRAW_VERIFICATION_CACHE_TTL_SECONDS > 0:
+            draw_verification_cache.set(cache_key, verification)
+        return verification
+
+    @staticmethod
+    def _build_upcoming_response(
+        lotteries: list[tuple[Lottery, int]]
+    ) -> UpcomingLotteriesResponse:
         return UpcomingLotteriesResponse(
             lotteries=[
                 UpcomingLottery(
                     lottery_id=lottery.id,
                     draw_date=lottery.draw_date,
-                    ballot_count=ballot_count
+                    ballot_count=ballot_count,
+                    winner_count=lottery.winner_count,
                 )
                 for lottery, ballot_count in lotteries
             ]
         )
+
+    @staticmethod
+    def get_upcoming(db: Session) -> UpcomingLotteriesResponse:
+        """Get all upcoming lotteries with their ballot counts.
+        
+        Returns:
+            UpcomingLotteriesResponse: Response containing list of upcoming lotteries with their ballot counts
+        """
+        lotteries = LotteryCRUD.get_upcoming(db=db)
+        return LotteryService._build_upcoming_response(lotteries)
+
+    @staticmethod
+    async def get_upcoming_async(db: AsyncSession) -> UpcomingLotteriesResponse:
+        """Async variant of get_upcoming.
+
+        Responses are reused for UPCOMING_LOTTERIES_CACHE_TTL_SECONDS, so ballot
+        counts may lag behind by that long.
+        """
+        if settings.UPCOMING_LOTTERIES_CACHE_TTL_SECONDS > 0:
+            cached = upcoming_lotteries_cache.get(UPCOMING_LOTTERIES_CACHE_KEY)
+            if cached:
+                return cached
+        lotteries = await LotteryCRUD.get_upcoming_async(db=db)
+        response = LotteryService._build_upcoming_response(lotteries)
+        if settings.UPCOMING_LOTTERIES_CACHE_TTL_SECONDS > 0:
+            upcoming_lotteries_cache.set(UPCOMING_LOTTERIES_CACHE_KEY, response)
+        return response
@@ -1,22 +1,113 @@
 from sqlalchemy.orm import Session
-from app.models import Participant
-from app.utils.random_utils import generate_random_alphanumeric
+from sqlalchemy.ext.asyncio import AsyncSession
+from uuid import UUID
+from app.services.alias_allocator import alias_allocator
 from app.crud.participant_crud import ParticipantCRUD
+from app.core.security import search_hashes_many
+
+# Allocated aliases never collide with each other, retries only happen when
+# an email is created concurrently or an alias matches one from before the
+# allocator was introduced
+UPSERT_MAX_ATTEMPTS = 5
 
 
 class ParticipantService:
     @staticmethod
-    def get_or_create_participant(db: Session, email: str) -> Participant:
-        """Check if participant exists with email. If not, create one with unique alias.
+    def get_or_create_participant_id(db: Session, email: str) -> UUID:
+        """Get the id of the participant with email, creating one with a new alias if needed.
 
+        Existing participants are found by their search hash, which is cached,
+        so only new participants pay for encrypting the email and use up an
+        alias. Those are created with a single INSERT ... ON CONFLICT DO NOTHING
+        statement that falls back to the existing row. An attempt only comes
+        back empty when the alias is taken or the email was created
+        concurrently, and both are resolved by running it again with the next
+        alias.
         """
-        participant = ParticipantCRUD.get_by_email(db=db, email=email)
+        participant_id = ParticipantCRUD.get_id_by_email(db=db, email=email)
+        if participant_id:
+            return participant_id
+        for _ in range(UPSERT_MAX_ATTEMPTS):
+            participant_id = ParticipantCRUD.upsert(
+                db=db, email=email, alias=alias_allocator.next_alias(db=db)
+            )
+            if participant_id:
+                return participant_id
+        raise ValueError("Could not create participant with a unique alias")
+
+    @staticmethod
+    async def get_or_create_participant_id_async(db: AsyncSession, email: str) -> UUID:
+        """Async variant of get_or_create_participant_id."""
+        participant_id = await ParticipantCRUD.get_id_by_email_async(db=db, email=email)
+        if participant_id:
+            return participant_id
+        for _ in range(UPSERT_MAX_ATTEMPTS):
+            participant_id = await ParticipantCRUD.upsert_async(
+                db=db, email=email, alias=await alias_allocator.next_alias_async(db=db)
+            )
+            if participant_id:
+                return participant_id
+        raise ValueError("Could not create participant with a unique alias")
+
+    @staticmethod
+    def get_or_create_participant_ids(db: Session, emails: list[str]) -> dict[str, UUID]:
+        """Resolve many emails to participant ids, creating missing participants in bulk.
+
+        Existing participants are looked up with a single query and the missing
+        ones are inserted with multi-row INSERTs. Rows skipped because of a
+        conflict were either created concurrently, and are picked up by the
+        next lookup, or got an alias that is already taken, and are retried
+        with a new one.
+
+        Returns:
+            A mapping of each email to its participant id
+        """
+        unique_emails = list(dict.fromkeys(emails))
+        # Participants may still be hashed with an older key version, so they
+        # are looked up under every version's hash
+        email_by_hash = {
+            email_hash: email
+            for email, email_hashes in zip(unique_emails, search_hashes_many(unique_emails))
+            for email_hash in email_hashes
+        }
+        ids_by_email = {
+            email_by_hash[email_hash]: participant_id
+            for email_hash, participant_id in ParticipantCRUD.get_ids_by_email_hashes(
+                db=db, email_hashes=list(email_by_hash)
+            ).items()
+        }
+        missing = {email for email in unique_emails if email not in ids_by_email}
+
+        for _ in range(UPSERT_MAX_ATTEMPTS):
+            if not missing:
+                break
+            created = ParticipantCRUD.bulk_create(
+                db=db,
+                emails_and_aliases=list(
+                    zip(missing, alias_allocator.next_aliases(db=db, count=len(missing)))
+                ),
+            )
+            ids_by_email.update(
+                (email_by_hash[email_hash], participant_id)
+                for email_hash, participant_id in created.items()
+            )
+            missing = {email for email in missing if email not in ids_by_email}
+            if missing:
+                found = ParticipantCRUD.get_ids_by_email_hashes(
+                    db=db,
+                    email_hashes=[
+                        email_hash
+                        for email_hash, email in email_by_hash.items()
+                        if email in missing
+                    ],
+                )
+                ids_by_email.update(
+                    (email_by_hash[email_hash], participant_id)
+                    for email_hash, participant_id in found.items()
+                )
+                missing = {email for email in missing if email not in ids_by_email}
 
-        if not participant:
-            # Generate a unique alias if the participant doesn't exist
-            alias = generate_random_alphanumeric()
-            while ParticipantCRUD.get_by_alias(db=db, alias=alias):
-                alias = generate_random_alphanumeric()
-            participant = ParticipantCRUD.create(db=db, email=email, alias=alias)
+        if missing:
+            raise ValueError(f"Could not create {len(missing)} participants with a unique alias")
 
-        return participant
+        return {email: ids_by_email[email] for email in emails}
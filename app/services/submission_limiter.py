@@ -0,0 +1,338 @@
+"""Per participant ballot quotas and per client rate limits of ballot submissions.
+
+Both are checked before any database work. Counters live in Redis when
+SUBMISSION_LIMITS_USE_REDIS is set, so they are shared by all processes, and
+in each process otherwise or while Redis is unavailable. Once a participant
+or client is over its limit, the process remembers it until the limit resets,
+so further rejections don't even need Redis.
+"""
+
+import hashlib
+import hmac
+import threading
+import time
+from datetime import date, datetime, timedelta
+from typing import Optional
+from zoneinfo import ZoneInfo
+import redis
+import redis.asyncio as redis_asyncio
+from app.core.cache import LRUCache
+from app.core.logging import logger
+from app.core.metrics import submission_rejections
+from app.core.settings import settings
+
+# Add up to ARGV[2] ballots to a participant's count for a lottery without
+# going over the quota ARGV[1], and return how many were added. The count
+# expires at ARGV[3], after the lottery's draw.
+QUOTA_SCRIPT = """
+local requested = tonumber(ARGV[2])
+local count = redis.call('INCRBY', KEYS[1], requested)
+if count == requested then
+    redis.call('EXPIREAT', KEYS[1], ARGV[3])
+end
+local over = count - tonumber(ARGV[1])
+if over > 0 then
+    local rejected = math.min(over, requested)
+    redis.call('DECRBY', KEYS[1], rejected)
+    return requested - rejected
+end
+return requested
+"""
+
+# Count a request in a client's rate limit window, which expires after ARGV[1]
+# milliseconds, and return the window's count
+RATE_SCRIPT = """
+local count = redis.call('INCR', KEYS[1])
+if count == 1 then
+    redis.call('PEXPIRE', KEYS[1], ARGV[1])
+end
+return count
+"""
+
+
+class TokenBucket:
+    """Tokens refilled at a constant rate up to a capacity, a request takes one."""
+
+    def __init__(self, capacity: float, refill_per_second: float):
+        self.capacity = capacity
+        self.refill_per_second = refill_per_second
+        self.tokens = capacity
+        self.updated_at = time.monotonic()
+
+    def take(self) -> float:
+        """Take a token.
+
+        Returns:
+            0 if a token was taken, otherwise the seconds until one is available
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.refill_per_second)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.refill_per_second
+
+
+class SubmissionLimiter:
+    """Ballot quotas per participant and lottery, and submission rate limits per client.
+
+    Quotas count ballots per participant and draw date until the end of the
+    day after the draw date. Participants are counted by an HMAC of their
+    email with quota_hash_key (emails never reach Redis), not by their search
+    hash, which changes with each sensitive data key rotation and would
+    orphan the counts of running lotteries.
+    Rate limits count requests per client in fixed windows in Redis, and with
+    an in-process token bucket of the same rate otherwise.
+    """
+
+    def __init__(
+        self,
+        redis_url: Optional[str],
+        participant_quota: Optional[int],
+        rate_limit: Optional[int],
+        rate_window_seconds: float,
+        local_size: int,
+        quota_hash_key: bytes,
+    ):
+        self.redis_url = redis_url
+        self.quota_hash_key = quota_hash_key
+        self.participant_quota = participant_quota
+        self.rate_limit = rate_limit
+        self.rate_window_seconds = rate_window_seconds
+        self._redis: Optional[redis.Redis] = None
+        self._redis_async: Optional[redis_asyncio.Redis] = None
+        self._quota_script = None
+        self._quota_script_async = None
+        self._rate_script_async = None
+        # Monotonic time until which a participant's quota or a client's rate
+        # limit is known to be exhausted
+        self._exhausted = LRUCache[float](max_size=local_size)
+        self._local_quotas = LRUCache[int](max_size=local_size)
+        self._local_buckets = LRUCache[TokenBucket](max_size=local_size)
+        self._lock = threading.Lock()
+
+    @property
+    def redis(self) -> Optional[redis.Redis]:
+        if self.redis_url and self._redis is None:
+            self._redis = redis.Redis.from_url(self.redis_url)
+            self._quota_script = self._redis.register_script(QUOTA_SCRIPT)
+        return self._redis
+
+    @property
+    def redis_async(self) -> Optional[redis_asyncio.Redis]:
+        if self.redis_url and self._redis_async is None:
+            self._redis_async = redis_asyncio.Redis.from_url(self.redis_url)
+            self._quota_script_async = self._redis_async.register_script(QUOTA_SCRIPT)
+            self._rate_script_async = self._redis_async.register_script(RATE_SCRIPT)
+        return self._redis_async
+
+    def _is_exhausted(self, key: str) -> bool:
+        until = self._exhausted.get(key)
+        return until is not None and until > time.monotonic()
+
+    def _reject(self, key: str, seconds: float, reason: str) -> None:
+        self._exhausted.set(key, time.monotonic() + seconds)
+        submission_rejections.inc(reason=reason)
+
+    # Rate limits
+
+    def _rate_window(self) -> tuple[int, float]:
+        """Index of the current rate limit window and the seconds left in it."""
+        now = time.time()
+        index = int(now // self.rate_window_seconds)
+        return index, (index + 1) * self.rate_window_seconds - now
+
+    def _take_local_token(self, client: str) -> float:
+        with self._lock:
+            bucket = self._local_buckets.get(client)
+            if bucket is None:
+                bucket = TokenBucket(
+                    capacity=self.rate_limit,
+                    refill_per_second=self.rate_limit / self.rate_window_seconds,
+                )
+                self._local_buckets.set(client, bucket)
+            return bucket.take()
+
+    async def check_client_async(self, client: str) -> float:
+        """Count a submission request of a client against its rate limit.
+
+        Returns:
+            0 if the request is allowed, otherwise the seconds until the
+            client can submit again
+        """
+        if self.rate_limit is None:
+            return 0.0
+        key = f"limits:rate:{client}"
+        until = self._exhausted.get(key)
+        if until is not None and until > time.monotonic():
+            submission_rejections.inc(reason="rate_limit")
+            return until - time.monotonic()
+
+        retry_after = None
+        if self.redis_async is not None:
+            index, remaining = self._rate_window()
+            try:
+                count = await self._rate_script_async(
+                    keys=[f"{key}:{index}"],
+                    args=[int(self.rate_window_seconds * 1000)],
+                    client=self.redis_async,
+                )
+                retry_after = remaining if count > self.rate_limit else 0.0
+            except redis.RedisError as e:
+                logger.warning(f"Submission rate limit Redis update failed: {str(e)}")
+        if retry_after is None:
+            retry_after = self._take_local_token(client)
+        if retry_after:
+            self._reject(key, retry_after, reason="rate_limit")
+        return retry_after
+
+    # Quotas
+
+    @staticmethod
+    def _quota_expires_at(draw_date: date) -> int:
+        """Epoch seconds of the end of the day after the draw date, once the lottery is drawn."""
+        expires_at = datetime.combine(draw_date + timedelta(days=2), datetime.min.time())
+        return int(expires_at.replace(tzinfo=ZoneInfo("Europe/Amsterdam")).timestamp())
+
+    def _acquire_local(self, key: str, requested: int) -> int:
+        with self._lock:
+            count = self._local_quotas.get(key) or 0
+            accepted = max(0, min(requested, self.participant_quota - count))
+            self._local_quotas.set(key, count + accepted)
+            return accepted
+
+    def _release_local(self, key: str, count: int) -> None:
+        with self._lock:
+            self._local_quotas.set(key, max(0, (self._local_quotas.get(key) or 0) - count))
+
+    def _quota_result(self, key: str, draw_date: date, requested: int, accepted: int) -> int:
+        if accepted < requested:
+            self._reject(key, self._quota_expires_at(draw_date) - time.time(), reason="quota")
+            if requested > 1:
+                submission_rejections.inc(requested - accepted - 1, reason="quota")
+        return accepted
+
+    def acquire_quotas(self, requested: dict[tuple[str, date], int]) -> dict[tuple[str, date], int]:
+        """Count ballots against their participants' quotas, up to the quotas.
+
+        Args:
+            requested: Number of ballots by (email, draw date)
+
+        Returns:
+            Number of the ballots within the quota by (email, draw date), the
+            others must be rejected
+        """
+        if self.participant_quota is None:
+            return dict(requested)
+        entries = list(requested.items())
+        keys = [self._quota_key(email=email, draw_date=draw_date) for (email, draw_date), _ in entries]
+        accepted: dict[tuple[str, date], int] = {}
+        pending = []
+        for key, (participant_draw_date, count) in zip(keys, entries):
+            if self._is_exhausted(key):
+                submission_rejections.inc(count, reason="quota")
+                accepted[participant_draw_date] = 0
+            else:
+                pending.append((key, participant_draw_date, count))
+        if not pending:
+            return accepted
+
+        counts = None
+        if self.redis is not None:
+            try:
+                pipeline = self.redis.pipeline(transaction=False)
+                for key, (_, draw_date), count in pending:
+                    self._quota_script(
+                        keys=[key],
+                        args=[self.participant_quota, count, self._quota_expires_at(draw_date)],
+                        client=pipeline,
+                    )
+                counts = pipeline.execute()
+            except redis.RedisError as e:
+                logger.warning(f"Ballot quota Redis update failed: {str(e)}")
+        if counts is None:
+            counts = [self._acquire_local(key, count) for key, _, count in pending]
+        for (key, participant_draw_date, count), accepted_count in zip(pending, counts):
+            accepted[participant_draw_date] = self._quota_result(
+                key, participant_draw_date[1], count, int(accepted_count)
+            )
+        return accepted
+
+    def release_quotas(self, released: dict[tuple[str, date], int]) -> None:
+        """Give back quota acquired for ballots that weren't submitted after all."""
+        if self.participant_quota is None or not released:
+            return
+        entries = [(participant_draw_date, count) for participant_draw_date, count in released.items() if count]
+        keys = [self._quota_key(email=email, draw_date=draw_date) for (email, draw_date), _ in entries]
+        for key in keys:
+            self._exhausted.delete(key)
+        if self.redis is not None:
+            try:
+                pipeline = self.redis.pipeline(transaction=False)
+                for key, (_, count) in zip(keys, entries):
+                    pipeline.decrby(key, count)
+                pipeline.execute()
+                return
+            except redis.RedisError as e:
+                logger.warning(f"Ballot quota Redis release failed: {str(e)}")
+        for key, (_, count) in zip(keys, entries):
+            self._release_local(key, count)
+
+    def _quota_key(self, email: str, draw_date: date) -> str:
+        email_hash = hmac.new(self.quota_hash_key, email.encode(), hashlib.sha256).hexdigest()
+        return f"limits:quota:{email_hash}:{draw_date.isoformat()}"
+
+    async def acquire_quota_async(self, email: str, draw_date: date) -> bool:
+        """Count a ballot against its participant's quota for the lottery.
+
+        Returns:
+            False if the quota is exhausted, and the ballot must be rejected
+        """
+        if self.participant_quota is None:
+            return True
+        key = self._quota_key(email=email, draw_date=draw_date)
+        if self._is_exhausted(key):
+            submission_rejections.inc(reason="quota")
+            return False
+
+        accepted = None
+        if self.redis_async is not None:
+            try:
+                accepted = await self._quota_script_async(
+                    keys=[key],
+                    args=[self.participant_quota, 1, self._quota_expires_at(draw_date)],
+                    client=self.redis_async,
+                )
+            except redis.RedisError as e:
+                logger.warning(f"Ballot quota Redis update failed: {str(e)}")
+        if accepted is None:
+            accepted = self._acquire_local(key, 1)
+        return self._quota_result(key, draw_date, 1, int(accepted)) == 1
+
+    async def release_quota_async(self, email: str, draw_date: date) -> None:
+        """Give back the quota acquired for a ballot that wasn't submitted after all."""
+        if self.participant_quota is None:
+            return
+        key = self._quota_key(email=email, draw_date=draw_date)
+        self._exhausted.delete(key)
+        if self.redis_async is not None:
+            try:
+                await self.redis_async.decr(key)
+                return
+            except redis.RedisError as e:
+                logger.warning(f"Ballot quota Redis release failed: {str(e)}")
+        self._release_local(key, 1)
+
+
+submission_limiter = SubmissionLimiter(
+    redis_url=settings.REDIS_LIMITS_URL if settings.SUBMISSION_LIMITS_USE_REDIS else None,
+    participant_quota=settings.BALLOT_QUOTA_PER_PARTICIPANT,
+    rate_limit=settings.SUBMISSION_RATE_LIMIT,
+    rate_window_seconds=settings.SUBMISSION_RATE_LIMIT_WINDOW_SECONDS,
+    local_size=settings.SUBMISSION_LIMITS_LOCAL_SIZE,
+    # Derived from the alias key, which never changes, and distinct from it
+    quota_hash_key=hmac.new(
+        settings.ALIAS_PERMUTATION_KEY.encode(), b"limits:quota", hashlib.sha256
+    ).digest(),
+)
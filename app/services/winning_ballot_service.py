@@ -1,9 +1,32 @@
+import json
+from sqlalchemy import Row
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import AsyncIterator, Optional
 from uuid import UUID
 from datetime import date
 from app.crud.winning_ballot_crud import WinningBallotCRUD
-from app.schemas.winning_ballot import WinningBallotResponse, ParticipantWinningBallotsResponse
+from app.schemas.winning_ballot import (
+    LotteryWinningBallotsResponse,
+    ParticipantWinningBallotsResponse,
+)
 from app.crud.participant_crud import ParticipantCRUD
+from app.models import WinningBallot
+from app.core.cache import TieredCache
+from app.core.settings import settings
+from app.database.session import read_session
+from app.utils.pagination_utils import encode_cursor
+
+# A draw's winners never change once committed, so winning ballots are
+# cached by draw date without invalidation. Missing winners aren't cached
+# since the draw may still happen.
+winning_ballot_cache = TieredCache(
+    name="lottery_winning_ballots",
+    model=LotteryWinningBallotsResponse,
+    max_size=settings.WINNING_BALLOT_CACHE_SIZE,
+    redis_url=settings.REDIS_CACHE_URL if settings.WINNING_BALLOT_CACHE_USE_REDIS else None,
+    redis_ttl_seconds=settings.WINNING_BALLOT_CACHE_REDIS_TTL_SECONDS,
+)
 
 
 class WinningBallotService:
@@ -11,36 +34,158 @@ class WinningBallotService:
     def get_by_lottery_draw_date(
         db: Session,
         draw_date: date,
-    ) -> WinningBallotResponse | None:
-        """Get the winning ballot for a specific lottery draw date.
+    ) -> LotteryWinningBallotsResponse | None:
+        """Get the winning ballots for a specific lottery draw date.
 
-        The winning ballot is found by joining through the ballot to get the lottery's draw date.
-        This maintains the domain model where a winning ballot is a marker on a ballot,
-        and the ballot connects to the lottery.
+        The winning ballots are found by their draw date, in the winning ballot
+        table only. Results are read through winning_ballot_cache.
 
         Args:
             db (Session): Database session
             draw_date (date): The draw date to look up
 
         Returns:
-            WinningBallotResponse | None: The winning ballot if found, None otherwise
+            LotteryWinningBallotsResponse | None: The winning ballots in rank
+            order if the lottery was drawn, None otherwise
         """
-        return WinningBallotCRUD.get_by_lottery_draw_date(
+        cached = winning_ballot_cache.get(draw_date.isoformat())
+        if cached:
+            return cached
+        winning_ballots = WinningBallotCRUD.get_by_lottery_draw_date(
             db=db, draw_date=draw_date
         )
+        if not winning_ballots:
+            return None
+        return WinningBallotService.cache_winning_ballots(
+            draw_date=draw_date, winning_ballots=winning_ballots
+        )
+
+    @staticmethod
+    def cache_winning_ballots(
+        draw_date: date, winning_ballots: list[WinningBallot]
+    ) -> LotteryWinningBallotsResponse:
+        """Store a lottery's winning ballots, in rank order, in winning_ballot_cache."""
+        response = LotteryWinningBallotsResponse(winning_ballots=winning_ballots)
+        winning_ballot_cache.set(draw_date.isoformat(), response)
+        return response
 
     @staticmethod
     def get_by_participant_id(
-        db: Session, participant_id: UUID
+        db: Session,
+        participant_id: UUID,
+        limit: int,
+        after: Optional[tuple[date, UUID]] = None,
     ) -> ParticipantWinningBallotsResponse:
-        winning_ballots = WinningBallotCRUD.get_by_participant_id(db=db, participant_id=participant_id)
-        return ParticipantWinningBallotsResponse(winning_ballots=winning_ballots)
+        """Get a page of a participant's winning ballots, in draw date order.
+
+        Args:
+            limit: Maximum number of winning ballots returned
+            after: (draw date, ballot id) of the last winning ballot of the
+                previous page, from its next_cursor
+
+        Returns:
+            The page, with the cursor of the next page if there is one
+        """
+        rows = WinningBallotCRUD.get_by_participant_id(
+            db=db, participant_id=participant_id, after=after, limit=limit + 1
+        )
+        return WinningBallotService._build_page(rows=rows, limit=limit)
 
     @staticmethod
     def get_by_participant_email(
-        db: Session, email: str
+        db: Session, email: str, limit: int, after: Optional[tuple[date, UUID]] = None
     ) -> ParticipantWinningBallotsResponse:
         participant = ParticipantCRUD.get_by_email(db=db, email=email)
         if not participant:
             return ParticipantWinningBallotsResponse(winning_ballots=[])
-        return WinningBallotService.get_by_participant_id(db=db, participant_id=participant.id)
+        return WinningBallotService.get_by_participant_id(
+            db=db, participant_id=participant.id, limit=limit, after=after
+        )
+
+    @staticmethod
+    def _build_page(rows: list[Row], limit: int) -> ParticipantWinningBallotsResponse:
+        """Build a page from up to limit + 1 rows, the extra row telling a next page exists."""
+        next_cursor = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_cursor = encode_cursor(rows[-1].lottery_draw_date, rows[-1].ballot_id)
+        return ParticipantWinningBallotsResponse(winning_ballots=rows, next_cursor=next_cursor)
+
+    @staticmethod
+    async def get_by_lottery_draw_date_async(
+        db: AsyncSession,
+        draw_date: date,
+    ) -> LotteryWinningBallotsResponse | None:
+        """Async variant of get_by_lottery_draw_date."""
+        cached = await winning_ballot_cache.get_async(draw_date.isoformat())
+        if cached:
+            return cached
+        winning_ballots = await WinningBallotCRUD.get_by_lottery_draw_date_async(
+            db=db, draw_date=draw_date
+        )
+        if not winning_ballots:
+            return None
+        response = LotteryWinningBallotsResponse(winning_ballots=winning_ballots)
+        await winning_ballot_cache.set_async(draw_date.isoformat(), response)
+        return response
+
+    @staticmethod
+    async def get_by_participant_id_async(
+        db: AsyncSession,
+        participant_id: UUID,
+        limit: int,
+        after: Optional[tuple[date, UUID]] = None,
+    ) -> ParticipantWinningBallotsResponse:
+        """Async variant of get_by_participant_id."""
+        rows = await WinningBallotCRUD.get_by_participant_id_async(
+            db=db, participant_id=participant_id, after=after, limit=limit + 1
+        )
+        return WinningBallotService._build_page(rows=rows, limit=limit)
+
+    @staticmethod
+    async def get_by_participant_email_async(
+        db: AsyncSession, email: str, limit: int, after: Optional[tuple[date, UUID]] = None
+    ) -> ParticipantWinningBallotsResponse:
+        participant = await ParticipantCRUD.get_by_email_async(db=db, email=email)
+        if not participant:
+            return ParticipantWinningBallotsResponse(winning_ballots=[])
+        return await WinningBallotService.get_by_participant_id_async(
+            db=db, participant_id=participant.id, limit=limit, after=after
+        )
+
+    @staticmethod
+    async def stream_ndjson(
+        participant_id: Optional[UUID] = None,
+        email: Optional[str] = None,
+        after: Optional[tuple[date, UUID]] = None,
+    ) -> AsyncIterator[str]:
+        """Stream all of a participant's winning ballots after the cursor as NDJSON.
+
+        The participant is given by id or by email. Rows are read from a
+        server-side cursor in batches and serialized without ORM objects or
+        Pydantic models, so memory use doesn't depend on the history's size.
+
+        The response is streamed once the request's dependencies have been
+        closed, so a read session of its own is used.
+        """
+        async with read_session() as db:
+            if participant_id is None:
+                participant = await ParticipantCRUD.get_by_email_async(db=db, email=email)
+                if not participant:
+                    return
+                participant_id = participant.id
+            async for rows in WinningBallotCRUD.stream_by_participant_id_async(
+                db=db, participant_id=participant_id, after=after
+            ):
+                yield "".join(
+                    json.dumps(
+                        {
+                            "ballot_id": str(ballot_id),
+                            "ballot_created_at": ballot_created_at.isoformat() if ballot_created_at else None,
+                            "lottery_draw_date": lottery_draw_date.isoformat(),
+                            "rank": rank,
+                        }
+                    )
+                    + "\n"
+                    for ballot_id, ballot_created_at, lottery_draw_date, rank in rows
+                )
@@ -0,0 +1,85 @@
+"""Consumer writing the queued ballots to the database.
+
+Run one or more with:
+
+    python -m app.tasks.ballot_ingestion_consumer
+
+Only needed when BALLOT_INGESTION_MODE is "queue".
+"""
+
+import os
+import socket
+import time
+from sqlalchemy.exc import OperationalError
+from app.core.logging import logger
+from app.core.security import data_protection
+from app.core.settings import settings
+from app.database.session import SessionLocal
+from app.exceptions.ballot import BallotSubmissionException
+from app.services.ballot_ingestion_queue import QueuedBallot, ballot_ingestion_queue
+from app.services.ballot_service import BallotService
+
+RETRY_DELAY_SECONDS = 5
+
+
+def ingest(ballots: list[QueuedBallot]) -> None:
+    """Write a batch of queued ballots and acknowledge them.
+
+    When the batch fails for another reason than the database being
+    unreachable, its ballots are written one by one, and those failing on
+    their own are moved to the dead letter stream, a batch of one ballot
+    directly. On a connection error the
+    batch isn't acknowledged and is read again once claimable.
+    """
+    emails = data_protection.decrypt_many([encrypted_email for _, _, encrypted_email, _, _ in ballots])
+    rows = [
+        (ballot_id, email, draw_date, weight)
+        for (_, ballot_id, _, draw_date, weight), email in zip(ballots, emails)
+    ]
+    try:
+        with SessionLocal() as db:
+            inserted = BallotService.ingest_batch(db=db, ballots=rows)
+        ballot_ingestion_queue.acknowledge(ballots)
+        logger.info(f"Ingested {inserted} of {len(ballots)} queued ballots")
+        return
+    except BallotSubmissionException as e:
+        if isinstance(e.__cause__, OperationalError):
+            raise
+        if len(ballots) == 1:
+            dead_letter(ballots[0], error=e)
+            return
+
+    for ballot, row in zip(ballots, rows):
+        try:
+            with SessionLocal() as db:
+                BallotService.ingest_batch(db=db, ballots=[row])
+            ballot_ingestion_queue.acknowledge([ballot])
+        except BallotSubmissionException as e:
+            if isinstance(e.__cause__, OperationalError):
+                raise
+            dead_letter(ballot, error=e)
+
+
+def dead_letter(ballot: QueuedBallot, error: BallotSubmissionException) -> None:
+    logger.error(f"Moving queued ballot {ballot[1]} to the dead letter stream")
+    ballot_ingestion_queue.dead_letter(ballot, error=str(error.__cause__))
+
+
+def main() -> None:
+    consumer = f"{socket.gethostname()}-{os.getpid()}"
+    ballot_ingestion_queue.ensure_group()
+    logger.info(f"Ballot ingestion consumer {consumer} started")
+    while True:
+        try:
+            ballots = ballot_ingestion_queue.read(
+                consumer=consumer, count=settings.BALLOT_INGESTION_BATCH_SIZE, block_ms=1000
+            )
+            if ballots:
+                ingest(ballots)
+        except Exception as e:
+            logger.error(f"Error in ballot ingestion consumer: {str(e)}", exc_info=True)
+            time.sleep(RETRY_DELAY_SECONDS)
+
+
+if __name__ == "__main__":
+    main()
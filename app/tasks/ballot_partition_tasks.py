@@ -0,0 +1,24 @@
+from app.tasks.celery_worker import celery_app
+from app.services.ballot_partition_service import BallotPartitionService
+from app.database.session import get_db
+from app.core.logging import logger
+
+
+@celery_app.task(name="app.tasks.ballot_partition_tasks.maintain_ballot_partitions")
+def maintain_ballot_partitions():
+    """Create upcoming ballot partitions and archive expired ones.
+
+    This task is scheduled daily by Celery Beat and is idempotent, so running it
+    more often or after missed days is safe.
+    """
+    try:
+        db = next(get_db())
+        created = BallotPartitionService.create_upcoming_partitions(db=db)
+        archived = BallotPartitionService.archive_expired_partitions(db=db)
+        logger.info(
+            f"Ballot partitions created for {[str(d) for d in created]}, "
+            f"archived for {[str(d) for d in archived]}"
+        )
+    except Exception as e:
+        logger.error(f"Error in ballot partition maintenance task: {str(e)}", exc_info=True)
+        raise
@@ -1,7 +1,11 @@
+import time
 from celery import Celery
 from celery.schedules import crontab
+from celery.signals import task_postrun, task_prerun, worker_process_init
 from app.core.settings import settings
-from app.core.logging import logger, log_dir
+from app.core.logging import logger, log_dir, request_id
+from app.core.metrics import celery_task_duration_seconds
+from app.database.session import dispose_engines_after_fork
 
 
 # Initialize Celery app
@@ -12,9 +16,18 @@ celery_app.conf.update(
     result_backend=settings.CELERY_RESULT_BACKEND,
     timezone="Europe/Amsterdam",
     beat_schedule={
-        "pick-lottery-winner-every-midnight": {
-            "task": "app.tasks.lottery_tasks.pick_today_lottery_winner",
-            "schedule": crontab(hour=0, minute=0),  # Using crontab for exact timing
+        "draw-past-due-lotteries-hourly": {
+            "task": "app.tasks.lottery_tasks.draw_past_due_lotteries",
+            # Draws yesterday's lottery just after midnight and catches up on missed draws
+            "schedule": crontab(minute=0),
+        },
+        "maintain-ballot-partitions-daily": {
+            "task": "app.tasks.ballot_partition_tasks.maintain_ballot_partitions",
+            "schedule": crontab(hour=3, minute=0),
+        },
+        "rotate-participant-keys-daily": {
+            "task": "app.tasks.key_rotation_tasks.rotate_participant_keys",
+            "schedule": crontab(hour=4, minute=0),
         },
     },
     task_routes={
@@ -31,4 +44,32 @@ celery_app.conf.update(
     beat_log_level="INFO",
 )
 
-from app.tasks import lottery_tasks
+
+@worker_process_init.connect
+def reset_database_pools(**kwargs):
+    """Prefork pool processes must not share the parent's database connections."""
+    dispose_engines_after_fork()
+
+
+# Start times of the tasks running in this process, by task id
+_task_start_times: dict[str, float] = {}
+
+
+@task_prerun.connect
+def record_task_start(task_id=None, **kwargs):
+    _task_start_times[task_id] = time.perf_counter()
+    # Log records of the task carry its id
+    request_id.set(task_id)
+
+
+@task_postrun.connect
+def record_task_duration(task_id=None, task=None, state=None, **kwargs):
+    request_id.set(None)
+    start = _task_start_times.pop(task_id, None)
+    if start is not None:
+        celery_task_duration_seconds.observe(
+            time.perf_counter() - start, task=task.name, state=state or "UNKNOWN"
+        )
+
+
+from app.tasks import lottery_tasks, ballot_partition_tasks, key_rotation_tasks
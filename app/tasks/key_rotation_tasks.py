@@ -0,0 +1,39 @@
+from app.tasks.celery_worker import celery_app
+from app.services.key_rotation_service import KeyRotationService
+from app.database.session import get_db
+from app.core.logging import logger
+
+
+@celery_app.task(bind=True, name="app.tasks.key_rotation_tasks.rotate_participant_keys")
+def rotate_participant_keys(self):
+    """Re-encrypt participant emails to the newest key version.
+
+    This task is scheduled daily by Celery Beat and returns right away once the
+    newest key version's rotation has completed. An interrupted rotation is
+    resumed from its checkpoint. Progress is reported as the PROGRESS task state
+    and kept in the key_rotation_progress table.
+    """
+    def report(progress):
+        self.update_state(
+            state="PROGRESS",
+            meta={
+                "key_id": progress.key_id,
+                "scanned": progress.scanned_count,
+                "rotated": progress.rotated_count,
+            },
+        )
+
+    try:
+        db = next(get_db())
+        try:
+            progress = KeyRotationService.rotate_participants(db=db, on_progress=report)
+            return {
+                "key_id": progress.key_id,
+                "scanned": progress.scanned_count,
+                "rotated": progress.rotated_count,
+            }
+        finally:
+            db.close()
+    except Exception as e:
+        logger.error(f"Error in participant key rotation task: {str(e)}", exc_info=True)
+        raise
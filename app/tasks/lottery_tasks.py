@@ -1,27 +1,99 @@
+from celery import chord, group
 from app.tasks.celery_worker import celery_app
 from app.services.lottery_service import LotteryService
+from app.services.winning_ballot_service import WinningBallotService
+from app.services.ballot_service import BallotService
 from app.database.session import get_db
 from app.core.logging import logger
-from datetime import datetime
-from zoneinfo import ZoneInfo
+from datetime import date
 
-@celery_app.task(name="app.tasks.lottery_tasks.pick_today_lottery_winner")
-def pick_today_lottery_winner():
-    """Select a winner for today's lottery.
 
-    This task is scheduled to run at midnight every day.
-    It selects a random winner from all ballots submitted for the previous day's lottery.
-    The task is managed by Celery Beat scheduler.
+@celery_app.task(name="app.tasks.lottery_tasks.draw_past_due_lotteries")
+def draw_past_due_lotteries():
+    """Draw every lottery that is over and has ballots but no winner.
+
+    This task is scheduled hourly by Celery Beat. Besides yesterday's lottery
+    it catches up on the draws missed while the workers or the scheduler were
+    down. The lotteries are drawn in parallel by draw_lottery tasks, whose
+    results are reported by report_draws once all of them have finished.
 
-    Note:
-        This task should be scheduled to run at midnight (00:00) in the Europe/Amsterdam timezone.
-        The actual winner selection logic is handled by LotteryService.pick_today_winner.
+    Each draw runs in its own transaction and is idempotent, so overlapping
+    runs and retries never draw a lottery twice.
+
+    Returns:
+        The draw dates that were dispatched, as ISO strings
     """
     try:
-        now = datetime.now(ZoneInfo("Europe/Amsterdam"))
-        logger.info(f"Task running at {now} (hour: {now.hour})")
         db = next(get_db())
-        LotteryService.pick_today_winner(db=db)
+        try:
+            draw_dates = LotteryService.get_undrawn_draw_dates(db=db)
+        finally:
+            db.close()
+        if not draw_dates:
+            logger.info("No past due lotteries to draw")
+            return []
+        logger.info(f"Drawing past due lotteries of {[str(d) for d in draw_dates]}")
+        chord(group(draw_lottery.s(d.isoformat()) for d in draw_dates))(report_draws.s())
+        return [d.isoformat() for d in draw_dates]
     except Exception as e:
-        logger.error(f"Error in lottery winner selection task: {str(e)}", exc_info=True)
+        logger.error(f"Error in past due lottery draw task: {str(e)}", exc_info=True)
         raise
+
+
+@celery_app.task(name="app.tasks.lottery_tasks.draw_lottery")
+def draw_lottery(draw_date: str) -> dict:
+    """Draw the winning ballots of the lottery of a draw date.
+
+    With queued ballot ingestion, the draw date is closed and the draw waits
+    until its queued ballots have been written. If they aren't written in
+    time the lottery isn't drawn, the hourly draw_past_due_lotteries run
+    retries it. The new winner is written to
+    the winning ballot cache so lookups don't have to hit the database.
+
+    Returns:
+        The draw date and the ids of the winning ballots in rank order, empty
+        if this task didn't draw the lottery
+    """
+    winning_ballot_ids: list[str] = []
+    try:
+        lottery_draw_date = date.fromisoformat(draw_date)
+        if not BallotService.wait_for_queued_ballots(draw_date=lottery_draw_date):
+            logger.warning(f"Not drawing the lottery of {draw_date} while queued ballots are pending")
+            return {"draw_date": draw_date, "winning_ballot_ids": winning_ballot_ids}
+        db = next(get_db())
+        try:
+            winning_ballots = LotteryService.draw_winners(db=db, draw_date=lottery_draw_date)
+            if winning_ballots:
+                WinningBallotService.cache_winning_ballots(
+                    draw_date=lottery_draw_date, winning_ballots=winning_ballots
+                )
+                winning_ballot_ids = [str(winning_ballot.ballot_id) for winning_ballot in winning_ballots]
+        finally:
+            db.close()
+    except Exception as e:
+        # Not raised, a failed draw must not keep the other draws from being reported
+        logger.error(f"Error in lottery draw of {draw_date}: {str(e)}", exc_info=True)
+    return {"draw_date": draw_date, "winning_ballot_ids": winning_ballot_ids}
+
+
+@celery_app.task(name="app.tasks.lottery_tasks.report_draws")
+def report_draws(results: list[dict]) -> dict:
+    """Log which of the draws dispatched by draw_past_due_lotteries drew winners.
+
+    Lotteries without winners were drawn by an overlapping run, or their draw
+    failed and is retried by the next run.
+    """
+    drawn = sorted(r["draw_date"] for r in results if r["winning_ballot_ids"])
+    not_drawn = sorted(r["draw_date"] for r in results if not r["winning_ballot_ids"])
+    logger.info(f"Lotteries drawn for {drawn}, not drawn for {not_drawn}")
+    return {"drawn": drawn, "not_drawn": not_drawn}
+
+
+@celery_app.task(name="app.tasks.lottery_tasks.pick_today_lottery_winner")
+def pick_today_lottery_winner():
+    """Draw the winning ballots of yesterday's lottery.
+
+    Kept for messages queued by schedulers of earlier releases, the schedule
+    now runs draw_past_due_lotteries.
+    """
+    return draw_lottery(LotteryService.get_today_draw_date().isoformat())
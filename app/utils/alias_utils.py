@@ -0,0 +1,52 @@
+import hashlib
+import string
+
+ALIAS_ALPHABET = string.ascii_lowercase + string.digits
+ALIAS_LENGTH = 12
+
+# Aliases are produced by a bijection on [0, 2**62). 36**12 is slightly
+# larger than 2**62, so every permuted index fits in a 12 character alias.
+_HALF_BITS = 31
+_HALF_MASK = (1 << _HALF_BITS) - 1
+_ROUNDS = 4
+ALIAS_INDEX_LIMIT = 1 << (2 * _HALF_BITS)
+
+
+def derive_alias_key(secret: str) -> bytes:
+    """Derive the permutation key from a secret (BLAKE2b keys are at most 64 bytes)."""
+    return hashlib.sha256(secret.encode()).digest()
+
+
+def _round_function(key: bytes, round_number: int, value: int) -> int:
+    # Keyed BLAKE2b is a PRF like HMAC, without the double hashing
+    digest = hashlib.blake2b(
+        bytes([round_number]) + value.to_bytes(4, "big"), key=key, digest_size=4
+    ).digest()
+    return int.from_bytes(digest, "big") & _HALF_MASK
+
+
+def permute_index(index: int, key: bytes) -> int:
+    """Map an index to another one in [0, 2**62) with a keyed Feistel network.
+
+    A Feistel network is a bijection whatever its round function, so
+    distinct indexes always give distinct results.
+    """
+    if not 0 <= index < ALIAS_INDEX_LIMIT:
+        raise ValueError(f"Alias index must be in [0, {ALIAS_INDEX_LIMIT})")
+    left, right = index >> _HALF_BITS, index & _HALF_MASK
+    for round_number in range(_ROUNDS):
+        left, right = right, left ^ _round_function(key, round_number, right)
+    return (left << _HALF_BITS) | right
+
+
+def alias_from_index(index: int, key: bytes) -> str:
+    """Encode the keyed permutation of index as a 12 character base36 alias.
+
+    Sequential indexes give aliases that look random and never collide.
+    """
+    value = permute_index(index, key)
+    characters = []
+    for _ in range(ALIAS_LENGTH):
+        value, remainder = divmod(value, len(ALIAS_ALPHABET))
+        characters.append(ALIAS_ALPHABET[remainder])
+    return "".join(reversed(characters))
@@ -0,0 +1,23 @@
+import base64
+import binascii
+from datetime import date
+from uuid import UUID
+
+
+def encode_cursor(draw_date: date, ballot_id: UUID) -> str:
+    """Opaque cursor pointing just after the row with this draw date and ballot id."""
+    return base64.urlsafe_b64encode(f"{draw_date.isoformat()}|{ballot_id}".encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[date, UUID]:
+    """Inverse of encode_cursor.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        draw_date, ballot_id = raw.split("|")
+        return date.fromisoformat(draw_date), UUID(ballot_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -1,8 +1,12 @@
 import string
-import random
+import secrets
 
 
 def generate_random_alphanumeric(length: int = 12) -> str:
-    return "".join(
-        random.choices(population=string.ascii_lowercase + string.digits, k=length)
-    )
+    """Random lowercase alphanumeric string from the OS CSPRNG.
+
+    Doesn't use the random module, whose global state is predictable and
+    shared with the rest of the process.
+    """
+    alphabet = string.ascii_lowercase + string.digits
+    return "".join(secrets.choice(alphabet) for _ in range(length))
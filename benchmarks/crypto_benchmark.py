@@ -0,0 +1,58 @@
+"""Micro-benchmarks of email encryption, decryption and hashing.
+
+Run from the repository root with the application's environment loaded:
+
+    python -m benchmarks.crypto_benchmark --batch-size 10000
+
+Each operation is timed single-item and batched.
+"""
+import argparse
+import time
+from base64 import b64encode
+from typing import Callable
+
+from app.core.security import data_protection
+
+
+def _emails(count: int) -> list[str]:
+    return [f"participant{index}@example.com" for index in range(count)]
+
+
+def _timed(label: str, count: int, func: Callable[[], object], repeat: int) -> None:
+    best = min(_duration(func) for _ in range(repeat))
+    print(f"{label:<40} {best * 1000:10.2f} ms {count / best:14,.0f} items/s")
+
+
+def _duration(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--batch-size", type=int, default=10000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    emails = _emails(args.batch_size)
+    encrypted = data_protection.encrypt_many(emails)
+    hot_email = emails[0]
+    data_protection.hash_for_search(hot_email)
+
+    print(f"batch size {args.batch_size}, best of {args.repeat}")
+    _timed("encrypt (one by one)", len(emails), lambda: [data_protection.encrypt(e) for e in emails], args.repeat)
+    _timed("encrypt_many", len(emails), lambda: data_protection.encrypt_many(emails), args.repeat)
+    _timed("decrypt (one by one)", len(emails), lambda: [data_protection.decrypt(e) for e in encrypted], args.repeat)
+    _timed("decrypt_many", len(emails), lambda: data_protection.decrypt_many(encrypted), args.repeat)
+    _timed("hash_many", len(emails), lambda: data_protection.hash_many(emails), args.repeat)
+    _timed("hash_for_search (cached)", len(emails), lambda: [data_protection.hash_for_search(hot_email) for _ in emails], args.repeat)
+
+    raw_size = sum(len(e) for e in encrypted) / len(encrypted)
+    legacy_size = sum(len(b64encode(data_protection.cipher_suite.encrypt(e.encode()))) for e in emails[:1000]) / min(1000, len(emails))
+    print(f"{'stored email size (raw token)':<40} {raw_size:10.1f} bytes")
+    print(f"{'stored email size (base64 of token)':<40} {legacy_size:10.1f} bytes")
+
+
+if __name__ == "__main__":
+    main()
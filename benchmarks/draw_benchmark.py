@@ -0,0 +1,134 @@
+"""Time LotteryService.draw_winners at increasing ballot counts.
+
+Run from the repository root with the application's environment loaded and
+the migrations applied:
+
+    python -m benchmarks.draw_benchmark --ballot-counts 10000,100000,1000000 --repeat 5
+
+Each ballot count gets its own lottery on a past draw date (from 2000-01-01,
+far from any real draw), seeded with benchmarks.seed. The winner is picked
+--repeat times, the winning ballots and draw audit being deleted in between. Lotteries
+draw --winner-count winners. The lotteries,
+ballots and participants are deleted afterwards unless --keep is given.
+
+One more draw per ballot count is made with tracemalloc on, reporting the
+peak Python memory allocated while drawing. The draw streams the ballots, so
+the peak should stay flat from 1k to 10M ballots:
+
+    python -m benchmarks.draw_benchmark --ballot-counts 1000,100000,10000000 --repeat 1
+
+It doesn't include the driver's fetch buffer, which holds one batch of
+LOTTERY_DRAW_BATCH_SIZE rows whatever the ballot count.
+"""
+import argparse
+import time
+import tracemalloc
+import uuid
+from datetime import date, timedelta
+
+from sqlalchemy import delete, select, text, update
+from sqlalchemy.orm import Session
+
+from app.crud.ballot_partition_crud import BallotPartitionCRUD
+from app.database.session import SessionLocal
+from app.models import Ballot, DrawAudit, Lottery, LotteryBallotCount, WinningBallot
+from app.services.lottery_service import LotteryService
+from benchmarks.results import emit, summarize_latencies
+from benchmarks.seed import delete_participants, seed_ballots, seed_lotteries, seed_participants
+
+FIRST_DRAW_DATE = date(2000, 1, 1)
+
+
+def _delete_draw_dates(db: Session, draw_dates: list[date]) -> None:
+    db.execute(delete(WinningBallot).where(WinningBallot.draw_date.in_(draw_dates)))
+    db.execute(delete(DrawAudit).where(DrawAudit.draw_date.in_(draw_dates)))
+    db.execute(delete(Ballot).where(Ballot.draw_date.in_(draw_dates)))
+    lottery_ids = db.execute(select(Lottery.id).where(Lottery.draw_date.in_(draw_dates))).scalars().all()
+    if lottery_ids:
+        db.execute(delete(LotteryBallotCount).where(LotteryBallotCount.lottery_id.in_(lottery_ids)))
+        db.execute(delete(Lottery).where(Lottery.id.in_(lottery_ids)))
+
+
+def _draw_peak_memory(db: Session, draw_date: date) -> int:
+    """Peak Python memory in bytes allocated while drawing the lottery of a draw date."""
+    tracemalloc.start()
+    try:
+        winning_ballots = LotteryService.draw_winners(db=db, draw_date=draw_date)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    if not winning_ballots:
+        raise RuntimeError(f"No winner was drawn for {draw_date}")
+    return peak
+
+
+def _delete_draw(db: Session, draw_date: date) -> None:
+    db.execute(delete(WinningBallot).where(WinningBallot.draw_date == draw_date))
+    db.execute(delete(DrawAudit).where(DrawAudit.draw_date == draw_date))
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ballot-counts", default="10000,100000,1000000")
+    parser.add_argument("--participants", type=int, default=100000)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--winner-count", type=int, default=1)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded data")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+    ballot_counts = [int(count) for count in args.ballot_counts.split(",")]
+    draw_dates = [FIRST_DRAW_DATE + timedelta(days=index) for index in range(len(ballot_counts))]
+
+    results = {}
+    with SessionLocal() as db:
+        # Left over by an interrupted run
+        _delete_draw_dates(db=db, draw_dates=draw_dates)
+        participant_ids = seed_participants(db=db, count=args.participants, run_id=uuid.uuid4().hex[:8])
+        lottery_ids = seed_lotteries(db=db, draw_dates=draw_dates)
+        db.execute(
+            update(Lottery).where(Lottery.draw_date.in_(draw_dates)).values(winner_count=args.winner_count)
+        )
+        db.commit()
+
+        try:
+            for draw_date, ballot_count in zip(draw_dates, ballot_counts):
+                start = time.perf_counter()
+                seed_ballots(
+                    db=db,
+                    lottery_ids={draw_date: lottery_ids[draw_date]},
+                    participant_ids=participant_ids,
+                    count=ballot_count,
+                )
+                db.commit()
+                db.execute(text(f"ANALYZE {BallotPartitionCRUD.partition_name(draw_date)}"))
+                db.commit()
+                seed_seconds = time.perf_counter() - start
+
+                durations = []
+                for _ in range(args.repeat):
+                    start = time.perf_counter()
+                    winning_ballots = LotteryService.draw_winners(db=db, draw_date=draw_date)
+                    durations.append(time.perf_counter() - start)
+                    if not winning_ballots:
+                        raise RuntimeError(f"No winner was drawn for {draw_date}")
+                    _delete_draw(db=db, draw_date=draw_date)
+                peak_memory = _draw_peak_memory(db=db, draw_date=draw_date)
+                _delete_draw(db=db, draw_date=draw_date)
+                results[str(ballot_count)] = {
+                    "seed_seconds": seed_seconds,
+                    "draw_winners": summarize_latencies(durations),
+                    "draw_peak_memory_bytes": peak_memory,
+                }
+        finally:
+            if not args.keep:
+                db.rollback()
+                _delete_draw_dates(db=db, draw_dates=draw_dates)
+                delete_participants(db=db, participant_ids=participant_ids)
+                db.commit()
+
+    emit("draw", vars(args), results, output=args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Time the draw's sampling and ballot digest.
+
+Runs without a database:
+
+    python -m benchmarks.draw_selection_benchmark --sizes 100000,1000000,10000000 --winner-counts 1,10,100
+
+Timings stream synthetic (id, weight) entries in batches of
+LOTTERY_DRAW_BATCH_SIZE, as the draw does, and use its DrawRandom numbers.
+The digest is timed separately, it doesn't depend on the winner count. That
+the draws are unbiased is tested in tests/test_draw_selection.py.
+"""
+import argparse
+import secrets
+import time
+import uuid
+
+from app.core.settings import settings
+from app.services.draw_selection import DRAW_SEED_BYTES, BallotSetDigest, DrawRandom, weighted_sample
+from benchmarks.results import emit, summarize_latencies
+
+
+def _batches(entries: list, batch_size: int) -> list[list]:
+    return [entries[start:start + batch_size] for start in range(0, len(entries), batch_size)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="100000,1000000,10000000")
+    parser.add_argument("--winner-counts", default="1,10,100")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--seed", help="Hex seed of the draws, random by default")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+    rng = DrawRandom(bytes.fromhex(args.seed) if args.seed else secrets.token_bytes(DRAW_SEED_BYTES))
+    winner_counts = [int(count) for count in args.winner_counts.split(",")]
+
+    results = {"timings": {}}
+    for size in (int(size) for size in args.sizes.split(",")):
+        # Ids as the draw streams them, weights mostly 1 with some bonus ballots
+        entries = [(str(uuid.uuid4()), 1 if rng.random() < 0.9 else 2) for _ in range(size)]
+        batches = _batches(entries, settings.LOTTERY_DRAW_BATCH_SIZE)
+        for k in winner_counts:
+            durations = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                weighted_sample(batches, k=k, rng=rng)
+                durations.append(time.perf_counter() - start)
+            results["timings"][f"{size}/{k}"] = summarize_latencies(durations)
+        durations = []
+        for _ in range(args.repeat):
+            start = time.perf_counter()
+            digest = BallotSetDigest()
+            for batch in batches:
+                digest.update(batch)
+            durations.append(time.perf_counter() - start)
+        results["timings"][f"{size}/digest"] = summarize_latencies(durations)
+        del entries, batches
+
+    emit("draw_selection", vars(args), results, output=args.output)
+
+
+if __name__ == "__main__":
+    main()
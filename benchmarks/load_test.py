@@ -0,0 +1,137 @@
+"""Concurrent load generator for the ballot, lottery and winning ballot endpoints.
+
+Run from the repository root against a running service, ideally seeded with
+benchmarks.seed:
+
+    python -m benchmarks.load_test --base-url http://localhost:8000 \
+        --concurrency 50 --duration 60 --mix submit=5,upcoming=3,winning-ballot=2
+
+Each of the --concurrency workers sends requests back to back, picking the
+endpoint at random with the weights of --mix. Submissions use emails from a
+pool of --participants addresses, so some participants submit repeatedly,
+and draw dates spread over the submission window. Winning ballots are looked
+up for the last --winning-ballot-days draw dates, 404s for dates without a
+winner count as successful. Throughput and latency percentiles per endpoint
+are emitted as JSON.
+"""
+import argparse
+import asyncio
+import random
+import time
+import uuid
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+import httpx
+
+from app.core.settings import settings
+from benchmarks.results import emit, summarize_latencies
+
+
+def _submit(client: httpx.AsyncClient, args, run_id: str):
+    today = datetime.now(ZoneInfo("Europe/Amsterdam")).date()
+    draw_date = today + timedelta(days=random.randint(1, settings.LOTTERY_DRAW_DATE_MAX_DAYS_AHEAD))
+    email = f"load-{run_id}-{random.randrange(args.participants)}@example.com"
+    return client.post(
+        "/ballot/submit-by-lottery-draw-date",
+        json={"email": email, "draw_date": draw_date.isoformat()},
+    )
+
+
+def _upcoming(client: httpx.AsyncClient, args, run_id: str):
+    return client.get("/lottery/upcoming")
+
+
+def _winning_ballot(client: httpx.AsyncClient, args, run_id: str):
+    today = datetime.now(ZoneInfo("Europe/Amsterdam")).date()
+    draw_date = today - timedelta(days=random.randint(1, args.winning_ballot_days))
+    return client.get("/winning-ballot/lottery-draw-date", params={"draw_date": draw_date.isoformat()})
+
+
+ENDPOINTS = {
+    "submit": (_submit, {200, 202}),
+    "upcoming": (_upcoming, {200}),
+    "winning-ballot": (_winning_ballot, {200, 404}),
+}
+
+
+def _parse_mix(mix: str) -> dict[str, float]:
+    weights = {}
+    for entry in mix.split(","):
+        name, _, weight = entry.partition("=")
+        if name not in ENDPOINTS:
+            raise argparse.ArgumentTypeError(f"Unknown endpoint {name!r}, expected one of {', '.join(ENDPOINTS)}")
+        weights[name] = float(weight or 1)
+    return weights
+
+
+async def _worker(client, args, run_id, weights, deadline, samples) -> None:
+    names = list(weights)
+    while time.monotonic() < deadline:
+        name = random.choices(names, weights=[weights[n] for n in names])[0]
+        send, expected_statuses = ENDPOINTS[name]
+        measured = time.monotonic() >= deadline - args.duration
+        start = time.perf_counter()
+        try:
+            response = await send(client, args, run_id)
+            outcome = response.status_code
+        except httpx.HTTPError as e:
+            outcome = type(e).__name__
+        if measured:
+            samples[name].append((time.perf_counter() - start, outcome, outcome in expected_statuses))
+
+
+async def run(args) -> dict:
+    run_id = uuid.uuid4().hex[:8]
+    weights = args.mix
+    samples = {name: [] for name in weights}
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout) as client:
+        # Samples are only kept once the warmup has passed
+        deadline = time.monotonic() + args.warmup + args.duration
+        await asyncio.gather(
+            *(_worker(client, args, run_id, weights, deadline, samples) for _ in range(args.concurrency))
+        )
+
+    results = {}
+    for name, endpoint_samples in samples.items():
+        statuses = {}
+        for _, outcome, _ in endpoint_samples:
+            statuses[str(outcome)] = statuses.get(str(outcome), 0) + 1
+        successes = [duration for duration, _, ok in endpoint_samples if ok]
+        results[name] = {
+            "requests": len(endpoint_samples),
+            "errors": len(endpoint_samples) - len(successes),
+            "throughput_per_second": len(endpoint_samples) / args.duration,
+            "latency": summarize_latencies(successes),
+            "statuses": statuses,
+        }
+    total = sum(len(endpoint_samples) for endpoint_samples in samples.values())
+    results["total"] = {
+        "requests": total,
+        "throughput_per_second": total / args.duration,
+        "latency": summarize_latencies(
+            [duration for endpoint_samples in samples.values() for duration, _, ok in endpoint_samples if ok]
+        ),
+    }
+    return results
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--duration", type=float, default=30.0, help="Measured seconds")
+    parser.add_argument("--warmup", type=float, default=5.0, help="Seconds of load before measuring")
+    parser.add_argument("--mix", type=_parse_mix, default="submit=1,upcoming=1,winning-ballot=1")
+    parser.add_argument("--participants", type=int, default=10000)
+    parser.add_argument("--winning-ballot-days", type=int, default=30)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    emit("load_test", vars(args), asyncio.run(run(args)), output=args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Request latency under heavy error logging, with synchronous and queued logging.
+
+Run from the repository root with the application's environment loaded:
+
+    python -m benchmarks.logging_benchmark --requests 5000 --write-delay-ms 1
+
+Every request to an in-process FastAPI endpoint logs an error with its
+traceback, like a failing ballot submission does. It's served once with the
+previous setup, a FileHandler and a StreamHandler writing on the request's
+thread, and once with the queue and listener of app.core.logging. Both write
+to files in a temporary directory. --write-delay-ms adds a pause to every
+write, standing in for a slow disk or a blocked console.
+"""
+import argparse
+import asyncio
+import logging
+import logging.handlers
+import queue
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from fastapi import FastAPI
+from fastapi.responses import JSONResponse
+
+from app.core.logging import ContextQueueHandler, JSONFormatter
+
+
+class _SlowFileHandler(logging.FileHandler):
+    def __init__(self, filename: Path, write_delay: float):
+        super().__init__(filename)
+        self.write_delay = write_delay
+
+    def emit(self, record: logging.LogRecord) -> None:
+        if self.write_delay:
+            time.sleep(self.write_delay)
+        super().emit(record)
+
+
+def _app(logger: logging.Logger) -> FastAPI:
+    app = FastAPI()
+
+    @app.post("/benchmark")
+    async def submit():
+        try:
+            raise ValueError("Ballot could not be saved")
+        except ValueError as e:
+            logger.error(f"Error submitting ballot: {str(e)}", exc_info=True)
+            return JSONResponse({"detail": "Error submitting ballot"}, status_code=500)
+
+    return app
+
+
+def _latencies(app: FastAPI, count: int) -> list[float]:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def run():
+        latencies = []
+        for _ in range(count):
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "POST",
+                "scheme": "http",
+                "path": "/benchmark",
+                "raw_path": b"/benchmark",
+                "root_path": "",
+                "query_string": b"",
+                "headers": [],
+                "server": ("benchmark", 80),
+                "client": ("benchmark", 1234),
+            }
+            start = time.perf_counter()
+            await app(scope, receive, send)
+            latencies.append(time.perf_counter() - start)
+        return latencies
+    return asyncio.run(run())
+
+
+def _report(label: str, latencies: list[float]) -> None:
+    percentiles = statistics.quantiles(latencies, n=100)
+    print(
+        f"{label:<12} p50 {percentiles[49] * 1000:8.3f} ms  p99 {percentiles[98] * 1000:8.3f} ms  "
+        f"max {max(latencies) * 1000:8.3f} ms"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--write-delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+    write_delay = args.write_delay_ms / 1000
+
+    with tempfile.TemporaryDirectory() as directory:
+        directory = Path(directory)
+
+        sync_logger = logging.getLogger("benchmark.sync")
+        sync_logger.propagate = False
+        for name in ("sync_file.log", "sync_console.log"):
+            handler = _SlowFileHandler(directory / name, write_delay)
+            handler.setFormatter(logging.Formatter("%(asctime)s - %(levelname)s - %(message)s"))
+            sync_logger.addHandler(handler)
+
+        queued_logger = logging.getLogger("benchmark.queued")
+        queued_logger.propagate = False
+        log_queue = queue.Queue(maxsize=args.requests * 2)
+        queued_logger.addHandler(ContextQueueHandler(log_queue))
+        handlers = [_SlowFileHandler(directory / name, write_delay) for name in ("queued_file.log", "queued_console.log")]
+        for handler in handlers:
+            handler.setFormatter(JSONFormatter())
+        listener = logging.handlers.QueueListener(log_queue, *handlers)
+        listener.start()
+
+        _report("synchronous", _latencies(_app(sync_logger), args.requests))
+        start = time.perf_counter()
+        _report("queued", _latencies(_app(queued_logger), args.requests))
+        listener.stop()
+        print(f"queued records written {time.perf_counter() - start:.2f} s after the first request")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,128 @@
+"""Overhead of the request and SQL statement instrumentation.
+
+Run from the repository root with the application's environment loaded:
+
+    python -m benchmarks.metrics_overhead_benchmark --requests 5000
+
+The same FastAPI endpoint, running one statement on an in-memory SQLite
+database, is called in-process with and without MetricsMiddleware and the
+engine events, so neither a server nor Postgres is needed. Statements are
+also timed on their own. The baselines are far cheaper than requests and
+statements against Postgres, so the overhead measured here is an upper bound
+of the relative overhead in production.
+"""
+import argparse
+import asyncio
+import time
+from typing import Callable
+
+from fastapi import FastAPI
+from sqlalchemy import create_engine, text
+
+from app.api.middleware import MetricsMiddleware
+from app.core.metrics import QueryStats, current_query_stats
+from app.database.session import _instrument
+
+
+def _app(instrumented: bool) -> FastAPI:
+    engine = create_engine("sqlite://")
+    if instrumented:
+        _instrument(engine, "benchmark")
+    app = FastAPI()
+    if instrumented:
+        app.add_middleware(MetricsMiddleware)
+
+    @app.get("/benchmark/{item_id}")
+    def get_item(item_id: int):
+        with engine.connect() as connection:
+            return {"item_id": item_id, "value": connection.execute(text("SELECT 1")).scalar()}
+
+    return app
+
+
+def _requests(app: FastAPI, count: int) -> Callable[[], object]:
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    async def run():
+        for index in range(count):
+            scope = {
+                "type": "http",
+                "asgi": {"version": "3.0"},
+                "http_version": "1.1",
+                "method": "GET",
+                "scheme": "http",
+                "path": f"/benchmark/{index}",
+                "raw_path": f"/benchmark/{index}".encode(),
+                "root_path": "",
+                "query_string": b"",
+                "headers": [],
+                "server": ("benchmark", 80),
+                "client": ("benchmark", 1234),
+            }
+            await app(scope, receive, send)
+    return lambda: asyncio.run(run())
+
+
+def _statements(engine, count: int) -> Callable[[], object]:
+    def run():
+        token = current_query_stats.set(QueryStats())
+        try:
+            with engine.connect() as connection:
+                for _ in range(count):
+                    connection.execute(text("SELECT 1")).scalar()
+        finally:
+            current_query_stats.reset(token)
+    return run
+
+
+def _duration(func: Callable[[], object]) -> float:
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def _compare(label: str, count: int, baseline: Callable[[], object], instrumented: Callable[[], object], repeat: int) -> None:
+    baseline_best = min(_duration(baseline) for _ in range(repeat))
+    instrumented_best = min(_duration(instrumented) for _ in range(repeat))
+    overhead = (instrumented_best - baseline_best) / baseline_best * 100
+    per_item = (instrumented_best - baseline_best) / count * 1_000_000
+    print(
+        f"{label:<12} {baseline_best * 1000:10.2f} ms {instrumented_best * 1000:10.2f} ms "
+        f"{per_item:8.2f} us/item {overhead:8.1f} %"
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--statements", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    plain_engine = create_engine("sqlite://")
+    instrumented_engine = create_engine("sqlite://")
+    _instrument(instrumented_engine, "benchmark")
+
+    print(f"best of {args.repeat}{'':<6}{'baseline':>10}{'instrumented':>16}{'overhead':>25}")
+    _compare(
+        "requests",
+        args.requests,
+        _requests(_app(instrumented=False), args.requests),
+        _requests(_app(instrumented=True), args.requests),
+        args.repeat,
+    )
+    _compare(
+        "statements",
+        args.statements,
+        _statements(plain_engine, args.statements),
+        _statements(instrumented_engine, args.statements),
+        args.repeat,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""Time participant creation and lookup with many existing participants.
+
+Run from the repository root with the application's environment loaded and
+the migrations applied:
+
+    python -m benchmarks.participant_benchmark --existing 10000000 --new 2000
+
+--existing participants are seeded with benchmarks.seed, then --new
+participants are created with ParticipantService.get_or_create_participant_id,
+each in its own transaction as a ballot submission does, and the same emails
+are resolved again as existing participants. Aliases come from the keyed
+permutation, so creation shouldn't slow down as the table grows. The
+participants are deleted afterwards unless --keep is given.
+"""
+import argparse
+import time
+import uuid
+
+from sqlalchemy import delete, text
+
+from app.core.security import data_protection
+from app.database.session import SessionLocal
+from app.models import Participant
+from app.services.participant_service import ParticipantService
+from benchmarks.results import emit, summarize_latencies
+from benchmarks.seed import delete_participants, seed_participants
+
+DELETE_CHUNK_SIZE = 10000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--existing", type=int, default=10000000)
+    parser.add_argument("--new", type=int, default=2000)
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded participants")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+    run_id = uuid.uuid4().hex[:8]
+    emails = [f"new-{run_id}-{index}@example.com" for index in range(args.new)]
+
+    results = {}
+    with SessionLocal() as db:
+        start = time.perf_counter()
+        participant_ids = seed_participants(db=db, count=args.existing, run_id=run_id)
+        db.commit()
+        db.execute(text("ANALYZE participant"))
+        db.commit()
+        results["seed_seconds"] = time.perf_counter() - start
+
+        try:
+            for label in ("create", "lookup"):
+                durations = []
+                for email in emails:
+                    start = time.perf_counter()
+                    ParticipantService.get_or_create_participant_id(db=db, email=email)
+                    db.commit()
+                    durations.append(time.perf_counter() - start)
+                results[label] = summarize_latencies(durations)
+        finally:
+            db.rollback()
+            email_hashes = data_protection.hash_many(emails)
+            for start in range(0, len(email_hashes), DELETE_CHUNK_SIZE):
+                db.execute(
+                    delete(Participant).where(
+                        Participant.email_hash.in_(email_hashes[start:start + DELETE_CHUNK_SIZE])
+                    )
+                )
+            if not args.keep:
+                delete_participants(db=db, participant_ids=participant_ids)
+            db.commit()
+
+    emit("participant", vars(args), results, output=args.output)
+
+
+if __name__ == "__main__":
+    main()
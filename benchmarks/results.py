@@ -0,0 +1,56 @@
+"""JSON results shared by the benchmarks, so runs can be compared across releases."""
+import json
+import os
+import platform
+import statistics
+import subprocess
+from datetime import datetime, timezone
+from typing import Optional
+
+
+def summarize_latencies(latencies: list[float]) -> dict:
+    """Count, mean and percentiles of latencies in seconds, reported in milliseconds."""
+    if not latencies:
+        return {"count": 0}
+    ordered = sorted(latencies)
+    if len(ordered) > 1:
+        percentiles = statistics.quantiles(ordered, n=100, method="inclusive")
+    else:
+        percentiles = ordered * 99
+    return {
+        "count": len(ordered),
+        "mean_ms": statistics.fmean(ordered) * 1000,
+        "p50_ms": percentiles[49] * 1000,
+        "p90_ms": percentiles[89] * 1000,
+        "p99_ms": percentiles[98] * 1000,
+        "max_ms": ordered[-1] * 1000,
+    }
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def emit(benchmark: str, parameters: dict, results: dict, output: Optional[str] = None) -> dict:
+    """Print the results as JSON, or write them to output, with the run's context."""
+    report = {
+        "benchmark": benchmark,
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "git_commit": _git_commit(),
+        "python": platform.python_version(),
+        "cpu_count": os.cpu_count(),
+        "parameters": parameters,
+        "results": results,
+    }
+    text = json.dumps(report, indent=2, default=str)
+    if output:
+        with open(output, "w") as file:
+            file.write(text + "\n")
+    else:
+        print(text)
+    return report
@@ -0,0 +1,160 @@
+"""Seed the database with participants, lotteries and ballots for load tests.
+
+Run from the repository root with the application's environment loaded and
+the migrations applied:
+
+    python -m benchmarks.seed --participants 100000 --ballots 1000000 --output seed.json
+
+Lotteries are created for every draw date open for submissions, today up to
+LOTTERY_DRAW_DATE_MAX_DAYS_AHEAD days ahead, with their partitions. Rows are
+loaded with COPY, ballots spread uniformly over the lotteries and
+participants. Seeded emails contain a per-run id, so seeding can be repeated
+on the same database.
+"""
+import argparse
+import io
+import random
+import time
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from typing import Iterable, Iterator
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.core.security import data_protection
+from app.core.settings import settings
+from app.crud.ballot_partition_crud import BallotPartitionCRUD
+from app.crud.lottery_ballot_count_crud import LotteryBallotCountCRUD
+from app.database.session import SessionLocal
+from app.models import Participant
+from app.services.alias_allocator import alias_allocator
+from app.services.lottery_service import LotteryService
+from benchmarks.results import emit
+
+COPY_CHUNK_SIZE = 100000
+
+
+def _chunks(rows: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for row in rows:
+        chunk.append(row)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def _copy(db: Session, table: str, columns: list[str], rows: Iterable[tuple]) -> None:
+    """COPY rows in the text format, in chunks to bound memory use.
+
+    Values must not contain tabs, newlines or backslashes, bytes are written
+    in the bytea hex format.
+    """
+    cursor = db.connection().connection.cursor()
+    for chunk in _chunks(rows, COPY_CHUNK_SIZE):
+        buffer = io.StringIO()
+        for row in chunk:
+            buffer.write(
+                "\t".join(f"\\\\x{value.hex()}" if isinstance(value, bytes) else str(value) for value in row)
+            )
+            buffer.write("\n")
+        buffer.seek(0)
+        cursor.copy_expert(f"COPY {table} ({', '.join(columns)}) FROM STDIN", buffer)
+
+
+def seed_participants(db: Session, count: int, run_id: str) -> list[UUID]:
+    """Create participants with the same encryption, hashing and aliases as the service."""
+    ids = [uuid.uuid4() for _ in range(count)]
+    for chunk in _chunks(range(count), COPY_CHUNK_SIZE):
+        emails = [f"seed-{run_id}-{index}@example.com" for index in chunk]
+        encrypted_emails = data_protection.encrypt_many(emails)
+        email_hashes = data_protection.hash_many(emails)
+        aliases = alias_allocator.next_aliases(db=db, count=len(chunk))
+        _copy(
+            db,
+            "participant",
+            ["id", "email", "email_hash", "alias"],
+            zip([ids[index] for index in chunk], encrypted_emails, email_hashes, aliases),
+        )
+    return ids
+
+
+def delete_participants(db: Session, participant_ids: list[UUID], chunk_size: int = 10000) -> None:
+    """Delete seeded participants, in chunks to keep the statements small."""
+    for start in range(0, len(participant_ids), chunk_size):
+        db.execute(delete(Participant).where(Participant.id.in_(participant_ids[start:start + chunk_size])))
+
+
+def seed_lotteries(db: Session, draw_dates: list[date]) -> dict[date, UUID]:
+    """Create the lotteries and ballot partitions of the draw dates that don't have them."""
+    existing_partitions = BallotPartitionCRUD.get_partitions(db=db)
+    for draw_date in draw_dates:
+        if draw_date not in existing_partitions:
+            BallotPartitionCRUD.create_partition(db=db, draw_date=draw_date)
+    return LotteryService.get_or_create_lottery_ids(db=db, draw_dates=draw_dates)
+
+
+def seed_ballots(
+    db: Session, lottery_ids: dict[date, UUID], participant_ids: list[UUID], count: int
+) -> None:
+    """Create ballots spread uniformly over the lotteries and participants."""
+    lotteries = list(lottery_ids.items())
+    counts = {lottery_id: 0 for lottery_id in lottery_ids.values()}
+    created_at = datetime.now(timezone.utc).isoformat()
+
+    def rows():
+        for _ in range(count):
+            draw_date, lottery_id = random.choice(lotteries)
+            counts[lottery_id] += 1
+            yield uuid.uuid4(), draw_date, created_at, random.choice(participant_ids), lottery_id
+
+    _copy(db, "ballot", ["id", "draw_date", "created_at", "participant_id", "lottery_id"], rows())
+    LotteryBallotCountCRUD.increment(
+        db=db, counts={lottery_id: n for lottery_id, n in counts.items() if n}
+    )
+
+
+def submission_window() -> list[date]:
+    today = datetime.now(ZoneInfo("Europe/Amsterdam")).date()
+    return [today + timedelta(days=days) for days in range(settings.LOTTERY_DRAW_DATE_MAX_DAYS_AHEAD + 1)]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--participants", type=int, default=100000)
+    parser.add_argument("--ballots", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=None, help="Random seed of the ballot distribution")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+    random.seed(args.seed)
+    run_id = uuid.uuid4().hex[:8]
+
+    results = {"run_id": run_id}
+    with SessionLocal() as db:
+        start = time.perf_counter()
+        participant_ids = seed_participants(db=db, count=args.participants, run_id=run_id)
+        db.commit()
+        results["participants_seconds"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        lottery_ids = seed_lotteries(db=db, draw_dates=submission_window())
+        db.commit()
+        results["lotteries"] = len(lottery_ids)
+        results["lotteries_seconds"] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        seed_ballots(db=db, lottery_ids=lottery_ids, participant_ids=participant_ids, count=args.ballots)
+        db.commit()
+        results["ballots_seconds"] = time.perf_counter() - start
+
+    results["participants_per_second"] = args.participants / results["participants_seconds"]
+    results["ballots_per_second"] = args.ballots / results["ballots_seconds"]
+    emit("seed", vars(args), results, output=args.output)
+
+
+if __name__ == "__main__":
+    main()
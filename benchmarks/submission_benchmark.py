@@ -0,0 +1,121 @@
+"""Compare the throughput of BallotService.submit_batch with looped single submissions.
+
+Run from the repository root with the application's environment loaded and
+the migrations applied:
+
+    python -m benchmarks.submission_benchmark --ballots 2000 --batch-sizes 1000,10000
+
+--ballots ballots are submitted one by one with submit_by_lottery_draw_date,
+each in its own transaction as the single-ballot endpoint does, then in
+batches of each --batch-sizes with submit_batch. Every ballot is from a new
+participant, the most expensive case for both paths, for tomorrow's lottery.
+Only the service calls are timed, not the validation of the request bodies.
+The speedup is the batch throughput over the single-ballot throughput. The
+ballots and participants are deleted afterwards.
+"""
+import argparse
+import time
+import uuid
+from collections import Counter
+from datetime import date, datetime, timedelta
+from uuid import UUID
+from zoneinfo import ZoneInfo
+
+from sqlalchemy import delete
+from sqlalchemy.orm import Session
+
+from app.core.security import data_protection
+from app.crud.lottery_ballot_count_crud import LotteryBallotCountCRUD
+from app.database.session import SessionLocal
+from app.models import Ballot, Participant
+from app.schemas.ballot import SubmitBallotBatchItem
+from app.services.ballot_service import BallotService
+from benchmarks.results import emit
+from benchmarks.seed import seed_lotteries
+
+DELETE_CHUNK_SIZE = 10000
+
+
+def _emails(run_id: str, label: str, count: int) -> list[str]:
+    return [f"submit-{run_id}-{label}-{index}@example.com" for index in range(count)]
+
+
+def _submit_singles(db: Session, emails: list[str], draw_date: date) -> list[UUID]:
+    return [
+        BallotService.submit_by_lottery_draw_date(db=db, email=email, draw_date=draw_date).id
+        for email in emails
+    ]
+
+
+def _submit_batches(db: Session, batches: list[list[SubmitBallotBatchItem]]) -> list[UUID]:
+    ballot_ids = []
+    for batch in batches:
+        response = BallotService.submit_batch(db=db, ballots=batch)
+        ballot_ids.extend(result.ballot_id for result in response.results)
+    return ballot_ids
+
+
+def _delete(db: Session, lottery_id: UUID, draw_date: date, ballot_ids: list[UUID], emails: list[str]) -> None:
+    for start in range(0, len(ballot_ids), DELETE_CHUNK_SIZE):
+        db.execute(
+            delete(Ballot).where(
+                Ballot.draw_date == draw_date, Ballot.id.in_(ballot_ids[start:start + DELETE_CHUNK_SIZE])
+            )
+        )
+    LotteryBallotCountCRUD.increment(db=db, counts=Counter({lottery_id: -len(ballot_ids)}))
+    email_hashes = data_protection.hash_many(emails)
+    for start in range(0, len(email_hashes), DELETE_CHUNK_SIZE):
+        db.execute(
+            delete(Participant).where(
+                Participant.email_hash.in_(email_hashes[start:start + DELETE_CHUNK_SIZE])
+            )
+        )
+    db.commit()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--ballots", type=int, default=2000)
+    parser.add_argument("--batch-sizes", default="1000,10000")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+    batch_sizes = [int(size) for size in args.batch_sizes.split(",")]
+    run_id = uuid.uuid4().hex[:8]
+    draw_date = datetime.now(ZoneInfo("Europe/Amsterdam")).date() + timedelta(days=1)
+
+    results = {}
+    # Ballots are read after their transaction, like the API's async sessions do
+    with SessionLocal(expire_on_commit=False) as db:
+        lottery_id = seed_lotteries(db=db, draw_dates=[draw_date])[draw_date]
+        db.commit()
+
+        emails = _emails(run_id, "single", args.ballots)
+        start = time.perf_counter()
+        ballot_ids = _submit_singles(db=db, emails=emails, draw_date=draw_date)
+        seconds = time.perf_counter() - start
+        _delete(db=db, lottery_id=lottery_id, draw_date=draw_date, ballot_ids=ballot_ids, emails=emails)
+        single_rate = args.ballots / seconds
+        results["single"] = {"seconds": seconds, "ballots_per_second": single_rate}
+
+        for batch_size in batch_sizes:
+            emails = _emails(run_id, f"batch{batch_size}", max(args.ballots, batch_size))
+            # Validated like the endpoint's request body, before the timed part
+            items = [SubmitBallotBatchItem(email=email, draw_date=draw_date) for email in emails]
+            batches = [items[start:start + batch_size] for start in range(0, len(items), batch_size)]
+            start = time.perf_counter()
+            ballot_ids = _submit_batches(db=db, batches=batches)
+            seconds = time.perf_counter() - start
+            _delete(db=db, lottery_id=lottery_id, draw_date=draw_date, ballot_ids=ballot_ids, emails=emails)
+            rate = len(emails) / seconds
+            results[f"batch_{batch_size}"] = {
+                "ballots": len(emails),
+                "seconds": seconds,
+                "ballots_per_second": rate,
+                "speedup": rate / single_rate,
+            }
+
+    emit("submission", vars(args), results, output=args.output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Made lottery draw_date unique
+
+Revision ID: 3f9c1d2e7a4b
+Revises: aa03401e3a2e
+Create Date: 2025-06-02 10:14:27.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9c1d2e7a4b'
+down_revision: Union[str, None] = 'aa03401e3a2e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Concurrent submissions could create several lotteries for the same draw
+    # date. Keep the oldest one, move the ballots of the others onto it and
+    # remove the duplicates before adding the unique index.
+    op.execute(
+        """
+        CREATE TEMPORARY TABLE lottery_duplicate ON COMMIT DROP AS
+        SELECT id, keep_id
+        FROM (
+            SELECT
+                id,
+                first_value(id) OVER (
+                    PARTITION BY draw_date ORDER BY created_at NULLS LAST, id
+                ) AS keep_id
+            FROM lottery
+        ) ranked
+        WHERE id <> keep_id
+        """
+    )
+    op.execute(
+        """
+        UPDATE ballot
+        SET lottery_id = lottery_duplicate.keep_id
+        FROM lottery_duplicate
+        WHERE ballot.lottery_id = lottery_duplicate.id
+        """
+    )
+    op.execute("DELETE FROM lottery WHERE id IN (SELECT id FROM lottery_duplicate)")
+
+    op.drop_index(op.f('ix_lottery_draw_date'), table_name='lottery')
+    op.create_index(op.f('ix_lottery_draw_date'), 'lottery', ['draw_date'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_lottery_draw_date'), table_name='lottery')
+    op.create_index(op.f('ix_lottery_draw_date'), 'lottery', ['draw_date'], unique=False)
@@ -0,0 +1,43 @@
+"""Added LotteryBallotCount table
+
+Revision ID: 544368797141
+Revises: 7f42f44933f3
+Create Date: 2025-06-06 14:22:51.730946
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '544368797141'
+down_revision: Union[str, None] = '7f42f44933f3'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('lottery_ballot_count',
+    sa.Column('lottery_id', sa.UUID(), nullable=False),
+    sa.Column('shard', sa.SmallInteger(), nullable=False),
+    sa.Column('ballot_count', sa.BigInteger(), nullable=False),
+    sa.ForeignKeyConstraint(['lottery_id'], ['lottery.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('lottery_id', 'shard')
+    )
+    # Backfill the counters of existing lotteries into shard 0
+    op.execute(
+        """
+        INSERT INTO lottery_ballot_count (lottery_id, shard, ballot_count)
+        SELECT lottery_id, 0, count(*)
+        FROM ballot
+        GROUP BY lottery_id
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('lottery_ballot_count')
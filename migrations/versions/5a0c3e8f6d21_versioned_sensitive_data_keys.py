@@ -0,0 +1,55 @@
+"""Versioned sensitive data keys
+
+Revision ID: 5a0c3e8f6d21
+Revises: d4e7a9c1b350
+Create Date: 2025-06-12 14:03:27.118540
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5a0c3e8f6d21'
+down_revision: Union[str, None] = 'd4e7a9c1b350'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Versioned hashes are prefixed with their key id
+    op.alter_column(
+        'participant',
+        'email_hash',
+        existing_type=sa.String(length=64),
+        type_=sa.String(length=96),
+        existing_nullable=False,
+    )
+    op.create_table('key_rotation_progress',
+    sa.Column('key_id', sa.String(length=16), nullable=False),
+    sa.Column('last_participant_id', sa.UUID(), nullable=True),
+    sa.Column('scanned_count', sa.BigInteger(), nullable=False),
+    sa.Column('rotated_count', sa.BigInteger(), nullable=False),
+    sa.Column('started_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=False),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('key_id')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema.
+
+    Only possible once all participants are back on the legacy key version.
+    """
+    op.drop_table('key_rotation_progress')
+    op.alter_column(
+        'participant',
+        'email_hash',
+        existing_type=sa.String(length=96),
+        type_=sa.String(length=64),
+        existing_nullable=False,
+    )
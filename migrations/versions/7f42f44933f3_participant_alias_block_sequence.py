@@ -0,0 +1,39 @@
+"""Added participant alias block sequence
+
+Revision ID: 7f42f44933f3
+Revises: 3f9c1d2e7a4b
+Create Date: 2025-06-04 09:41:12.083517
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7f42f44933f3'
+down_revision: Union[str, None] = '3f9c1d2e7a4b'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Each value reserves a block of 1000 alias indexes (see AliasAllocator).
+    # Alias indexes must stay below 2**62, the domain of the alias permutation.
+    op.execute(
+        """
+        CREATE SEQUENCE participant_alias_block_seq
+        AS bigint
+        INCREMENT BY 1000
+        MINVALUE 0
+        MAXVALUE 4611686018427386904
+        START WITH 0
+        NO CYCLE
+        """
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP SEQUENCE participant_alias_block_seq")
@@ -0,0 +1,58 @@
+"""Added ballot lottery_id and participant_id indexes
+
+Revision ID: 934e033c9362
+Revises: 544368797141
+Create Date: 2025-06-09 11:05:37.264410
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '934e033c9362'
+down_revision: Union[str, None] = '544368797141'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # CREATE INDEX CONCURRENTLY doesn't block ballot submissions but can't run
+    # inside a transaction. IF NOT EXISTS makes the migration safe to re-run
+    # after an interrupted build (drop any INVALID index left behind first).
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_ballot_lottery_id_id',
+            'ballot',
+            ['lottery_id', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_ballot_participant_id_id',
+            'ballot',
+            ['participant_id', 'id'],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            'ix_ballot_participant_id_id',
+            table_name='ballot',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            'ix_ballot_lottery_id_id',
+            table_name='ballot',
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -0,0 +1,45 @@
+"""Weighted multiple winner draws
+
+Revision ID: a7c2e5f8b364
+Revises: f3a9c6e2d815
+Create Date: 2025-06-18 14:03:52.917406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a7c2e5f8b364'
+down_revision: Union[str, None] = 'f3a9c6e2d815'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    The new columns have constant defaults, so existing rows (including the
+    ballot partitions) aren't rewritten. Existing winning ballots were the
+    only winner of their lottery and get rank 1.
+    """
+    op.add_column('ballot', sa.Column('weight', sa.SmallInteger(), server_default='1', nullable=False))
+    op.add_column('lottery', sa.Column('winner_count', sa.SmallInteger(), server_default='1', nullable=False))
+    op.add_column('winning_ballot', sa.Column('rank', sa.SmallInteger(), server_default='1', nullable=False))
+    op.alter_column('winning_ballot', 'rank', server_default=None)
+    op.create_index(
+        'ix_winning_ballot_draw_date_rank', 'winning_ballot', ['draw_date', 'rank'], unique=True
+    )
+    op.drop_index(op.f('ix_winning_ballot_draw_date'), table_name='winning_ballot')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DELETE FROM winning_ballot WHERE rank > 1")
+    op.create_index(op.f('ix_winning_ballot_draw_date'), 'winning_ballot', ['draw_date'], unique=True)
+    op.drop_index('ix_winning_ballot_draw_date_rank', table_name='winning_ballot')
+    op.drop_column('winning_ballot', 'rank')
+    op.drop_column('lottery', 'winner_count')
+    op.drop_column('ballot', 'weight')
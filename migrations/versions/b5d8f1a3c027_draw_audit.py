@@ -0,0 +1,46 @@
+"""Draw audit
+
+Revision ID: b5d8f1a3c027
+Revises: a7c2e5f8b364
+Create Date: 2025-06-20 11:27:44.162835
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b5d8f1a3c027'
+down_revision: Union[str, None] = 'a7c2e5f8b364'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Earlier draws weren't recorded and can't be verified, they have no audit.
+    """
+    op.create_table(
+        'draw_audit',
+        sa.Column('draw_date', sa.Date(), nullable=False),
+        sa.Column('lottery_id', sa.UUID(), nullable=False),
+        sa.Column('algorithm', sa.String(length=64), nullable=False),
+        sa.Column('seed', sa.LargeBinary(), nullable=False),
+        sa.Column('ballot_digest', sa.LargeBinary(), nullable=False),
+        sa.Column('ballot_count', sa.BigInteger(), nullable=False),
+        sa.Column('total_weight', sa.BigInteger(), nullable=False),
+        sa.Column('winner_count', sa.SmallInteger(), nullable=False),
+        sa.Column('winning_ballot_ids', postgresql.ARRAY(sa.UUID()), nullable=False),
+        sa.Column('drawn_at', sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(['lottery_id'], ['lottery.id'], ondelete='CASCADE'),
+        sa.PrimaryKeyConstraint('draw_date'),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('draw_audit')
@@ -0,0 +1,186 @@
+"""Partition ballot by draw date
+
+Revision ID: b81d5c2f0a6e
+Revises: 934e033c9362
+Create Date: 2025-06-10 09:41:12.508213
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+from app.core.settings import settings
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b81d5c2f0a6e'
+down_revision: Union[str, None] = '934e033c9362'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    The ballot table is rebuilt as a table partitioned by range of draw date,
+    with one partition per day, and the existing ballots are copied over. This
+    rewrites every ballot and holds an exclusive lock on ballot meanwhile, so it
+    should run in a maintenance window.
+    """
+    op.execute("CREATE SCHEMA IF NOT EXISTS ballot_archive")
+
+    # Winning ballots no longer reference ballot, copy what they need from it
+    op.drop_constraint('winning_ballot_ballot_id_fkey', 'winning_ballot', type_='foreignkey')
+    op.add_column('winning_ballot', sa.Column('draw_date', sa.Date(), nullable=True))
+    op.add_column('winning_ballot', sa.Column('participant_id', sa.UUID(), nullable=True))
+    op.add_column(
+        'winning_ballot', sa.Column('ballot_created_at', sa.DateTime(timezone=True), nullable=True)
+    )
+    op.execute(
+        """
+        UPDATE winning_ballot
+        SET draw_date = lottery.draw_date,
+            participant_id = ballot.participant_id,
+            ballot_created_at = ballot.created_at
+        FROM ballot
+        JOIN lottery ON lottery.id = ballot.lottery_id
+        WHERE ballot.id = winning_ballot.ballot_id
+        """
+    )
+    op.alter_column('winning_ballot', 'draw_date', nullable=False)
+    op.alter_column('winning_ballot', 'participant_id', nullable=False)
+    op.create_foreign_key(
+        'winning_ballot_participant_id_fkey',
+        'winning_ballot',
+        'participant',
+        ['participant_id'],
+        ['id'],
+        ondelete='CASCADE',
+    )
+    op.create_index(op.f('ix_winning_ballot_draw_date'), 'winning_ballot', ['draw_date'], unique=False)
+
+    # Move the current table aside, freeing the constraint and index names
+    op.rename_table('ballot', 'ballot_unpartitioned')
+    op.execute("ALTER TABLE ballot_unpartitioned RENAME CONSTRAINT ballot_pkey TO ballot_unpartitioned_pkey")
+    op.drop_index('ix_ballot_lottery_id_id', table_name='ballot_unpartitioned')
+    op.drop_index('ix_ballot_participant_id_id', table_name='ballot_unpartitioned')
+
+    op.create_table('ballot',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('draw_date', sa.Date(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('participant_id', sa.UUID(), nullable=False),
+    sa.Column('lottery_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['lottery_id'], ['lottery.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['participant_id'], ['participant.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id', 'draw_date'),
+    postgresql_partition_by='RANGE (draw_date)',
+    )
+
+    # Partitions for every existing lottery and for the submission window. The
+    # daily maintenance task keeps creating them ahead from here on.
+    days_ahead = settings.LOTTERY_DRAW_DATE_MAX_DAYS_AHEAD + settings.BALLOT_PARTITION_PREMAKE_DAYS
+    op.execute(
+        f"""
+        DO $$
+        DECLARE
+            partition_date date;
+        BEGIN
+            FOR partition_date IN
+                SELECT draw_date FROM lottery
+                UNION
+                SELECT generate_series(
+                    (now() AT TIME ZONE 'Europe/Amsterdam')::date,
+                    (now() AT TIME ZONE 'Europe/Amsterdam')::date + {days_ahead},
+                    interval '1 day'
+                )::date
+            LOOP
+                EXECUTE format(
+                    'CREATE TABLE %I PARTITION OF ballot FOR VALUES FROM (%L) TO (%L)',
+                    'ballot_p' || to_char(partition_date, 'YYYYMMDD'),
+                    partition_date,
+                    partition_date + 1
+                );
+            END LOOP;
+        END
+        $$
+        """
+    )
+    op.execute(
+        """
+        INSERT INTO ballot (id, draw_date, created_at, participant_id, lottery_id)
+        SELECT ballot_unpartitioned.id, lottery.draw_date, ballot_unpartitioned.created_at,
+               ballot_unpartitioned.participant_id, ballot_unpartitioned.lottery_id
+        FROM ballot_unpartitioned
+        JOIN lottery ON lottery.id = ballot_unpartitioned.lottery_id
+        """
+    )
+    op.drop_table('ballot_unpartitioned')
+
+    # Indexes on the partitioned table are created on every partition, after
+    # the copy so they are built in one pass
+    op.create_index('ix_ballot_lottery_id_id', 'ballot', ['lottery_id', 'id'], unique=False)
+    op.create_index('ix_ballot_participant_id_id', 'ballot', ['participant_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema.
+
+    Only the attached partitions are copied back, so the downgrade refuses to
+    run while partitions are archived rather than losing their ballots. Move
+    them back to the public schema and attach them, or drop them, first.
+    """
+    op.execute(
+        """
+        DO $$
+        BEGIN
+            IF EXISTS (SELECT 1 FROM pg_tables WHERE schemaname = 'ballot_archive') THEN
+                RAISE EXCEPTION 'Ballot partitions are archived in the ballot_archive schema, '
+                    'attach or drop them before downgrading';
+            END IF;
+        END
+        $$
+        """
+    )
+    op.rename_table('ballot', 'ballot_partitioned')
+    op.execute("ALTER TABLE ballot_partitioned RENAME CONSTRAINT ballot_pkey TO ballot_partitioned_pkey")
+    op.drop_index('ix_ballot_lottery_id_id', table_name='ballot_partitioned')
+    op.drop_index('ix_ballot_participant_id_id', table_name='ballot_partitioned')
+
+    op.create_table('ballot',
+    sa.Column('id', sa.UUID(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('participant_id', sa.UUID(), nullable=False),
+    sa.Column('lottery_id', sa.UUID(), nullable=False),
+    sa.ForeignKeyConstraint(['lottery_id'], ['lottery.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['participant_id'], ['participant.id'], ondelete='CASCADE'),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(
+        """
+        INSERT INTO ballot (id, created_at, participant_id, lottery_id)
+        SELECT id, created_at, participant_id, lottery_id
+        FROM ballot_partitioned
+        """
+    )
+    op.drop_table('ballot_partitioned')
+    op.create_index('ix_ballot_lottery_id_id', 'ballot', ['lottery_id', 'id'], unique=False)
+    op.create_index('ix_ballot_participant_id_id', 'ballot', ['participant_id', 'id'], unique=False)
+
+    # Winners of archived ballots can't be referenced anymore
+    op.execute("DELETE FROM winning_ballot WHERE ballot_id NOT IN (SELECT id FROM ballot)")
+    op.drop_index(op.f('ix_winning_ballot_draw_date'), table_name='winning_ballot')
+    op.drop_constraint('winning_ballot_participant_id_fkey', 'winning_ballot', type_='foreignkey')
+    op.drop_column('winning_ballot', 'ballot_created_at')
+    op.drop_column('winning_ballot', 'participant_id')
+    op.drop_column('winning_ballot', 'draw_date')
+    op.create_foreign_key(
+        'winning_ballot_ballot_id_fkey',
+        'winning_ballot',
+        'ballot',
+        ['ballot_id'],
+        ['id'],
+        ondelete='CASCADE',
+    )
+    op.execute("DROP SCHEMA IF EXISTS ballot_archive")
@@ -0,0 +1,48 @@
+"""Winning ballot participant alias
+
+Revision ID: c6f1a8d2b947
+Revises: 5a0c3e8f6d21
+Create Date: 2025-06-13 10:22:41.630914
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c6f1a8d2b947'
+down_revision: Union[str, None] = '5a0c3e8f6d21'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Existing winning ballots are backfilled with their participant's alias.
+    There is one winning ballot per draw date, so a single update is enough.
+    """
+    op.add_column('winning_ballot', sa.Column('participant_alias', sa.String(length=255), nullable=True))
+    op.execute(
+        """
+        UPDATE winning_ballot
+        SET participant_alias = participant.alias
+        FROM participant
+        WHERE participant.id = winning_ballot.participant_id
+        """
+    )
+    op.alter_column('winning_ballot', 'participant_alias', nullable=False)
+    op.create_index(
+        'ix_winning_ballot_participant_id_draw_date',
+        'winning_ballot',
+        ['participant_id', 'draw_date'],
+        unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_winning_ballot_participant_id_draw_date', table_name='winning_ballot')
+    op.drop_column('winning_ballot', 'participant_alias')
@@ -0,0 +1,52 @@
+"""Store participant email as raw Fernet token bytes
+
+Revision ID: d4e7a9c1b350
+Revises: b81d5c2f0a6e
+Create Date: 2025-06-11 10:17:44.902316
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd4e7a9c1b350'
+down_revision: Union[str, None] = 'b81d5c2f0a6e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The column held base64(Fernet token), where the token itself is url-safe
+    # base64 text. Both layers are decoded, leaving the raw token.
+    op.alter_column(
+        'participant',
+        'email',
+        existing_type=sa.String(length=512),
+        type_=sa.LargeBinary(),
+        existing_nullable=False,
+        postgresql_using=(
+            "decode(translate(convert_from(decode(email, 'base64'), 'UTF8'), '-_', '+/'), 'base64')"
+        ),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # encode(..., 'base64') wraps its output every 76 characters, the line
+    # breaks are removed after each encoding
+    op.alter_column(
+        'participant',
+        'email',
+        existing_type=sa.LargeBinary(),
+        type_=sa.String(length=512),
+        existing_nullable=False,
+        postgresql_using=(
+            "replace(encode(convert_to("
+            "translate(replace(encode(email, 'base64'), E'\\n', ''), '+/', '-_'), "
+            "'UTF8'), 'base64'), E'\\n', '')"
+        ),
+    )
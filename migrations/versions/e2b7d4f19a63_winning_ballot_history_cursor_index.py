@@ -0,0 +1,40 @@
+"""Winning ballot history cursor index
+
+Revision ID: e2b7d4f19a63
+Revises: c6f1a8d2b947
+Create Date: 2025-06-13 16:48:05.274117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e2b7d4f19a63'
+down_revision: Union[str, None] = 'c6f1a8d2b947'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # History pages are keyed on (draw_date, ballot_id)
+    op.create_index(
+        'ix_winning_ballot_participant_id_draw_date_ballot_id',
+        'winning_ballot',
+        ['participant_id', 'draw_date', 'ballot_id'],
+        unique=False,
+    )
+    op.drop_index('ix_winning_ballot_participant_id_draw_date', table_name='winning_ballot')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_index(
+        'ix_winning_ballot_participant_id_draw_date',
+        'winning_ballot',
+        ['participant_id', 'draw_date'],
+        unique=False,
+    )
+    op.drop_index('ix_winning_ballot_participant_id_draw_date_ballot_id', table_name='winning_ballot')
@@ -0,0 +1,56 @@
+"""Winning ballot unique draw date
+
+Revision ID: f3a9c6e2d815
+Revises: e2b7d4f19a63
+Create Date: 2025-06-16 09:12:37.508221
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f3a9c6e2d815'
+down_revision: Union[str, None] = 'e2b7d4f19a63'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema.
+
+    Concurrent draws could store several winning ballots for a lottery. Those
+    are not resolved here, which winner stands is not for a migration to
+    decide: the upgrade fails listing their draw dates instead.
+    """
+    if not context.is_offline_mode():
+        _check_duplicate_draw_dates()
+    op.drop_index(op.f('ix_winning_ballot_draw_date'), table_name='winning_ballot')
+    op.create_index(op.f('ix_winning_ballot_draw_date'), 'winning_ballot', ['draw_date'], unique=True)
+
+
+def _check_duplicate_draw_dates() -> None:
+    duplicate_draw_dates = op.get_bind().execute(
+        sa.text(
+            """
+            SELECT draw_date
+            FROM winning_ballot
+            GROUP BY draw_date
+            HAVING count(*) > 1
+            ORDER BY draw_date
+            """
+        )
+    ).scalars().all()
+    if duplicate_draw_dates:
+        raise RuntimeError(
+            "Lotteries with several winning ballots, keep one per draw date before upgrading: "
+            + ", ".join(str(draw_date) for draw_date in duplicate_draw_dates)
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_winning_ballot_draw_date'), table_name='winning_ballot')
+    op.create_index(op.f('ix_winning_ballot_draw_date'), 'winning_ballot', ['draw_date'], unique=False)
@@ -0,0 +1,36 @@
+"""Alias blocks of forked processes."""
+import os
+
+import pytest
+
+from app.services.alias_allocator import ALIAS_BLOCK_SIZE, AliasAllocator, alias_allocator
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="needs os.fork")
+def test_forked_processes_drop_the_inherited_block(monkeypatch):
+    monkeypatch.setattr(alias_allocator, "_next_index", 0)
+    monkeypatch.setattr(alias_allocator, "_block_end", 0)
+    alias_allocator._add_block(ALIAS_BLOCK_SIZE)
+
+    read_fd, write_fd = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(read_fd)
+        os.write(write_fd, b"none" if alias_allocator._take_index() is None else b"index")
+        os._exit(0)
+    os.close(write_fd)
+    with os.fdopen(read_fd, "rb") as pipe:
+        child_index = pipe.read()
+    os.waitpid(pid, 0)
+
+    assert child_index == b"none"
+    assert alias_allocator._take_index() == ALIAS_BLOCK_SIZE
+
+
+def test_reset_after_fork_empties_the_block():
+    allocator = AliasAllocator(key=b"key")
+    allocator._add_block(0)
+
+    allocator.reset_after_fork()
+
+    assert allocator._take_index() is None
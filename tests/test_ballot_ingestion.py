@@ -0,0 +1,136 @@
+"""Queued ballot ingestion from submission to the draw, with Redis replaced by fakeredis."""
+from datetime import timedelta
+
+import pytest
+from sqlalchemy import func, select
+from sqlalchemy.exc import IntegrityError
+
+from app.core.settings import settings
+from app.exceptions.ballot import LotteryClosedException
+from app.models import Ballot
+from app.services import ballot_service
+from app.services.ballot_ingestion_queue import BallotIngestionQueue
+from app.services.ballot_service import BallotService
+from app.services.lottery_service import LotteryService
+from app.tasks import ballot_ingestion_consumer
+from app.tasks.ballot_ingestion_consumer import ingest
+from app.tasks.lottery_tasks import draw_lottery
+
+
+@pytest.fixture
+def queue(fake_redis, monkeypatch) -> BallotIngestionQueue:
+    """Queue ballot submissions in a fakeredis stream."""
+    queue = BallotIngestionQueue(redis_url="redis://fake", stream="test_ingestion")
+    queue.ensure_group()
+    monkeypatch.setattr(settings, "BALLOT_INGESTION_MODE", "queue")
+    monkeypatch.setattr(settings, "BALLOT_INGESTION_DRAIN_TIMEOUT_SECONDS", 0.0)
+    monkeypatch.setattr(ballot_service, "ballot_ingestion_queue", queue)
+    monkeypatch.setattr(ballot_ingestion_consumer, "ballot_ingestion_queue", queue)
+    return queue
+
+
+@pytest.fixture
+def unwritable_draw_date(draw_date, monkeypatch):
+    """A draw date whose ballots fail to be written, like ballots of a corrupted lottery would."""
+    unwritable_draw_date = draw_date + timedelta(days=1)
+    get_or_create_lottery_ids = LotteryService.get_or_create_lottery_ids
+
+    def failing_get_or_create_lottery_ids(db, draw_dates):
+        if unwritable_draw_date in draw_dates:
+            raise IntegrityError("INSERT INTO lottery", None, Exception("corrupted lottery"))
+        return get_or_create_lottery_ids(db=db, draw_dates=draw_dates)
+
+    monkeypatch.setattr(LotteryService, "get_or_create_lottery_ids", failing_get_or_create_lottery_ids)
+    return unwritable_draw_date
+
+
+async def enqueue(emails, draw_date) -> list:
+    return [
+        await BallotService.enqueue_by_lottery_draw_date_async(email=email, draw_date=draw_date)
+        for email in emails
+    ]
+
+
+def ballot_count(db, draw_date) -> int:
+    count = db.scalar(select(func.count()).select_from(Ballot).where(Ballot.draw_date == draw_date))
+    db.rollback()
+    return count
+
+
+@pytest.mark.anyio
+async def test_queued_ballots_are_written_before_the_draw(db, draw_date, queue, fake_redis):
+    ballot_ids = await enqueue(["a@example.com", "b@example.com", "a@example.com"], draw_date)
+    assert queue.pending_count(draw_date) == 3
+    assert ballot_count(db, draw_date) == 0
+
+    ingest(queue.read(consumer="test", count=10, block_ms=1))
+
+    assert set(db.scalars(select(Ballot.id).where(Ballot.draw_date == draw_date))) == set(ballot_ids)
+    db.rollback()
+    assert queue.pending_count(draw_date) == 0
+    assert fake_redis.xlen(queue.stream) == 0
+    assert BallotService.wait_for_queued_ballots(draw_date=draw_date)
+    with pytest.raises(LotteryClosedException):
+        await enqueue(["late@example.com"], draw_date)
+
+
+@pytest.mark.anyio
+async def test_queued_ballots_keep_their_weight(db, draw_date, queue):
+    ballot_id = await BallotService.enqueue_by_lottery_draw_date_async(
+        email="a@example.com", draw_date=draw_date, weight=3
+    )
+
+    ingest(queue.read(consumer="test", count=10, block_ms=1))
+
+    assert db.scalar(select(Ballot.weight).where(Ballot.id == ballot_id)) == 3
+
+
+@pytest.mark.anyio
+async def test_ingesting_again_is_a_no_op(db, draw_date, queue):
+    await enqueue(["a@example.com", "b@example.com"], draw_date)
+    ballots = queue.read(consumer="test", count=10, block_ms=1)
+
+    ingest(ballots)
+    # A consumer that took over the ballots before they were acknowledged
+    ingest(ballots)
+
+    assert ballot_count(db, draw_date) == 2
+    assert queue.pending_count(draw_date) == 0
+
+
+@pytest.mark.anyio
+async def test_failing_ballots_are_dead_lettered(db, draw_date, unwritable_draw_date, queue, fake_redis):
+    await enqueue(["a@example.com"], draw_date)
+    await enqueue(["b@example.com"], unwritable_draw_date)
+
+    ingest(queue.read(consumer="test", count=10, block_ms=1))
+
+    assert ballot_count(db, draw_date) == 1
+    assert ballot_count(db, unwritable_draw_date) == 0
+    dead_letters = fake_redis.xrange(queue.dead_letter_stream)
+    assert [fields[b"draw_date"] for _, fields in dead_letters] == [unwritable_draw_date.isoformat().encode()]
+    assert queue.pending_count(unwritable_draw_date) == 0
+    assert fake_redis.xlen(queue.stream) == 0
+
+
+@pytest.mark.anyio
+async def test_failing_single_ballot_is_dead_lettered(unwritable_draw_date, queue, fake_redis):
+    await enqueue(["a@example.com"], unwritable_draw_date)
+
+    ingest(queue.read(consumer="test", count=10, block_ms=1))
+
+    assert fake_redis.xlen(queue.dead_letter_stream) == 1
+    assert fake_redis.xlen(queue.stream) == 0
+
+
+@pytest.mark.anyio
+async def test_draw_waits_for_queued_ballots(db, draw_date, queue, monkeypatch):
+    await enqueue(["a@example.com"], draw_date)
+    drawn = []
+    monkeypatch.setattr(LotteryService, "draw_winners", lambda db, draw_date: drawn.append(draw_date))
+
+    result = draw_lottery(draw_date.isoformat())
+
+    assert result == {"draw_date": draw_date.isoformat(), "winning_ballot_ids": []}
+    assert drawn == []
+    assert queue.pending_count(draw_date) == 1
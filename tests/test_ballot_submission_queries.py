@@ -0,0 +1,78 @@
+"""Statements run by ballot submissions, so extra round trips don't come back unnoticed."""
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import event
+
+from app.database.session import async_engine, engine
+from app.schemas.ballot import SubmitBallotBatchItem
+from app.services.ballot_service import BallotService
+
+
+@contextmanager
+def captured_statements(sync_engine):
+    """Collect the first word of the statements run on an engine, e.g. SELECT or INSERT."""
+    statements = []
+
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement.split(None, 1)[0].upper())
+
+    event.listen(sync_engine, "before_cursor_execute", before_cursor_execute)
+    try:
+        yield statements
+    finally:
+        event.remove(sync_engine, "before_cursor_execute", before_cursor_execute)
+
+
+def test_submit_new_participant(db, draw_date):
+    # Takes the alias allocator's first block, if this process has none yet
+    BallotService.submit_by_lottery_draw_date(db=db, email="first@example.com", draw_date=draw_date)
+
+    with captured_statements(engine) as statements:
+        BallotService.submit_by_lottery_draw_date(db=db, email="new@example.com", draw_date=draw_date)
+
+    # Participant lookup and upsert, lottery upsert, counter increment, and the
+    # ballot insert at commit. No refresh SELECT after the inserts.
+    assert statements == ["SELECT", "WITH", "WITH", "INSERT", "INSERT"]
+
+
+def test_submit_existing_participant(db, draw_date):
+    BallotService.submit_by_lottery_draw_date(db=db, email="again@example.com", draw_date=draw_date)
+
+    with captured_statements(engine) as statements:
+        BallotService.submit_by_lottery_draw_date(db=db, email="again@example.com", draw_date=draw_date)
+
+    # The participant is found by its search hash, no alias or upsert needed
+    assert statements == ["SELECT", "WITH", "INSERT", "INSERT"]
+
+
+@pytest.mark.anyio
+async def test_submit_existing_participant_async(db, async_db, draw_date):
+    BallotService.submit_by_lottery_draw_date(db=db, email="again@example.com", draw_date=draw_date)
+
+    with captured_statements(async_engine.sync_engine) as statements:
+        ballot = await BallotService.submit_by_lottery_draw_date_async(
+            db=async_db, email="again@example.com", draw_date=draw_date
+        )
+
+    assert statements == ["SELECT", "WITH", "INSERT", "INSERT"]
+    # Readable after the commit without a refresh
+    with captured_statements(async_engine.sync_engine) as statements:
+        assert ballot.id and ballot.created_at
+    assert statements == []
+
+
+def test_submit_batch(db, draw_date):
+    BallotService.submit_by_lottery_draw_date(db=db, email="known@example.com", draw_date=draw_date)
+    ballots = [
+        SubmitBallotBatchItem(email=f"batch{index % 50}@example.com", draw_date=draw_date)
+        for index in range(200)
+    ] + [SubmitBallotBatchItem(email="known@example.com", draw_date=draw_date)]
+
+    with captured_statements(engine) as statements:
+        response = BallotService.submit_batch(db=db, ballots=ballots)
+
+    assert all(result.ballot_id and not result.error for result in response.results)
+    # Participant lookup and bulk insert, lottery lookup, ballot bulk insert
+    # and counter increment, however many ballots
+    assert statements == ["SELECT", "INSERT", "SELECT", "INSERT", "INSERT"]
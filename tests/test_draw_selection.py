@@ -0,0 +1,96 @@
+"""Distribution and reproducibility of the draw's weighted sampling.
+
+Draws are repeated with a fixed seed and the number of times each entry won is
+compared with its exact probability by a chi-square test. A p-value below
+0.001 means the draws are very unlikely to have the intended distribution.
+"""
+import math
+from collections import Counter
+from statistics import NormalDist
+
+import pytest
+
+from app.services.draw_selection import BallotSetDigest, DrawRandom, weighted_sample
+
+SEED = bytes(range(32))
+POPULATION = 20
+TRIALS = 20000
+MIN_P_VALUE = 0.001
+
+
+def chi_square_p_value(statistic: float, degrees_of_freedom: int) -> float:
+    """Upper tail of the chi-square distribution, with the Wilson-Hilferty approximation."""
+    k = degrees_of_freedom
+    z = ((statistic / k) ** (1 / 3) - (1 - 2 / (9 * k))) / math.sqrt(2 / (9 * k))
+    return 1 - NormalDist().cdf(z)
+
+
+@pytest.mark.parametrize(
+    "weights",
+    [[1] * POPULATION, [index % 4 + 1 for index in range(POPULATION)]],
+    ids=["equal_weights", "weights_1_to_4"],
+)
+def test_winners_are_drawn_in_proportion_to_their_weights(weights):
+    rng = DrawRandom(SEED)
+    entries = list(enumerate(weights))
+
+    counts = Counter(weighted_sample([entries], k=1, rng=rng)[0] for _ in range(TRIALS))
+
+    total_weight = sum(weights)
+    statistic = sum(
+        (counts[index] - TRIALS * weight / total_weight) ** 2 / (TRIALS * weight / total_weight)
+        for index, weight in entries
+    )
+    assert chi_square_p_value(statistic, len(entries) - 1) > MIN_P_VALUE
+
+
+@pytest.mark.parametrize("k", [2, 5, 10])
+def test_equal_weight_entries_win_equally_often(k):
+    rng = DrawRandom(SEED)
+    entries = [(index, 1) for index in range(POPULATION)]
+    trials = TRIALS // k
+
+    counts = Counter()
+    for _ in range(trials):
+        winners = weighted_sample([entries], k=k, rng=rng)
+        assert len(set(winners)) == k
+        counts.update(winners)
+
+    expected = trials * k / POPULATION
+    # An entry wins a draw or not, so its count's variance is expected * (1 - k / n)
+    variance = expected * (1 - k / POPULATION)
+    statistic = sum((counts[index] - expected) ** 2 / variance for index in range(POPULATION))
+    # The counts always add up to trials * k, which takes one degree of freedom
+    assert chi_square_p_value(statistic, POPULATION - 1) > MIN_P_VALUE
+
+
+def test_draws_are_reproducible_whatever_the_batches():
+    entries = [(f"ballot-{index:04d}", index % 3 + 1) for index in range(1000)]
+
+    winners = weighted_sample([entries], k=10, rng=DrawRandom(SEED))
+    batched = weighted_sample(
+        [entries[start:start + 64] for start in range(0, len(entries), 64)], k=10, rng=DrawRandom(SEED)
+    )
+
+    assert winners == batched
+    assert weighted_sample([entries], k=10, rng=DrawRandom(bytes(32))) != winners
+
+
+def test_fewer_entries_than_winners():
+    entries = [("a", 1), ("b", 0), ("c", 3)]
+
+    assert sorted(weighted_sample([entries], k=5, rng=DrawRandom(SEED))) == ["a", "c"]
+
+
+def test_digest_depends_on_the_ballots_not_the_batches():
+    entries = [(f"ballot-{index:04d}", 1) for index in range(100)]
+    whole = BallotSetDigest()
+    whole.update(entries)
+    batched = BallotSetDigest()
+    batched.update(entries[:30])
+    batched.update(entries[30:])
+    changed = BallotSetDigest()
+    changed.update(entries[:-1] + [("ballot-0099", 2)])
+
+    assert whole.digest() == batched.digest()
+    assert whole.digest() != changed.digest()
@@ -0,0 +1,58 @@
+"""Verification of audited draws against their ballots."""
+import pytest
+from sqlalchemy import text
+
+from app.crud.ballot_crud import BallotCRUD
+from app.schemas.ballot import SubmitBallotBatchItem
+from app.services.ballot_service import BallotService
+from app.services.lottery_service import LotteryService, draw_verification_cache
+
+
+@pytest.fixture
+def drawn_lottery(db, draw_date):
+    """A lottery of 20 ballots with a drawn winner."""
+    draw_verification_cache.clear()
+    BallotService.submit_batch(
+        db=db,
+        ballots=[SubmitBallotBatchItem(email=f"{index}@example.com", draw_date=draw_date) for index in range(20)],
+    )
+    LotteryService.draw_winners(db=db, draw_date=draw_date)
+    yield draw_date
+    draw_verification_cache.clear()
+
+
+@pytest.mark.anyio
+async def test_draw_verifies(async_db, drawn_lottery):
+    verification = await LotteryService.verify_draw_async(db=async_db, draw_date=drawn_lottery)
+
+    assert verification.verified
+    assert verification.ballot_count == 20
+    assert verification.winning_ballot_ids == verification.audit.winning_ballot_ids
+
+
+@pytest.mark.anyio
+async def test_verification_is_cached(async_db, drawn_lottery, monkeypatch):
+    first = await LotteryService.verify_draw_async(db=async_db, draw_date=drawn_lottery)
+
+    def stream_weights_by_lottery_id_async(**kwargs):
+        raise AssertionError("Ballots streamed again")
+
+    monkeypatch.setattr(BallotCRUD, "stream_weights_by_lottery_id_async", stream_weights_by_lottery_id_async)
+
+    assert await LotteryService.verify_draw_async(db=async_db, draw_date=drawn_lottery) == first
+
+
+@pytest.mark.anyio
+async def test_changed_ballots_dont_verify(db, async_db, drawn_lottery):
+    db.execute(text("UPDATE ballot SET weight = 2 WHERE id = (SELECT id FROM ballot ORDER BY id LIMIT 1)"))
+    db.commit()
+
+    verification = await LotteryService.verify_draw_async(db=async_db, draw_date=drawn_lottery)
+
+    assert not verification.ballots_match
+    assert not verification.verified
+
+
+@pytest.mark.anyio
+async def test_undrawn_lottery_has_no_verification(async_db, draw_date):
+    assert await LotteryService.verify_draw_async(db=async_db, draw_date=draw_date) is None
@@ -0,0 +1,20 @@
+"""Metrics recorded by the draw."""
+from app.core.metrics import draw_phase_duration_seconds, render_prometheus
+from app.schemas.ballot import SubmitBallotBatchItem
+from app.services.ballot_service import BallotService
+from app.services.lottery_service import LotteryService
+
+
+def test_draw_records_its_phases(db, draw_date, fake_redis, monkeypatch):
+    monkeypatch.setattr(draw_phase_duration_seconds, "_redis", None)
+    BallotService.submit_batch(
+        db=db,
+        ballots=[SubmitBallotBatchItem(email=f"{index}@example.com", draw_date=draw_date) for index in range(5)],
+    )
+
+    LotteryService.draw_winners(db=db, draw_date=draw_date)
+
+    values = draw_phase_duration_seconds.values()
+    assert set(values) == {("select",), ("commit",)}
+    assert all(count == 1 for _, _, count in values.values())
+    assert 'lottery_draw_phase_duration_seconds_count{phase="select"} 1' in render_prometheus()
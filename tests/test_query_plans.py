@@ -0,0 +1,75 @@
+"""Query plans of the hot queries, so a dropped index or lost partition pruning is noticed.
+
+The test tables are tiny, so sequential and bitmap scans are disabled to make
+the planner show which indexes it can use, and whether they serve the order.
+"""
+import uuid
+
+from sqlalchemy import text
+
+from app.crud.ballot_crud import BallotCRUD
+from app.crud.lottery_crud import LotteryCRUD
+from app.crud.winning_ballot_crud import WinningBallotCRUD
+from app.models import Ballot
+
+
+def plan_nodes(db, statement) -> list[dict]:
+    """EXPLAIN a statement and return its plan nodes, depth first."""
+    compiled = statement.compile(dialect=db.bind.dialect, compile_kwargs={"literal_binds": True})
+    db.execute(text("SET LOCAL enable_seqscan = off"))
+    db.execute(text("SET LOCAL enable_bitmapscan = off"))
+    plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {compiled}")).scalar()
+    db.rollback()
+    nodes = []
+    pending = [plan[0]["Plan"]]
+    while pending:
+        node = pending.pop()
+        nodes.append(node)
+        pending.extend(reversed(node.get("Plans", [])))
+    return nodes
+
+
+def scanned_relations(nodes) -> set[str]:
+    return {node["Relation Name"] for node in nodes if "Relation Name" in node}
+
+
+def test_draw_reads_one_partition_in_index_order(db, draw_date):
+    statement = BallotCRUD._weights_statement(lottery_id=uuid.uuid4(), draw_date=draw_date, batch_size=1000)
+
+    nodes = plan_nodes(db, statement)
+
+    assert scanned_relations(nodes) == {f"ballot_p{draw_date:%Y%m%d}"}
+    assert [node["Index Name"] for node in nodes if "Index Name" in node] == [
+        f"ballot_p{draw_date:%Y%m%d}_lottery_id_id_idx"
+    ]
+    # Ordered by the index, no sort of every ballot of the lottery
+    assert not any(node["Node Type"] in ("Sort", "Incremental Sort") for node in nodes)
+
+
+def test_ballot_lookup_reads_one_partition(db, draw_date):
+    statement = db.query(Ballot).filter_by(id=uuid.uuid4(), draw_date=draw_date).statement
+
+    nodes = plan_nodes(db, statement)
+
+    assert scanned_relations(nodes) == {f"ballot_p{draw_date:%Y%m%d}"}
+    assert any(node["Node Type"] in ("Index Scan", "Index Only Scan") for node in nodes)
+
+
+def test_participant_history_is_one_range_scan(db, draw_date):
+    statement = WinningBallotCRUD._participant_history_statement(
+        participant_id=uuid.uuid4(), after=(draw_date, uuid.uuid4()), limit=50
+    )
+
+    nodes = plan_nodes(db, statement)
+
+    assert scanned_relations(nodes) == {"winning_ballot"}
+    assert [node["Index Name"] for node in nodes if "Index Name" in node] == [
+        "ix_winning_ballot_participant_id_draw_date_ballot_id"
+    ]
+    assert not any(node["Node Type"] in ("Sort", "Incremental Sort") for node in nodes)
+
+
+def test_upcoming_lotteries_dont_read_ballots(db, draw_date):
+    nodes = plan_nodes(db, LotteryCRUD._upcoming_statement())
+
+    assert scanned_relations(nodes) == {"lottery", "lottery_ballot_count"}
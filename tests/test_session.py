@@ -0,0 +1,17 @@
+"""Connection pools of forked processes."""
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.database.replicas import ReadReplica
+from app.database.session import async_engine, dispose_engines_after_fork, engine, read_replicas
+
+
+def test_forked_processes_get_new_pools(monkeypatch):
+    url = "postgresql+asyncpg://replica@localhost/lottery"
+    replica = ReadReplica(url=url, engine=create_async_engine(url))
+    monkeypatch.setattr(read_replicas, "replicas", [replica])
+    pools = [engine.pool, async_engine.sync_engine.pool, replica.engine.sync_engine.pool]
+
+    dispose_engines_after_fork()
+
+    new_pools = [engine.pool, async_engine.sync_engine.pool, replica.engine.sync_engine.pool]
+    assert all(new_pool is not pool for new_pool, pool in zip(new_pools, pools))
@@ -0,0 +1,134 @@
+"""Ballot quotas and submission rate limits, with Redis replaced by fakeredis."""
+from datetime import date, timedelta
+
+import pytest
+
+from app.core.metrics import submission_rejections
+from app.core.security import data_protection
+from app.services.submission_limiter import SubmissionLimiter
+
+# Quotas expire after the draw, so only future draw dates are counted
+DRAW_DATE = date.today() + timedelta(days=1)
+OTHER_DRAW_DATE = date.today() + timedelta(days=2)
+
+
+def new_limiter(redis_url="redis://fake", participant_quota=2, rate_limit=2) -> SubmissionLimiter:
+    return SubmissionLimiter(
+        redis_url=redis_url,
+        participant_quota=participant_quota,
+        rate_limit=rate_limit,
+        rate_window_seconds=60,
+        local_size=100,
+        quota_hash_key=b"quota key",
+    )
+
+
+def rejections(reason: str) -> int:
+    return submission_rejections.values().get((reason,), 0)
+
+
+@pytest.fixture
+def redis_down(fake_redis):
+    fake_redis.connection_pool.connection_kwargs["server"].connected = False
+
+
+def test_quotas_are_shared_between_processes(fake_redis):
+    limiter = new_limiter()
+    other_process = new_limiter()
+    rejected = rejections("quota")
+
+    accepted = limiter.acquire_quotas({("a@example.com", DRAW_DATE): 1, ("b@example.com", DRAW_DATE): 3})
+    assert accepted == {("a@example.com", DRAW_DATE): 1, ("b@example.com", DRAW_DATE): 2}
+    accepted = other_process.acquire_quotas(
+        {("a@example.com", DRAW_DATE): 2, ("a@example.com", OTHER_DRAW_DATE): 1}
+    )
+    assert accepted == {("a@example.com", DRAW_DATE): 1, ("a@example.com", OTHER_DRAW_DATE): 1}
+    assert rejections("quota") == rejected + 2
+    # Emails never reach Redis
+    assert not any(b"example.com" in key for key in fake_redis.keys())
+    assert all(fake_redis.ttl(key) > 0 for key in fake_redis.keys())
+
+
+def test_exhausted_quotas_are_rejected_without_redis(fake_redis):
+    limiter = new_limiter()
+    limiter.acquire_quotas({("a@example.com", DRAW_DATE): 3})
+    fake_redis.connection_pool.connection_kwargs["server"].connected = False
+
+    assert limiter.acquire_quotas({("a@example.com", DRAW_DATE): 1}) == {("a@example.com", DRAW_DATE): 0}
+
+
+def test_released_quota_can_be_acquired_again(fake_redis):
+    limiter = new_limiter()
+    limiter.acquire_quotas({("a@example.com", DRAW_DATE): 2})
+    assert limiter.acquire_quotas({("a@example.com", DRAW_DATE): 1}) == {("a@example.com", DRAW_DATE): 0}
+
+    limiter.release_quotas({("a@example.com", DRAW_DATE): 1})
+
+    assert limiter.acquire_quotas({("a@example.com", DRAW_DATE): 2}) == {("a@example.com", DRAW_DATE): 1}
+
+
+def test_quotas_survive_sensitive_data_key_rotations(fake_redis, monkeypatch):
+    limiter = new_limiter()
+    limiter.acquire_quotas({("a@example.com", DRAW_DATE): 1})
+    keys = fake_redis.keys()
+
+    # A new key version changes the search hashes
+    monkeypatch.setattr(data_protection, "hash_for_search", lambda data: f"rotated:{data}")
+    monkeypatch.setattr(data_protection, "hash_many", lambda data: [f"rotated:{value}" for value in data])
+
+    assert new_limiter().acquire_quotas({("a@example.com", DRAW_DATE): 2}) == {("a@example.com", DRAW_DATE): 1}
+    assert fake_redis.keys() == keys
+
+
+def test_quotas_are_counted_in_process_while_redis_is_down(redis_down):
+    limiter = new_limiter()
+
+    assert limiter.acquire_quotas({("a@example.com", DRAW_DATE): 3}) == {("a@example.com", DRAW_DATE): 2}
+
+
+def test_without_quota_everything_is_accepted():
+    limiter = new_limiter(redis_url=None, participant_quota=None)
+
+    assert limiter.acquire_quotas({("a@example.com", DRAW_DATE): 100}) == {("a@example.com", DRAW_DATE): 100}
+
+
+@pytest.mark.anyio
+async def test_quota_of_single_submissions(fake_redis):
+    limiter = new_limiter()
+
+    assert await limiter.acquire_quota_async(email="a@example.com", draw_date=DRAW_DATE)
+    assert await limiter.acquire_quota_async(email="a@example.com", draw_date=DRAW_DATE)
+    assert not await limiter.acquire_quota_async(email="a@example.com", draw_date=DRAW_DATE)
+    await limiter.release_quota_async(email="a@example.com", draw_date=DRAW_DATE)
+    assert await limiter.acquire_quota_async(email="a@example.com", draw_date=DRAW_DATE)
+    # Shared with batch submissions
+    assert limiter.acquire_quotas({("a@example.com", DRAW_DATE): 1}) == {("a@example.com", DRAW_DATE): 0}
+
+
+@pytest.mark.anyio
+async def test_rate_limit_is_shared_between_processes(fake_redis):
+    limiter = new_limiter()
+    other_process = new_limiter()
+    rejected = rejections("rate_limit")
+
+    assert await limiter.check_client_async("10.0.0.1") == 0
+    assert await other_process.check_client_async("10.0.0.1") == 0
+    retry_after = await limiter.check_client_async("10.0.0.1")
+
+    assert 0 < retry_after <= 60
+    assert await limiter.check_client_async("10.0.0.2") == 0
+    assert rejections("rate_limit") == rejected + 1
+
+
+@pytest.mark.anyio
+async def test_rate_limit_uses_token_buckets_while_redis_is_down(redis_down):
+    limiter = new_limiter()
+
+    assert await limiter.check_client_async("10.0.0.1") == 0
+    assert await limiter.check_client_async("10.0.0.1") == 0
+    retry_after = await limiter.check_client_async("10.0.0.1")
+
+    # One token is refilled every 30 seconds
+    assert 29 < retry_after <= 30
+    # Rejected again without taking a token
+    assert 0 < await limiter.check_client_async("10.0.0.1") <= retry_after
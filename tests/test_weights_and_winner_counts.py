@@ -0,0 +1,72 @@
+"""Ballot weights and lottery winner counts set through the API's schemas and services."""
+import pytest
+from pydantic import ValidationError
+from sqlalchemy import select
+
+from app.models import Ballot, DrawAudit, Lottery
+from app.schemas.ballot import SubmitBallotBatchItem, SubmitBallotByLotteryDrawDateRequest
+from app.schemas.lottery import SetLotteryWinnerCountRequest
+from app.services.ballot_service import BallotService
+from app.services.lottery_service import LotteryService
+
+
+@pytest.mark.parametrize("schema", [SubmitBallotByLotteryDrawDateRequest, SubmitBallotBatchItem])
+def test_weights_must_be_positive(schema, draw_date):
+    assert schema(email="a@example.com", draw_date=draw_date).weight == 1
+    assert schema(email="a@example.com", draw_date=draw_date, weight=3).weight == 3
+    for weight in (0, -1, 32768):
+        with pytest.raises(ValidationError):
+            schema(email="a@example.com", draw_date=draw_date, weight=weight)
+
+
+def test_winner_count_must_be_positive(draw_date):
+    assert SetLotteryWinnerCountRequest(draw_date=draw_date, winner_count=3).winner_count == 3
+    with pytest.raises(ValidationError):
+        SetLotteryWinnerCountRequest(draw_date=draw_date, winner_count=0)
+
+
+def test_submitted_weights_are_stored(db, draw_date):
+    batch = BallotService.submit_batch(
+        db=db,
+        ballots=[
+            SubmitBallotBatchItem(email="b@example.com", draw_date=draw_date),
+            SubmitBallotBatchItem(email="c@example.com", draw_date=draw_date, weight=5),
+        ],
+    )
+    single = BallotService.submit_by_lottery_draw_date(db=db, email="a@example.com", draw_date=draw_date, weight=2)
+
+    weights = dict(db.execute(select(Ballot.id, Ballot.weight)).all())
+    assert weights == {
+        single.id: 2,
+        batch.results[0].ballot_id: 1,
+        batch.results[1].ballot_id: 5,
+    }
+
+
+@pytest.mark.anyio
+async def test_async_submitted_weight_is_stored(db, async_db, draw_date):
+    ballot = await BallotService.submit_by_lottery_draw_date_async(
+        db=async_db, email="a@example.com", draw_date=draw_date, weight=4
+    )
+
+    assert db.scalar(select(Ballot.weight).where(Ballot.id == ballot.id)) == 4
+
+
+@pytest.mark.anyio
+async def test_draw_draws_the_winner_count(db, async_db, draw_date):
+    created = await LotteryService.set_winner_count_async(db=async_db, draw_date=draw_date, winner_count=5)
+    BallotService.submit_batch(
+        db=db,
+        ballots=[SubmitBallotBatchItem(email=f"{index}@example.com", draw_date=draw_date) for index in range(10)],
+    )
+    updated = await LotteryService.set_winner_count_async(db=async_db, draw_date=draw_date, winner_count=3)
+
+    assert updated.lottery_id == created.lottery_id
+    upcoming = await LotteryService.get_upcoming_async(db=async_db)
+    assert [(lottery.winner_count, lottery.ballot_count) for lottery in upcoming.lotteries] == [(3, 10)]
+
+    winning_ballots = LotteryService.draw_winners(db=db, draw_date=draw_date)
+
+    assert [winning_ballot.rank for winning_ballot in winning_ballots] == [1, 2, 3]
+    assert db.scalar(select(DrawAudit.winner_count)) == 3
+    assert db.scalar(select(Lottery.winner_count)) == 3
@@ -0,0 +1,133 @@
+"""Read-through caching of winning ballots, with Redis replaced by fakeredis."""
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from uuid import uuid4
+
+import pytest
+
+from app.core.cache import TieredCache
+from app.core.metrics import cache_hits, cache_misses
+from app.crud.winning_ballot_crud import WinningBallotCRUD
+from app.schemas.winning_ballot import LotteryWinningBallotsResponse
+from app.services import winning_ballot_service
+from app.services.ballot_service import BallotService
+from app.services.lottery_service import LotteryService
+from app.services.winning_ballot_service import WinningBallotService
+from app.tasks.lottery_tasks import draw_lottery
+
+DRAW_DATE = date(2025, 6, 1)
+
+
+def winning_ballots(count: int = 2) -> list[SimpleNamespace]:
+    return [
+        SimpleNamespace(
+            ballot_id=uuid4(),
+            lottery_draw_date=DRAW_DATE,
+            ballot_created_at=datetime(2025, 5, 30, tzinfo=timezone.utc),
+            participant_alias=f"alias{rank}",
+            rank=rank,
+        )
+        for rank in range(1, count + 1)
+    ]
+
+
+def new_cache(name: str, redis_url=None) -> TieredCache:
+    return TieredCache(
+        name=name,
+        model=LotteryWinningBallotsResponse,
+        max_size=2,
+        redis_url=redis_url,
+        redis_ttl_seconds=60,
+    )
+
+
+@pytest.fixture
+def cache(fake_redis, monkeypatch) -> TieredCache:
+    """Replace the service's winning ballot cache by one using fakeredis."""
+    cache = new_cache("test_winning_ballots", redis_url="redis://fake")
+    monkeypatch.setattr(winning_ballot_service, "winning_ballot_cache", cache)
+    return cache
+
+
+def test_local_tier_evicts_least_recently_used():
+    cache = new_cache("test_local_only")
+    responses = [LotteryWinningBallotsResponse(winning_ballots=winning_ballots()) for _ in range(3)]
+    cache.set("a", responses[0])
+    cache.set("b", responses[1])
+    cache.get("a")
+    cache.set("c", responses[2])
+
+    assert cache.get("a") == responses[0]
+    assert cache.get("b") is None
+    assert cache.get("c") == responses[2]
+
+
+def test_redis_tier_is_shared_between_processes(fake_redis):
+    response = LotteryWinningBallotsResponse(winning_ballots=winning_ballots())
+    writer = new_cache("test_shared", redis_url="redis://fake")
+    # Another process, with an empty local tier
+    reader = new_cache("test_shared", redis_url="redis://fake")
+    hits = cache_hits.values().get(("test_shared", "redis"), 0)
+
+    writer.set("2025-06-01", response)
+
+    assert fake_redis.ttl("cache:test_shared:2025-06-01") == 60
+    assert reader.get("2025-06-01") == response
+    assert cache_hits.values()[("test_shared", "redis")] == hits + 1
+    # Copied into the local tier
+    assert reader.local.get("2025-06-01") == response
+
+
+def test_redis_errors_are_misses(fake_redis):
+    cache = new_cache("test_unavailable", redis_url="redis://fake")
+    misses = cache_misses.values().get(("test_unavailable",), 0)
+    fake_redis.connection_pool.connection_kwargs["server"].connected = False
+
+    cache.set("2025-06-01", LotteryWinningBallotsResponse(winning_ballots=winning_ballots()))
+    cache.local.clear()
+
+    assert cache.get("2025-06-01") is None
+    assert cache_misses.values()[("test_unavailable",)] == misses + 1
+
+
+def test_lookup_reads_through_the_cache(cache, monkeypatch):
+    stored = winning_ballots()
+    calls = []
+
+    def get_by_lottery_draw_date(db, draw_date):
+        calls.append(draw_date)
+        return stored
+
+    monkeypatch.setattr(WinningBallotCRUD, "get_by_lottery_draw_date", get_by_lottery_draw_date)
+
+    first = WinningBallotService.get_by_lottery_draw_date(db=None, draw_date=DRAW_DATE)
+    cache.local.clear()
+    second = WinningBallotService.get_by_lottery_draw_date(db=None, draw_date=DRAW_DATE)
+
+    assert calls == [DRAW_DATE]
+    assert first == second
+    assert [winning_ballot.rank for winning_ballot in second.winning_ballots] == [1, 2]
+
+
+def test_lookup_doesnt_cache_undrawn_lotteries(cache, monkeypatch):
+    monkeypatch.setattr(WinningBallotCRUD, "get_by_lottery_draw_date", lambda db, draw_date: [])
+
+    assert WinningBallotService.get_by_lottery_draw_date(db=None, draw_date=DRAW_DATE) is None
+    assert cache.get(DRAW_DATE.isoformat()) is None
+
+
+@pytest.mark.anyio
+async def test_draw_populates_the_cache(cache, monkeypatch):
+    drawn = winning_ballots(3)
+    monkeypatch.setattr(BallotService, "wait_for_queued_ballots", lambda draw_date: True)
+    monkeypatch.setattr(LotteryService, "draw_winners", lambda db, draw_date: drawn)
+    monkeypatch.setattr("app.tasks.lottery_tasks.get_db", lambda: iter([SimpleNamespace(close=lambda: None)]))
+
+    result = draw_lottery(DRAW_DATE.isoformat())
+
+    assert result["winning_ballot_ids"] == [str(winning_ballot.ballot_id) for winning_ballot in drawn]
+    cache.local.clear()
+    cached = await WinningBallotService.get_by_lottery_draw_date_async(db=None, draw_date=DRAW_DATE)
+    assert [winning_ballot.ballot_id for winning_ballot in cached.winning_ballots] == [
+        winning_ballot.ballot_id for winning_ballot in drawn
+    ]